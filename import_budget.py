@@ -0,0 +1,66 @@
+"""Замер времени холодного импорта модулей игры"""
+import os
+import subprocess
+import sys
+
+# Бюджет в миллисекундах; модели и правила не должны тянуть за собой pygame
+IMPORT_BUDGETS = {
+    "rpg_ai": 20,
+    "rpg_core": 30,
+    "rpg_i18n": 20,
+    "rpg_telemetry": 20,
+    "rpg_stash": 40,
+    "rpg_runs": 40,
+    "rpg_server": 100,
+    "rpg_alloc": 200,
+    "rpg_audio": 200,
+    "rpg_textures": 200,
+    "rpg_game": 250,
+}
+PYGAME_FREE = {"rpg_core", "rpg_ai", "rpg_i18n", "rpg_telemetry", "rpg_stash", "rpg_runs", "rpg_server"}
+
+MEASURE_CODE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+pygame = sys.modules.get("pygame")
+print(elapsed, pygame is not None, bool(pygame and pygame.get_init()))
+"""
+
+
+def measure(module, runs=5):
+    """Лучшее время импорта в новом интерпретаторе за несколько запусков"""
+    best = None
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE_CODE.format(module=module)],
+            capture_output=True, text=True, check=True,
+            env={**os.environ, "PYGAME_HIDE_SUPPORT_PROMPT": "1"},
+        ).stdout.split()
+        elapsed = float(output[-3])
+        result = (elapsed, output[-2] == "True", output[-1] == "True")
+        if best is None or elapsed < best[0]:
+            best = result
+    return best
+
+
+def main():
+    failed = False
+    for module, budget in IMPORT_BUDGETS.items():
+        elapsed, pygame_loaded, pygame_initialized = measure(module)
+        problems = []
+        if elapsed > budget:
+            problems.append(f"бюджет {budget} мс превышен")
+        if module in PYGAME_FREE and pygame_loaded:
+            problems.append("импортирует pygame")
+        if pygame_initialized:
+            problems.append("инициализирует pygame при импорте")
+        status = "OK" if not problems else "FAIL: " + ", ".join(problems)
+        print(f"{module}: {elapsed:.1f} мс (бюджет {budget} мс) {status}")
+        failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
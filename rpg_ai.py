@@ -0,0 +1,211 @@
+"""Политики поведения: враги (простое правило и поиск expectimax с кэшем позиций) и автобой игрока"""
+import random
+import time
+from collections import OrderedDict
+
+
+ACTIONS = ("attack", "heavy_attack", "defend", "charge")
+
+# Разброс урона сводится к трём равновероятным точкам: минимум, середина, максимум
+ENEMY_ATTACK_SPREAD = (-3, 0, 3)
+ENEMY_HEAVY_SPREAD = (-5, 0, 5)
+PLAYER_ATTACK_SPREAD = (-4, 0, 4)
+
+HP_BUCKET = 4
+WIN_SCORE = 1000.0
+
+
+class RulePolicy:
+    """Прежнее поведение: случайное правило без просчёта"""
+    def choose(self, enemy, player, budget=None):
+        if enemy.hp < enemy.max_hp * 0.3 and random.random() < 0.4:
+            return "defend"
+        elif enemy.charge >= 1:
+            return "heavy_attack"
+        elif random.random() < 0.3:
+            return "charge"
+        else:
+            return "attack"
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class ExpectimaxPolicy:
+    """Выбор действия поиском expectimax по распределениям урона с ограничением по времени"""
+    def __init__(self, max_depth=2, time_budget=0.004, cache_limit=20000):
+        self.max_depth = max_depth
+        self.time_budget = time_budget
+        self.cache_limit = cache_limit
+        self.cache = OrderedDict()
+        self.deadline = 0.0
+        self.nodes = 0
+        self.last_depth = 0
+    
+    def legal_actions(self, charge):
+        if charge >= 1:
+            return ("heavy_attack", "defend")
+        return ("attack", "defend", "charge")
+    
+    def choose(self, enemy, player, budget=None):
+        """Итеративное углубление: берётся результат последней глубины, уложившейся в бюджет"""
+        params = (
+            enemy.attack, enemy.defense, enemy.max_hp,
+            player.attack, player.defense, player.max_hp,
+            player.crit_chance, player.crit_multiplier,
+        )
+        state = (enemy.hp, player.hp, enemy.charge)
+        # Первая глубина почти всегда укладывается в одну проверку таймера, так что ход есть всегда
+        self.deadline = time.perf_counter() + min(budget or self.time_budget, self.time_budget)
+        self.nodes = 0
+        
+        best_action = self.legal_actions(enemy.charge)[0]
+        self.last_depth = 0
+        for depth in range(1, self.max_depth + 1):
+            try:
+                best_action = self.search_root(state, params, depth)
+                self.last_depth = depth
+            except SearchTimeout:
+                break
+        return best_action
+    
+    def search_root(self, state, params, depth):
+        best_action, best_value = None, None
+        for action in self.legal_actions(state[2]):
+            value = self.enemy_action_value(state, params, action, depth)
+            if best_value is None or value > best_value:
+                best_action, best_value = action, value
+        return best_action
+    
+    def enemy_action_value(self, state, params, action, depth):
+        """Среднее по исходам действия врага, затем ответ игрока"""
+        enemy_hp, player_hp, charge = state
+        enemy_attack, _, _, _, player_defense = params[:5]
+        
+        if action == "defend":
+            return self.player_reply((enemy_hp, player_hp, charge), params, True, depth)
+        if action == "charge":
+            return self.player_reply((enemy_hp, player_hp, charge + 1), params, False, depth)
+        
+        if action == "heavy_attack":
+            base, spread, charge = int(enemy_attack * 1.8), ENEMY_HEAVY_SPREAD, 0
+        else:
+            base, spread = enemy_attack, ENEMY_ATTACK_SPREAD
+        
+        total = 0.0
+        for delta in spread:
+            damage = max(1, base + delta - player_defense)
+            total += self.player_reply((enemy_hp, max(0, player_hp - damage), charge), params, False, depth)
+        return total / len(spread)
+    
+    def player_reply(self, state, params, defending, depth):
+        """Узел случая: обычная атака игрока с шансом крита"""
+        enemy_hp, player_hp, charge = state
+        if player_hp <= 0:
+            return WIN_SCORE + depth
+        
+        _, enemy_defense, _, player_attack, _, _, crit_chance, crit_multiplier = params
+        defense = enemy_defense * (2 if defending else 1)
+        
+        total = 0.0
+        for delta in PLAYER_ATTACK_SPREAD:
+            base = player_attack + delta
+            hit = max(1, base - defense)
+            crit = max(1, int(base * crit_multiplier) - defense)
+            total += (1 - crit_chance) * self.value((max(0, enemy_hp - hit), player_hp, charge), params, depth - 1)
+            total += crit_chance * self.value((max(0, enemy_hp - crit), player_hp, charge), params, depth - 1)
+        return total / len(PLAYER_ATTACK_SPREAD)
+    
+    def value(self, state, params, depth):
+        """Узел максимума врага с кэшем по квантованному состоянию"""
+        enemy_hp, player_hp, charge = state
+        if enemy_hp <= 0:
+            return -WIN_SCORE - depth
+        if depth <= 0:
+            return self.evaluate(state, params)
+        
+        self.nodes += 1
+        if self.nodes % 64 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+        
+        key = (enemy_hp // HP_BUCKET, player_hp // HP_BUCKET, charge, depth, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        result = max(
+            self.enemy_action_value(state, params, action, depth)
+            for action in self.legal_actions(charge)
+        )
+        
+        self.cache[key] = result
+        if len(self.cache) > self.cache_limit:
+            self.cache.popitem(last=False)
+        return result
+    
+    def evaluate(self, state, params):
+        """Оценка позиции для врага: доля потерянного здоровья игрока минус своя"""
+        enemy_hp, player_hp, charge = state
+        enemy_max_hp, player_max_hp = params[2], params[5]
+        return (1 - player_hp / player_max_hp) - (1 - enemy_hp / enemy_max_hp) + 0.05 * charge
+
+
+class AutoBattlePolicy:
+    """Политика автобоя за игрока: зелье при низком здоровье, ротация навыков, иначе атака"""
+    def __init__(self, potion_threshold=0.35, skill_rotation=(3, 1, 0), mana_reserve=0):
+        self.potion_threshold = potion_threshold
+        self.skill_rotation = skill_rotation
+        self.mana_reserve = mana_reserve
+        self.rotation_index = 0
+    
+    def reset(self):
+        self.rotation_index = 0
+    
+    def potion_handle(self, player):
+        """Самое слабое зелье, которого хватает, чтобы не лечить впустую"""
+        potions = list(player.inventory.of_type("potion_hp").items()) + list(player.inventory.of_type("potion_multi").items())
+        if not potions:
+            return None
+        missing = player.max_hp - player.hp
+        enough = [entry for entry in potions if entry[1].value >= missing]
+        handle, _ = min(enough, key=lambda entry: entry[1].value) if enough else max(potions, key=lambda entry: entry[1].value)
+        return handle
+    
+    def needs_potion(self, player):
+        return player.hp < player.max_hp * self.potion_threshold
+    
+    def choose_target(self, enemies):
+        """Индекс живого врага с наименьшим здоровьем: добивать быстрее, чем распределять урон"""
+        alive = [index for index, enemy in enumerate(enemies) if enemy.hp > 0]
+        return min(alive, key=lambda index: enemies[index].hp)
+    
+    def choose(self, player, enemies):
+        """Действие игрока: ("item", дескриптор), ("skill", индекс) или ("attack", None)"""
+        if self.needs_potion(player):
+            handle = self.potion_handle(player)
+            if handle is not None:
+                return ("item", handle)
+        
+        alive = sum(1 for enemy in enemies if enemy.hp > 0)
+        if alive > 1:
+            for skill_index, skill in enumerate(player.skills):
+                if skill.area and player.mana - skill.mana_cost >= self.mana_reserve:
+                    return ("skill", skill_index)
+        
+        for offset in range(len(self.skill_rotation)):
+            position = (self.rotation_index + offset) % len(self.skill_rotation)
+            skill_index = self.skill_rotation[position]
+            if skill_index >= len(player.skills):
+                continue
+            skill = player.skills[skill_index]
+            if skill.effect_type == "damage" and player.mana - skill.mana_cost >= self.mana_reserve:
+                self.rotation_index = position + 1
+                return ("skill", skill_index)
+        
+        return ("attack", None)
+
+
+RULE_POLICY = RulePolicy()
+ENEMY_POLICY = ExpectimaxPolicy(max_depth=2)
+BOSS_POLICY = ExpectimaxPolicy(max_depth=4, time_budget=0.008)
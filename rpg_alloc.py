@@ -0,0 +1,206 @@
+"""Учёт выделения поверхностей по кадрам, местам вызова и экранам, снимки tracemalloc при смене экрана"""
+import os
+import sys
+import tracemalloc
+from collections import Counter, defaultdict
+
+import pygame
+
+TRANSFORM_FUNCTIONS = ("scale", "smoothscale", "rotate", "rotozoom", "flip", "scale2x", "scale_by", "smoothscale_by")
+
+
+class ScreenAllocations:
+    """Итоги одного экрана: кадры, поверхности и байты; прогрев учитывается отдельно и в бюджет не входит"""
+    def __init__(self):
+        self.frames = 0
+        self.surfaces = 0
+        self.bytes = 0
+        self.peak = 0
+        self.warmup_frames = 0
+        self.warmup_surfaces = 0
+        self.sites = Counter()
+        self.site_bytes = Counter()
+
+
+class AllocationTracker:
+    """Опциональный учёт: подменяет конструкторы поверхностей pygame счётчиками; ставится до создания шрифтов"""
+    # Первые кадры каждого посещения экрана собирают его кэши один раз; бюджет сверяется по кадрам после них
+    WARMUP_FRAMES = 30
+    
+    def __init__(self, budgets=None, snapshots=True, top=10, warmup_frames=WARMUP_FRAMES):
+        self.budgets = budgets or {}
+        self.snapshots = snapshots
+        self.top = top
+        self.warmup_frames = warmup_frames
+        self.screens = defaultdict(ScreenAllocations)
+        # До первого кадра всё выделенное относится к запуску
+        self.state = "startup"
+        self.frame_surfaces = 0
+        self.frame_bytes = 0
+        self.frame_warming = True
+        self.visit_frames = 0
+        self.transitions = []
+        self.last_snapshot = None
+        self.originals = {}
+        self.surface_class = None
+        self.adopting = False
+    
+    def install(self):
+        tracker = self
+        
+        class CountingSurface(pygame.Surface):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                if not tracker.adopting:
+                    tracker.count(self, 2)
+            
+            def copy(self):
+                return tracker.count(super().copy(), 2)
+            
+            def convert(self, *args):
+                return tracker.count(super().convert(*args), 2)
+            
+            def convert_alpha(self, *args):
+                return tracker.count(super().convert_alpha(*args), 2)
+        
+        class CountingFont(pygame.font.Font):
+            def render(self, *args, **kwargs):
+                return tracker.adopt(tracker.count(super().render(*args, **kwargs), 2))
+        
+        self.surface_class = CountingSurface
+        self.originals[(pygame, "Surface")] = pygame.Surface
+        self.originals[(pygame.font, "Font")] = pygame.font.Font
+        pygame.Surface = CountingSurface
+        pygame.font.Font = CountingFont
+        for name in TRANSFORM_FUNCTIONS:
+            function = getattr(pygame.transform, name, None)
+            if function is not None:
+                self.originals[(pygame.transform, name)] = function
+                setattr(pygame.transform, name, self.counting(function))
+        
+        if self.snapshots:
+            tracemalloc.start()
+    
+    def uninstall(self):
+        for (module, name), original in self.originals.items():
+            setattr(module, name, original)
+        self.originals = {}
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def counting(self, function):
+        def wrapper(*args, **kwargs):
+            return self.adopt(self.count(function(*args, **kwargs), 2))
+        return wrapper
+    
+    def adopt(self, surface):
+        """Копия поверхности из C-функции в классе со счётчиками, чтобы учитывался и её convert; сама копия не считается"""
+        # Методы базового pygame.Surface не подменить, поэтому текст и результаты transform копируются.
+        # Палитру и colorkey так точно не скопировать, такие поверхности остаются как есть
+        if isinstance(surface, self.surface_class) or surface.get_colorkey() is not None or surface.get_bitsize() < 24:
+            return surface
+        self.adopting = True
+        try:
+            adopted = self.surface_class(surface.get_size(), surface.get_flags(), surface)
+        finally:
+            self.adopting = False
+        # На нулевой поверхности максимум по каналам - точная копия пикселей вместе с альфой
+        adopted.blit(surface, (0, 0), special_flags=pygame.BLEND_RGBA_MAX)
+        return adopted
+    
+    def count(self, surface, depth):
+        """Учесть поверхность; место вызова - функция и строка на depth кадров выше"""
+        frame = sys._getframe(depth)
+        site = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        size = surface.get_width() * surface.get_height() * surface.get_bytesize()
+        screen = self.screens[self.state]
+        screen.sites[site] += 1
+        screen.site_bytes[site] += size
+        self.frame_surfaces += 1
+        self.frame_bytes += size
+        return surface
+    
+    def begin_frame(self, state, warming=False):
+        """Закрыть предыдущий кадр и начать новый; смена экрана снимает tracemalloc.
+        
+        Прогревом считаются первые warmup_frames кадров посещения экрана, кадр, в котором экран сменился,
+        и кадры, начатые с warming (идёт прогрев кэшей), - их выделения разовые и от длины посещения не зависят.
+        """
+        screen = self.screens[self.state]
+        if self.frame_warming or state != self.state or self.visit_frames < self.warmup_frames:
+            screen.warmup_frames += 1
+            screen.warmup_surfaces += self.frame_surfaces
+        else:
+            screen.frames += 1
+            screen.surfaces += self.frame_surfaces
+            screen.bytes += self.frame_bytes
+            screen.peak = max(screen.peak, self.frame_surfaces)
+        self.frame_surfaces = 0
+        self.frame_bytes = 0
+        self.frame_warming = warming
+        self.visit_frames += 1
+        
+        if state != self.state:
+            self.take_snapshot(self.state, state)
+            self.state = state
+            self.visit_frames = 0
+    
+    def take_snapshot(self, previous, state):
+        """Сравнить память с прошлой сменой экрана; сохраняется только верх разницы, не сам снимок"""
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        if self.last_snapshot is not None:
+            growth = [stat for stat in snapshot.compare_to(self.last_snapshot, "lineno") if stat.size_diff > 0]
+            self.transitions.append((previous, state, sum(stat.size_diff for stat in growth), growth[:self.top]))
+        self.last_snapshot = snapshot
+    
+    def check(self):
+        """(экран, кадров, поверхностей на кадр, байт на кадр, пик, бюджет, в бюджете ли) по кадрам после прогрева"""
+        rows = []
+        for state, screen in self.screens.items():
+            if not screen.frames:
+                continue
+            per_frame = screen.surfaces / screen.frames
+            budget = self.budgets.get(state)
+            within = budget is None or per_frame <= budget
+            rows.append((state, screen.frames, per_frame, screen.bytes / screen.frames, screen.peak, budget, within))
+        return rows
+    
+    def report(self):
+        """Напечатать итоги; True, если какой-то экран превысил бюджет"""
+        over_budget = []
+        print("Выделение поверхностей по экранам (на кадр - после прогрева):")
+        for state, frames, per_frame, bytes_per_frame, peak, budget, within in self.check():
+            status = "" if budget is None else f" (бюджет {budget}) " + ("OK" if within else "FAIL")
+            print(f"  {state}: {frames} кадров, {per_frame:.1f} поверхностей и {bytes_per_frame / 1024:.1f} КБ на кадр, "
+                  f"пик {peak}{status}")
+            if not within:
+                over_budget.append(state)
+            screen = self.screens[state]
+            print(f"    прогрев: {screen.warmup_frames} кадров, {screen.warmup_surfaces} поверхностей")
+            for site, count in screen.sites.most_common(self.top // 2):
+                print(f"    {site}: {count} шт., {screen.site_bytes[site] / 1024:.0f} КБ")
+        warmup_only = [f"{state} ({screen.warmup_frames} кадров)" for state, screen in self.screens.items()
+                       if screen.warmup_frames and not screen.frames]
+        if warmup_only:
+            print(f"  Только прогрев, бюджет не сверялся: {', '.join(warmup_only)}")
+        
+        if self.transitions:
+            print("Наибольший рост памяти при смене экрана:")
+            for previous, state, growth, stats in sorted(self.transitions, key=lambda entry: -entry[2])[:self.top // 2]:
+                print(f"  {previous} -> {state}: +{growth / 1024:.0f} КБ")
+                for stat in stats[:3]:
+                    print(f"    {stat}")
+        if tracemalloc.is_tracing():
+            print("Крупнейшие источники памяти:")
+            snapshot = tracemalloc.take_snapshot()
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                print(f"  {stat}")
+        if over_budget:
+            print(f"Бюджет выделений превышен на экранах: {', '.join(over_budget)}")
+        return bool(over_budget)
@@ -0,0 +1,234 @@
+"""Звук: короткие эффекты, синтезированные и загруженные в память один раз, пул каналов и потоковая музыка"""
+import array
+import math
+import random
+
+import pygame
+
+SAMPLE_RATE = 22050
+# Маленький буфер микшера: задержка эффекта не больше пары кадров
+MIXER_BUFFER = 512
+
+
+def pre_init():
+    """Параметры микшера, которые нужно задать до pygame.init()"""
+    pygame.mixer.pre_init(SAMPLE_RATE, -16, 2, MIXER_BUFFER)
+
+
+def envelope(index, length, attack=0.01, decay=4.0):
+    """Быстрая атака и экспоненциальное затухание"""
+    position = index / length
+    if position < attack:
+        return position / attack
+    return math.exp(-decay * (position - attack))
+
+
+def tone(frequency, duration, volume=0.5, decay=4.0, harmonics=(1.0,)):
+    length = int(SAMPLE_RATE * duration)
+    step = 2 * math.pi * frequency / SAMPLE_RATE
+    samples = []
+    for i in range(length):
+        value = sum(weight * math.sin(step * i * (n + 1)) for n, weight in enumerate(harmonics))
+        samples.append(volume * envelope(i, length, decay=decay) * value)
+    return samples
+
+
+def sweep(start, end, duration, volume=0.5, decay=3.0):
+    """Тон с плавным изменением частоты"""
+    length = int(SAMPLE_RATE * duration)
+    samples = []
+    phase = 0.0
+    for i in range(length):
+        frequency = start + (end - start) * i / length
+        phase += 2 * math.pi * frequency / SAMPLE_RATE
+        samples.append(volume * envelope(i, length, decay=decay) * math.sin(phase))
+    return samples
+
+
+def noise(duration, volume=0.5, decay=6.0, smoothing=0.0, seed=0):
+    """Шум; smoothing > 0 срезает высокие частоты однополюсным фильтром"""
+    rng = random.Random(seed)
+    length = int(SAMPLE_RATE * duration)
+    samples = []
+    previous = 0.0
+    for i in range(length):
+        previous = previous * smoothing + rng.uniform(-1, 1) * (1 - smoothing)
+        samples.append(volume * envelope(i, length, attack=0.002, decay=decay) * previous)
+    return samples
+
+
+def sequence(*parts):
+    samples = []
+    for part in parts:
+        samples.extend(part)
+    return samples
+
+
+def mix(*parts):
+    samples = [0.0] * max(len(part) for part in parts)
+    for part in parts:
+        for i, value in enumerate(part):
+            samples[i] += value
+    return samples
+
+
+def synth_click():
+    return tone(1500, 0.025, 0.25, decay=8.0)
+
+
+def synth_hit():
+    return noise(0.08, 0.45, decay=7.0, smoothing=0.6, seed=1)
+
+
+def synth_crit():
+    return sequence(tone(880, 0.05, 0.35, harmonics=(1.0, 0.3)), tone(1320, 0.09, 0.35, harmonics=(1.0, 0.3)))
+
+
+def synth_poison():
+    return mix(sweep(220, 140, 0.25, 0.3), noise(0.25, 0.1, decay=3.0, smoothing=0.9, seed=2))
+
+
+def synth_fire():
+    return noise(0.3, 0.5, decay=3.0, smoothing=0.85, seed=3)
+
+
+def synth_ice():
+    return tone(2100, 0.2, 0.25, decay=5.0, harmonics=(1.0, 0.0, 0.4))
+
+
+def synth_lightning():
+    return mix(noise(0.22, 0.55, decay=9.0, smoothing=0.1, seed=4), sweep(900, 120, 0.22, 0.25, decay=5.0))
+
+
+def synth_victory():
+    return sequence(*(tone(frequency, 0.12, 0.3, decay=2.5, harmonics=(1.0, 0.25))
+                      for frequency in (523, 659, 784, 1047)))
+
+
+def synth_defeat():
+    return sequence(*(tone(frequency, 0.18, 0.3, decay=2.0, harmonics=(1.0, 0.4))
+                      for frequency in (392, 330, 262, 196)))
+
+
+# Имя: (приоритет, синтезатор). Более важный звук может вытеснить менее важный из занятого канала
+SOUND_SPECS = {
+    "click": (0, synth_click),
+    "hit": (1, synth_hit),
+    "poison": (1, synth_poison),
+    "ice": (1, synth_ice),
+    "crit": (2, synth_crit),
+    "fire": (2, synth_fire),
+    "lightning": (2, synth_lightning),
+    "victory": (3, synth_victory),
+    "defeat": (3, synth_defeat),
+}
+
+
+def to_buffer(samples, channels):
+    """Отсчёты от -1 до 1 в 16-битный буфер с нужным числом каналов"""
+    data = array.array("h")
+    for value in samples:
+        sample = int(max(-1.0, min(1.0, value)) * 32767)
+        data.extend([sample] * channels)
+    return data.tobytes()
+
+
+class SoundBank:
+    """Заранее загруженные эффекты и фиксированный пул каналов с вытеснением по приоритету"""
+    # Один и тот же эффект чаще этого интервала не перезапускается
+    MIN_INTERVAL_MS = 40
+    
+    def __init__(self, channel_count=8, volume=0.6):
+        self.channel_count = channel_count
+        self.volume = volume
+        self.enabled = False
+        self.sounds = {}
+        self.channels = []
+        self.priorities = []
+        self.started = []
+        self.last_played = {}
+    
+    def open(self, enabled=True):
+        """Подключить микшер; без звукового устройства игра просто остаётся без звука"""
+        if not enabled:
+            return False
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+        except pygame.error:
+            return False
+        if pygame.mixer.get_init()[1] != -16:
+            return False
+        
+        pygame.mixer.set_num_channels(self.channel_count)
+        # Каналы зарезервированы, чтобы Sound.play в обход пула их не занимал
+        pygame.mixer.set_reserved(self.channel_count)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.channel_count)]
+        self.priorities = [0] * self.channel_count
+        self.started = [0] * self.channel_count
+        self.enabled = True
+        return True
+    
+    def load(self, name):
+        """Синтезировать эффект и загрузить его в память; вызывается при прогреве, а не в бою"""
+        if not self.enabled or name in self.sounds:
+            return
+        priority, synth = SOUND_SPECS[name]
+        channels = pygame.mixer.get_init()[2]
+        sound = pygame.mixer.Sound(buffer=to_buffer(synth(), channels))
+        sound.set_volume(self.volume)
+        self.sounds[name] = (sound, priority)
+        self.last_played[name] = -self.MIN_INTERVAL_MS
+    
+    def load_all(self):
+        for name in SOUND_SPECS:
+            self.load(name)
+    
+    def pick_channel(self, priority):
+        """Свободный канал, иначе самый старый из наименее важных, если он не важнее нового звука"""
+        victim = None
+        for index, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return index
+            if victim is None or (self.priorities[index], self.started[index]) < (self.priorities[victim], self.started[victim]):
+                victim = index
+        if self.priorities[victim] > priority:
+            return None
+        return victim
+    
+    def play(self, name):
+        """Запустить эффект; незагруженные и слишком частые повторы молча пропускаются"""
+        entry = self.sounds.get(name) if self.enabled else None
+        if entry is None:
+            return
+        now = pygame.time.get_ticks()
+        if now - self.last_played[name] < self.MIN_INTERVAL_MS:
+            return
+        
+        sound, priority = entry
+        index = self.pick_channel(priority)
+        if index is None:
+            return
+        self.channels[index].play(sound)
+        self.priorities[index] = priority
+        self.started[index] = now
+        self.last_played[name] = now
+    
+    def play_music(self, path, volume=0.4):
+        """Фоновая музыка читается с диска потоком, а не загружается целиком"""
+        if not self.enabled:
+            return False
+        try:
+            pygame.mixer.music.load(path)
+        except pygame.error:
+            return False
+        pygame.mixer.music.set_volume(volume)
+        pygame.mixer.music.play(-1)
+        return True
+    
+    def stop_music(self):
+        if self.enabled:
+            pygame.mixer.music.stop()
+
+
+AUDIO = SoundBank()
@@ -0,0 +1,1707 @@
+"""Модели, правила и игровой контент без зависимости от pygame"""
+import array
+import os
+import random
+import tempfile
+import time
+from collections import deque
+
+from rpg_ai import ENEMY_POLICY, BOSS_POLICY, AutoBattlePolicy
+from rpg_i18n import tr
+from rpg_telemetry import TELEMETRY
+
+BG_COLOR = (12, 17, 30)
+CARD_BG = (22, 32, 50)
+OVERLAY_BG = (8, 12, 20)
+
+ACCENT_PRIMARY = (66, 135, 245)
+ACCENT_SECONDARY = (88, 166, 255)
+
+SUCCESS_COLOR = (52, 211, 153)
+SUCCESS_HOVER = (74, 222, 170)
+
+DANGER_COLOR = (239, 68, 68)
+DANGER_HOVER = (248, 113, 113)
+
+WARNING_COLOR = (251, 191, 36)
+WARNING_HOVER = (252, 211, 77)
+
+PURPLE_COLOR = (168, 85, 247)
+PURPLE_HOVER = (192, 132, 252)
+
+INFO_COLOR = (96, 165, 250)
+MANA_COLOR = (99, 179, 237)
+
+TEXT_PRIMARY = (241, 245, 249)
+TEXT_SECONDARY = (148, 163, 184)
+TEXT_DISABLED = (100, 116, 139)
+
+RARITY_COMMON = (156, 163, 175)
+RARITY_UNCOMMON = (34, 197, 94)
+RARITY_RARE = (59, 130, 246)
+RARITY_EPIC = (168, 85, 247)
+RARITY_LEGENDARY = (234, 179, 8)
+
+RARITY_ORDER = {"common": 0, "uncommon": 1, "rare": 2, "epic": 3, "legendary": 4}
+
+# Верхние границы броска редкости обычного лута; по ним же анализатор телеметрии сверяет частоты
+LOOT_RARITY_THRESHOLDS = (
+    ("common", 0.50),
+    ("uncommon", 0.75),
+    ("rare", 0.90),
+    ("epic", 0.98),
+    ("legendary", 1.0),
+)
+LOOT_RARITY_MULTIPLIERS = {
+    "common": 1.0,
+    "uncommon": 1.3,
+    "rare": 1.7,
+    "epic": 2.2,
+    "legendary": 3.0
+}
+
+# Таблицы контента не меняются во время игры и общие для всех игроков и сессий
+ENEMY_TYPES = (
+    ("Гоблин", {"hp_mult": 1.0, "attack_mult": 0.9, "defense_mult": 0.8}),
+    ("Орк", {"hp_mult": 1.3, "attack_mult": 1.2, "defense_mult": 1.0}),
+    ("Скелет", {"hp_mult": 0.8, "attack_mult": 1.1, "defense_mult": 0.7}),
+    ("Тёмный маг", {"hp_mult": 0.9, "attack_mult": 1.4, "defense_mult": 0.6}),
+    ("Дракон", {"hp_mult": 1.5, "attack_mult": 1.3, "defense_mult": 1.2}),
+)
+BOSS_NAMES = {
+    "Тёмный лес": "Древний Энт",
+    "Заброшенная крепость": "Рыцарь-Смерть",
+    "Пещера гоблинов": "Король Гоблинов",
+    "Логово орков": "Вождь Орков",
+    "Драконье гнездо": "Древний Дракон"
+}
+
+# Каталог сохранений в пользовательских данных, а не в текущем каталоге запуска
+DATA_DIR_NAME = "zlyki"
+
+
+def user_data_path(name):
+    """Путь к файлу сохранений в каталоге zlyki пользовательских данных: $XDG_DATA_HOME или ~/.local/share, в Windows %APPDATA%"""
+    base = os.environ.get("APPDATA") if os.name == "nt" else os.environ.get("XDG_DATA_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, DATA_DIR_NAME, name)
+
+
+class Skill:
+    """Класс навыка"""
+    def __init__(self, name, damage, mana_cost, effect_type="damage", effect_value=0, description="", area=False):
+        self.name = name
+        self.damage = damage
+        self.mana_cost = mana_cost
+        self.effect_type = effect_type
+        self.effect_value = effect_value
+        self.description = description
+        self.area = area  # Бьёт по всем врагам
+
+
+PLAYER_SKILLS = (
+    Skill("Мощный удар", 35, 25, "damage", 0, "Сильная атака"),
+    Skill("Молния", 45, 40, "damage", 0, "Магический урон"),
+    Skill("Защита", 0, 20, "buff", 5, "+5 защиты на 2 хода"),
+    Skill("Огненный шар", 55, 50, "damage", 0, "Урон всем врагам", area=True),
+)
+
+
+class Item:
+    """Класс предмета с системой редкости и эффектами"""
+    def __init__(self, name, item_type, value, description="", rarity="common", effect=None, armor_slot=None):
+        self.name = name
+        self.item_type = item_type
+        self.value = value
+        self.description = description
+        self.rarity = rarity
+        self.effect = effect
+        self.armor_slot = armor_slot
+        
+        self.sell_price = self.calculate_sell_price()
+    
+    def calculate_sell_price(self):
+        """Рассчитать цену продажи по редкости"""
+        base_prices = {
+            "common": 5,
+            "uncommon": 15,
+            "rare": 40,
+            "epic": 100,
+            "legendary": 300
+        }
+        
+        if self.item_type == "potion_hp" or self.item_type == "potion_mana":
+            return self.value // 2
+        
+        multiplier = 1
+        if self.item_type == "weapon":
+            multiplier = self.value * 2
+        elif self.item_type == "armor":
+            multiplier = self.value // 3
+        
+        return base_prices.get(self.rarity, 5) + multiplier
+    
+    def get_rarity_color(self):
+        """Получить цвет редкости"""
+        colors = {
+            "common": RARITY_COMMON,
+            "uncommon": RARITY_UNCOMMON,
+            "rare": RARITY_RARE,
+            "epic": RARITY_EPIC,
+            "legendary": RARITY_LEGENDARY
+        }
+        return colors.get(self.rarity, RARITY_COMMON)
+    
+    def get_rarity_name(self):
+        """Название редкости на языке интерфейса"""
+        if self.rarity not in RARITY_ORDER:
+            return tr("rarity.common")
+        return tr("rarity." + self.rarity)
+    
+    def get_modifiers(self):
+        """Бонусы к характеристикам, которые даёт экипированный предмет"""
+        if self.item_type == "weapon":
+            return {"attack": self.value}
+        elif self.item_type == "armor":
+            return {"max_hp": self.value}
+        return {}
+
+
+class ShopItem:
+    """Товар в магазине"""
+    def __init__(self, name, item_type, base_price, description, stock="unlimited", item_data=None):
+        self.name = name
+        self.item_type = item_type
+        self.base_price = base_price
+        self.description = description
+        self.stock = stock
+        self.item_data = item_data
+        self.sold_count = 0
+    
+    def get_current_price(self, player=None):
+        """Получить текущую цену (может зависеть от количества покупок)"""
+        if self.item_type == "upgrade_attack" and player:
+            return int(self.base_price * (1.5 ** player.attack_upgrades_bought))
+        elif self.item_type == "upgrade_defense" and player:
+            return int(self.base_price * (1.5 ** player.defense_upgrades_bought))
+        return self.base_price
+    
+    def get_category(self):
+        """Категория товара для фильтра магазина"""
+        if self.item_type.startswith("potion"):
+            return "potions"
+        elif self.item_type.startswith("upgrade"):
+            return "upgrades"
+        return "equipment"
+    
+    def get_rarity(self):
+        if self.item_data and "rarity" in self.item_data:
+            return self.item_data["rarity"]
+        return "common"
+    
+    def get_color(self):
+        """Цвет товара в зависимости от типа"""
+        if self.item_type == "potion_hp":
+            return SUCCESS_COLOR
+        elif self.item_type == "potion_mana":
+            return MANA_COLOR
+        elif self.item_type == "potion_multi":
+            return PURPLE_COLOR
+        elif self.item_type in ["upgrade_attack", "upgrade_defense"]:
+            return WARNING_COLOR
+        elif self.item_data and "rarity" in self.item_data:
+            temp_item = Item("temp", "weapon", 0, "", self.item_data["rarity"])
+            return temp_item.get_rarity_color()
+        else:
+            return ACCENT_PRIMARY
+
+
+class Inventory:
+    """Инвентарь со стабильными дескрипторами предметов и индексами по типам и слотам"""
+    EQUIPMENT_TYPES = ("weapon", "armor")
+    
+    def __init__(self, items=()):
+        self.items = {}
+        self.by_type = {}
+        self.by_slot = {}
+        self.equipment = {}
+        self.next_handle = 1
+        
+        for item in items:
+            self.add(item)
+    
+    def add(self, item):
+        """Добавить предмет и вернуть его дескриптор"""
+        handle = self.next_handle
+        self.next_handle += 1
+        
+        self.items[handle] = item
+        self.by_type.setdefault(item.item_type, {})[handle] = item
+        if item.item_type in self.EQUIPMENT_TYPES:
+            self.equipment[handle] = item
+        if item.armor_slot:
+            self.by_slot.setdefault(item.armor_slot, {})[handle] = item
+        return handle
+    
+    def remove(self, handle):
+        """Убрать предмет по дескриптору; остальные дескрипторы не меняются"""
+        item = self.items.pop(handle)
+        del self.by_type[item.item_type][handle]
+        self.equipment.pop(handle, None)
+        if item.armor_slot:
+            del self.by_slot[item.armor_slot][handle]
+        return item
+    
+    def get(self, handle):
+        return self.items.get(handle)
+    
+    def of_type(self, item_type):
+        """Предметы одного типа: {дескриптор: предмет}"""
+        return self.by_type.get(item_type, {})
+    
+    def in_slot(self, armor_slot):
+        """Броня для слота: {дескриптор: предмет}"""
+        return self.by_slot.get(armor_slot, {})
+    
+    def count(self, item_type):
+        return len(self.by_type.get(item_type, ()))
+    
+    def handles(self):
+        return self.items.keys()
+    
+    def entries(self):
+        """Пары (дескриптор, предмет) в порядке добавления"""
+        return self.items.items()
+    
+    def __contains__(self, handle):
+        return handle in self.items
+    
+    def __iter__(self):
+        return iter(self.items.values())
+    
+    def __len__(self):
+        return len(self.items)
+
+
+class StatEngine:
+    """Производные характеристики: база плюс именованные источники бонусов с кэшем итоговых значений"""
+    def __init__(self, base):
+        self.base = dict(base)
+        self.sources = {}
+        self.cache = {}
+    
+    def set_source(self, name, flat=None, mult=None):
+        """Заменить бонусы источника; кэш сбрасывается только если они изменились"""
+        entry = (flat or {}, mult or {})
+        if self.sources.get(name) != entry:
+            self.sources[name] = entry
+            self.cache.clear()
+    
+    def remove_source(self, name):
+        if name in self.sources:
+            del self.sources[name]
+            self.cache.clear()
+    
+    def add(self, name, stat, amount):
+        """Накопить плоский бонус в источнике (улучшения из магазина)"""
+        flat, mult = self.sources.get(name, ({}, {}))
+        flat = dict(flat)
+        flat[stat] = flat.get(stat, 0) + amount
+        self.set_source(name, flat, mult)
+    
+    def get(self, stat):
+        value = self.cache.get(stat)
+        if value is None:
+            flat = self.base.get(stat, 0)
+            mult = 1.0
+            for source_flat, source_mult in self.sources.values():
+                flat += source_flat.get(stat, 0)
+                mult += source_mult.get(stat, 0)
+            value = int(flat * mult)
+            self.cache[stat] = value
+        return value
+
+
+class StatusEffect:
+    """Описание эффекта: длительность, правило наложения, бонусы за стак и действие каждый ход"""
+    def __init__(self, name, label, duration, stacking="refresh", max_stacks=1,
+                 modifiers=None, on_tick=None, tick_interval=1):
+        self.name = name
+        self.label = label  # ключ каталога сообщений
+        self.duration = duration
+        self.stacking = stacking  # "refresh", "stack", "extend"
+        self.max_stacks = max_stacks
+        self.modifiers = modifiers or {}
+        self.on_tick = on_tick
+        self.tick_interval = tick_interval
+
+
+class ActiveEffect:
+    """Наложенный на существо эффект"""
+    def __init__(self, definition, stacks, expires_at):
+        self.definition = definition
+        self.stacks = stacks
+        self.expires_at = expires_at
+        self.generation = 0
+    
+    @property
+    def name(self):
+        return self.definition.name
+    
+    @property
+    def label(self):
+        return tr(self.definition.label)
+
+
+def dot_tick(min_damage, max_damage, message_key):
+    """Периодический урон в обход защиты, умножается на число стаков"""
+    def tick(owner, effect):
+        damage = random.randint(min_damage, max_damage) * effect.stacks
+        owner.hp = max(0, owner.hp - damage)
+        return tr(message_key, name=owner.name, damage=damage)
+    return tick
+
+
+EFFECTS = {
+    "buff_defense": StatusEffect("buff_defense", "effect.buff_defense", 2, modifiers={"defense": 5}),
+    "poison": StatusEffect("poison", "effect.poison", 3, "stack", max_stacks=3,
+                           on_tick=dot_tick(2, 4, "effect.poison_tick")),
+    "burn": StatusEffect("burn", "effect.burn", 2,
+                         on_tick=dot_tick(3, 6, "effect.burn_tick")),
+    "freeze": StatusEffect("freeze", "effect.freeze", 1),
+}
+
+
+class StatusEffects:
+    """Активные эффекты существа; истечения и тики лежат в колесе таймеров по номеру хода"""
+    WHEEL_SIZE = 8
+    
+    def __init__(self, owner, on_change=None):
+        self.owner = owner
+        self.on_change = on_change
+        self.turn = 0
+        self.active = {}
+        self.wheel = [[] for _ in range(self.WHEEL_SIZE)]
+    
+    def schedule(self, due, kind, effect):
+        self.wheel[due % self.WHEEL_SIZE].append((due, kind, effect, effect.generation))
+    
+    def apply(self, name, duration=None, stacks=1):
+        """Наложить эффект по правилу наложения из его описания"""
+        definition = EFFECTS[name]
+        duration = duration or definition.duration
+        effect = self.active.get(name)
+        
+        if effect is None:
+            effect = ActiveEffect(definition, min(stacks, definition.max_stacks), self.turn + duration)
+            self.active[name] = effect
+        else:
+            if definition.stacking == "stack":
+                effect.stacks = min(definition.max_stacks, effect.stacks + stacks)
+            if definition.stacking == "extend":
+                effect.expires_at += duration
+            else:
+                effect.expires_at = self.turn + duration
+            # Старые записи в колесе становятся недействительными
+            effect.generation += 1
+        
+        self.schedule(effect.expires_at, "expire", effect)
+        if definition.on_tick:
+            self.schedule(self.turn + definition.tick_interval, "tick", effect)
+        
+        if self.on_change:
+            self.on_change()
+        return effect
+    
+    def remove(self, name):
+        if self.active.pop(name, None) and self.on_change:
+            self.on_change()
+    
+    def clear(self):
+        self.active = {}
+        self.wheel = [[] for _ in range(self.WHEEL_SIZE)]
+        if self.on_change:
+            self.on_change()
+    
+    def advance(self):
+        """Перейти к следующему ходу; обрабатываются только записи текущей ячейки колеса"""
+        self.turn += 1
+        index = self.turn % self.WHEEL_SIZE
+        slot = self.wheel[index]
+        self.wheel[index] = []
+        
+        due_now = []
+        for entry in slot:
+            if entry[0] == self.turn:
+                due_now.append(entry)
+            else:
+                # Запись на следующий оборот колеса
+                self.wheel[index].append(entry)
+        # Последний тик срабатывает до истечения эффекта в том же ходу
+        due_now.sort(key=lambda entry: entry[1] != "tick")
+        
+        messages = []
+        changed = False
+        for due, kind, effect, generation in due_now:
+            if self.active.get(effect.name) is not effect or effect.generation != generation:
+                continue
+            
+            if kind == "tick":
+                message = effect.definition.on_tick(self.owner, effect)
+                if message:
+                    messages.append(message)
+                if self.turn + effect.definition.tick_interval <= effect.expires_at:
+                    self.schedule(self.turn + effect.definition.tick_interval, "tick", effect)
+            elif kind == "expire":
+                del self.active[effect.name]
+                changed = True
+        
+        if changed and self.on_change:
+            self.on_change()
+        return messages
+    
+    def remaining(self, name):
+        effect = self.active.get(name)
+        return effect.expires_at - self.turn if effect else 0
+    
+    def modifiers(self):
+        """Суммарные бонусы к характеристикам от всех эффектов"""
+        flat = {}
+        for effect in self.active.values():
+            for stat, value in effect.definition.modifiers.items():
+                flat[stat] = flat.get(stat, 0) + value * effect.stacks
+        return flat
+    
+    def __contains__(self, name):
+        return name in self.active
+    
+    def __iter__(self):
+        return iter(self.active.values())
+    
+    def __len__(self):
+        return len(self.active)
+
+
+class Player:
+    """Класс игрока с системой экипировки и статистикой"""
+    def __init__(self, name):
+        self.name = name
+        self.level = 1
+        self.stat_engine = StatEngine({"max_hp": 120, "max_mana": 100, "attack": 15, "defense": 8})
+        self.hp = 120
+        self.mana = 100
+        self.exp = 0
+        self.exp_to_level = 100
+        self.gold = 100
+        
+        self.attack_upgrades_bought = 0
+        self.defense_upgrades_bought = 0
+        
+        self.equipped = {
+            "head": None,      # Шлем
+            "chest": None,     # Нагрудник
+            "legs": None,      # Поножи
+            "weapon": None     # Оружие
+        }
+        
+        self.max_inventory = 10
+        
+        self.inventory = Inventory([
+            Item("Зелье здоровья", "potion_hp", 50, "Восстанавливает 50 HP", "common"),
+            Item("Зелье маны", "potion_mana", 40, "Восстанавливает 40 маны", "common"),
+        ])
+        
+        self.skills = list(PLAYER_SKILLS)
+        
+        self.status_effects = StatusEffects(self, self.update_effect_modifiers)
+        
+        self.stats = {
+            "enemies_killed": 0,
+            "bosses_killed": 0,
+            "gold_earned": 0,
+            "critical_hits": 0,
+            "total_damage_dealt": 0,
+            "total_damage_taken": 0,
+            "items_collected": 0,
+            "potions_used": 0
+        }
+        self.battle_history = BattleHistory()
+        
+        self.crit_chance = 0.15
+        self.crit_multiplier = 2.0
+    
+    @property
+    def attack(self):
+        return self.stat_engine.get("attack")
+    
+    @property
+    def defense(self):
+        return self.stat_engine.get("defense")
+    
+    @property
+    def max_hp(self):
+        return self.stat_engine.get("max_hp")
+    
+    @property
+    def max_mana(self):
+        return self.stat_engine.get("max_mana")
+    
+    def set_equipped(self, slot, item):
+        """Положить предмет в слот и пересчитать бонусы экипировки"""
+        self.equipped[slot] = item
+        if item:
+            self.stat_engine.set_source(f"equip:{slot}", item.get_modifiers())
+        else:
+            self.stat_engine.remove_source(f"equip:{slot}")
+        self.hp = min(self.hp, self.max_hp)
+    
+    def upgrade(self, stat, amount):
+        """Постоянное улучшение характеристики (магазин)"""
+        self.stat_engine.add("upgrades", stat, amount)
+    
+    def update_effect_modifiers(self):
+        """Бонусы от активных эффектов; вызывается при каждом изменении status_effects"""
+        self.stat_engine.set_source("effects", self.status_effects.modifiers())
+    
+    def equip_item(self, item):
+        """Экипировать предмет в соответствующий слот"""
+        if item.item_type == "weapon":
+            if self.equipped["weapon"]:
+                old_weapon = self.equipped["weapon"]
+                if len(self.inventory) < self.max_inventory:
+                    self.inventory.add(old_weapon)
+            
+            self.set_equipped("weapon", item)
+            return True, tr("player.equipped", name=item.name)
+            
+        elif item.item_type == "armor":
+            if not item.armor_slot or item.armor_slot not in ["head", "chest", "legs"]:
+                return False, tr("player.bad_armor")
+            
+            slot = item.armor_slot
+            
+            if self.equipped[slot]:
+                old_armor = self.equipped[slot]
+                self.set_equipped(slot, None)
+                if len(self.inventory) < self.max_inventory:
+                    self.inventory.add(old_armor)
+            
+            self.set_equipped(slot, item)
+            self.hp += item.value
+            return True, tr("player.equipped", name=item.name)
+        
+        return False, tr("player.equip_failed")
+    
+    def unequip_item(self, slot):
+        """Снять предмет из слота"""
+        if self.equipped[slot]:
+            item = self.equipped[slot]
+            
+            if len(self.inventory) >= self.max_inventory:
+                return False, tr("player.inventory_full")
+            
+            self.inventory.add(item)
+            self.set_equipped(slot, None)
+            return True, tr("player.unequipped", name=item.name)
+        
+        return False, tr("player.slot_empty")
+    
+    def sell_item(self, handle):
+        """Продать предмет"""
+        if handle in self.inventory:
+            item = self.inventory.remove(handle)
+            price = item.sell_price
+            self.gold += price
+            return True, tr("player.sold", price=price)
+        return False, tr("player.item_not_found")
+    
+    def can_add_to_inventory(self):
+        """Проверка, можно ли добавить предмет"""
+        return len(self.inventory) < self.max_inventory
+    
+    def equip_weapon(self, bonus):
+        """Экипировать оружие (старый метод для совместимости)"""
+        self.stat_engine.add("legacy", "attack", bonus)
+    
+    def equip_armor(self, bonus):
+        """Экипировать броню (старый метод для совместимости)"""
+        self.stat_engine.add("legacy", "max_hp", bonus)
+        self.hp += bonus
+        
+    def take_damage(self, damage):
+        actual_damage = max(1, damage - self.defense)
+        self.hp -= actual_damage
+        self.stats["total_damage_taken"] += actual_damage
+        if self.hp < 0:
+            self.hp = 0
+        TELEMETRY.record("damage_taken", raw=damage, damage=actual_damage)
+        return actual_damage
+    
+    def calculate_attack_damage(self, base_damage):
+        """Рассчитать урон с учётом крита"""
+        is_crit = random.random() < self.crit_chance
+        damage = base_damage
+        
+        if is_crit:
+            damage = int(base_damage * self.crit_multiplier)
+            self.stats["critical_hits"] += 1
+        
+        if self.equipped["weapon"] and self.equipped["weapon"].effect:
+            pass
+        
+        self.stats["total_damage_dealt"] += damage
+        TELEMETRY.record("attack", base=base_damage, damage=damage, crit=is_crit)
+        return damage, is_crit
+    
+    def heal(self, amount):
+        self.hp += amount
+        if self.hp > self.max_hp:
+            self.hp = self.max_hp
+    
+    def restore_mana(self, amount):
+        self.mana += amount
+        if self.mana > self.max_mana:
+            self.mana = self.max_mana
+    
+    def use_item(self, handle):
+        if handle in self.inventory:
+            item = self.inventory.get(handle)
+            if item.item_type == "potion_hp":
+                self.heal(item.value)
+                self.inventory.remove(handle)
+                self.stats["potions_used"] += 1
+                return True, tr("player.restored_hp", hp=item.value)
+            elif item.item_type == "potion_mana":
+                self.restore_mana(item.value)
+                self.inventory.remove(handle)
+                self.stats["potions_used"] += 1
+                return True, tr("player.restored_mana", mana=item.value)
+            elif item.item_type == "potion_multi":
+                hp_restore = item.value
+                mana_restore = getattr(item, 'mana_value', 30)  # По умолчанию 30 маны
+                self.heal(hp_restore)
+                self.restore_mana(mana_restore)
+                self.inventory.remove(handle)
+                self.stats["potions_used"] += 1
+                return True, tr("player.restored_both", hp=hp_restore, mana=mana_restore)
+            elif item.item_type == "weapon":
+                success, msg = self.equip_item(item)
+                if success:
+                    self.inventory.remove(handle)
+                return success, msg
+            elif item.item_type == "armor":
+                success, msg = self.equip_item(item)
+                if success:
+                    self.inventory.remove(handle)
+                return success, msg
+        return False, tr("player.item_unavailable")
+    
+    def use_skill(self, skill_index, targets):
+        """Применить навык; targets - выбранная цель первой, остальные враги для навыков по площади"""
+        if skill_index < len(self.skills):
+            skill = self.skills[skill_index]
+            if self.mana >= skill.mana_cost:
+                self.mana -= skill.mana_cost
+                
+                if skill.effect_type == "damage":
+                    damage = skill.damage + random.randint(-5, 5)
+                    TELEMETRY.record("skill", skill=skill.name, damage=damage, targets=len(targets) if skill.area else 1)
+                    if skill.area and len(targets) > 1:
+                        total_damage = sum(target.take_damage(damage) for target in targets)
+                        return True, tr("skill.area_hit", skill=skill.name, count=len(targets), damage=total_damage)
+                    actual_damage = targets[0].take_damage(damage)
+                    return True, tr("skill.hit", skill=skill.name, damage=actual_damage)
+                elif skill.effect_type == "buff":
+                    self.status_effects.apply("buff_defense")
+                    return True, tr("skill.defense_buff")
+                    
+        return False, tr("skill.no_mana")
+    
+    def end_turn(self):
+        """Конец раунда: истечение и тики эффектов; возвращает сообщения для лога"""
+        return self.status_effects.advance()
+    
+    def gain_exp(self, amount):
+        self.exp += amount
+        if self.exp >= self.exp_to_level:
+            self.level_up()
+    
+    def level_up(self):
+        self.level += 1
+        self.exp = 0
+        self.exp_to_level = int(self.exp_to_level * 1.5)
+        gained = self.level - 1
+        self.stat_engine.set_source("level", {
+            "max_hp": 25 * gained,
+            "max_mana": 20 * gained,
+            "attack": 5 * gained,
+            "defense": 3 * gained,
+        })
+        self.hp = self.max_hp
+        self.mana = self.max_mana
+
+
+class Enemy:
+    """Класс врага с ИИ"""
+    def __init__(self, level, allow_stronger=True):
+        self.level = level
+        
+        if allow_stronger and random.random() < 0.3:
+            self.level = level + random.randint(1, 2)
+            self.is_elite = True
+        else:
+            self.is_elite = False
+        
+        self.name, stats = random.choice(ENEMY_TYPES)
+        if self.is_elite:
+            self.name = tr("enemy.elite", name=self.name)
+        
+        base_hp = 40 + (self.level * 20)
+        self.max_hp = int(base_hp * stats["hp_mult"])
+        self.hp = self.max_hp
+        
+        base_attack = 12 + (self.level * 4)
+        self.attack = int(base_attack * stats["attack_mult"])
+        
+        base_defense = 5 + self.level
+        self.defense = int(base_defense * stats["defense_mult"])
+        
+        self.exp_reward = 40 + (self.level * 15)
+        self.gold_reward = 15 + (self.level * 8)
+        
+        if self.is_elite:
+            self.exp_reward = int(self.exp_reward * 1.5)
+            self.gold_reward = int(self.gold_reward * 1.5)
+        
+        self.defending = False
+        self.charge = 0
+        self.status_effects = StatusEffects(self)
+        self.policy = ENEMY_POLICY
+        self.defeated = False
+        
+        self.loot = self.generate_loot()
+    
+    def generate_loot(self):
+        """Генерация выпадающих предметов с системой редкости"""
+        loot = []
+        
+        rarity_roll = random.random()
+        for rarity, threshold in LOOT_RARITY_THRESHOLDS:
+            if rarity_roll < threshold:
+                break
+        
+        mult = LOOT_RARITY_MULTIPLIERS[rarity]
+        
+        if random.random() < 0.2:
+            weapon_bonus = int(random.randint(3, 8) * mult)
+            effect = None
+            effect_text = ""
+            
+            if rarity in ["rare", "epic", "legendary"] and random.random() < 0.3:
+                effect = random.choice(["poison", "fire", "ice", "lightning"])
+                effect_text = " " + tr("tag." + effect)
+            
+            loot.append(Item(
+                tr("loot.sword", bonus=weapon_bonus, effect=effect_text),
+                "weapon",
+                weapon_bonus,
+                tr("loot.sword_desc", bonus=weapon_bonus),
+                rarity,
+                effect
+            ))
+        
+        if random.random() < 0.2:
+            armor_bonus = int(random.randint(15, 35) * mult)
+            slot = random.choice(["head", "chest", "legs"])
+            
+            loot.append(Item(
+                tr("loot.armor", slot=tr("loot.slot." + slot), bonus=armor_bonus),
+                "armor",
+                armor_bonus,
+                tr("loot.armor_desc", bonus=armor_bonus),
+                rarity,
+                None,
+                slot
+            ))
+        
+        if self.is_elite and random.random() < 0.4:
+            weapon_bonus = int(random.randint(8, 15) * mult)
+            elite_rarity = random.choice(["rare", "epic"]) if rarity in ["common", "uncommon"] else rarity
+            loot.append(Item(
+                tr("loot.rare_sword", bonus=weapon_bonus),
+                "weapon",
+                weapon_bonus,
+                tr("loot.sword_desc", bonus=weapon_bonus),
+                elite_rarity
+            ))
+        
+        TELEMETRY.record("loot_roll", rarity=rarity, level=self.level, elite=self.is_elite, items=len(loot))
+        return loot
+    
+    def take_damage(self, damage):
+        defense_mult = 2 if self.defending else 1
+        actual_damage = max(1, damage - (self.defense * defense_mult))
+        self.hp -= actual_damage
+        if self.hp < 0:
+            self.hp = 0
+        self.defending = False
+        return actual_damage
+    
+    def make_minion(self):
+        """Ослабленный спутник главного врага: меньше здоровья и атаки, без лута"""
+        self.max_hp = max(1, int(self.max_hp * 0.6))
+        self.hp = self.max_hp
+        self.attack = max(1, int(self.attack * 0.7))
+        self.exp_reward //= 2
+        self.gold_reward //= 2
+        self.loot = []
+        return self
+    
+    def choose_action(self, player, budget=None):
+        return self.policy.choose(self, player, budget)
+    
+    def perform_action(self, action, player):
+        if action == "attack":
+            damage = self.attack + random.randint(-3, 3)
+            actual = player.take_damage(damage)
+            return tr("enemy.attack", name=self.name, damage=actual)
+        elif action == "heavy_attack":
+            self.charge = 0
+            damage = int(self.attack * 1.8) + random.randint(-5, 5)
+            actual = player.take_damage(damage)
+            return tr("enemy.heavy_attack", name=self.name, damage=actual)
+        elif action == "defend":
+            self.defending = True
+            return tr("enemy.defend", name=self.name)
+        elif action == "charge":
+            self.charge += 1
+            return tr("enemy.charge", name=self.name)
+        return ""
+    
+    def end_turn(self):
+        return self.status_effects.advance()
+
+
+class Boss(Enemy):
+    """Класс босса - усиленная версия врага"""
+    def __init__(self, level, location_name):
+        super().__init__(level, allow_stronger=False)
+        
+        self.is_elite = True
+        self.is_boss = True
+        self.policy = BOSS_POLICY
+        
+        self.name = tr("enemy.boss", name=BOSS_NAMES.get(location_name, tr("enemy.unknown_boss")))
+        
+        self.max_hp = int(self.max_hp * 2.5)
+        self.hp = self.max_hp
+        self.attack = int(self.attack * 1.8)
+        self.defense = int(self.defense * 1.5)
+        
+        self.exp_reward = int(self.exp_reward * 3)
+        self.gold_reward = int(self.gold_reward * 4)
+        
+        self.loot = self.generate_boss_loot()
+    
+    def generate_boss_loot(self):
+        """Генерация уникального лута для боссов"""
+        loot = []
+        
+        num_items = random.randint(1, 2)
+        
+        for _ in range(num_items):
+            item_type = random.choice(["weapon", "armor"])
+            rarity = random.choices(
+                ["rare", "epic", "legendary"],
+                weights=[50, 35, 15]
+            )[0]
+            
+            if item_type == "weapon":
+                bonus = random.randint(10, 25) if rarity == "rare" else random.randint(20, 40) if rarity == "epic" else random.randint(35, 60)
+                effect = random.choice([None, "poison", "fire", "ice", "lightning"])
+                effect_text = " " + tr("tag." + effect) if effect else ""
+                
+                loot.append(Item(
+                    tr("loot.boss_sword", bonus=bonus, effect=effect_text),
+                    "weapon",
+                    bonus,
+                    tr("loot.boss_sword_desc", bonus=bonus),
+                    rarity,
+                    effect
+                ))
+            else:
+                bonus = random.randint(30, 60) if rarity == "rare" else random.randint(50, 90) if rarity == "epic" else random.randint(80, 130)
+                slot = random.choice(["head", "chest", "legs"])
+                
+                loot.append(Item(
+                    tr("loot.boss_armor", slot=tr("loot.slot." + slot), bonus=bonus),
+                    "armor",
+                    bonus,
+                    tr("loot.boss_armor_desc", bonus=bonus),
+                    rarity,
+                    None,
+                    slot
+                ))
+        
+        return loot
+
+
+class BattleLog:
+    """Журнал боя: кольцевой буфер видимых строк и необязательная полная история"""
+    def __init__(self, capacity=4, renderer=None, history_limit=0):
+        self.capacity = capacity
+        self.renderer = renderer
+        self.entries = deque(maxlen=capacity)
+        
+        # Полная история: последние history_limit строк в памяти, остальные уходят на диск
+        self.history_limit = history_limit
+        self.history = deque()
+        self.spill_file = None
+        self.spill_offsets = []
+        self.spill_rendered = {}
+    
+    def make_entry(self, text):
+        """Строка журнала вместе с её отрисовкой, сделанной один раз"""
+        surface = self.renderer(text) if self.renderer else None
+        return (text, surface)
+    
+    def push(self, text):
+        entry = self.make_entry(text)
+        self.entries.append(entry)
+        
+        if self.history_limit:
+            self.history.append(entry)
+            if len(self.history) > self.history_limit:
+                self.spill(self.history.popleft()[0])
+    
+    def spill(self, text):
+        """Выгрузить самую старую строку истории в файл"""
+        if self.spill_file is None:
+            self.spill_file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self.spill_file.seek(0, 2)
+        self.spill_offsets.append(self.spill_file.tell())
+        self.spill_file.write(text.replace("\n", " ") + "\n")
+    
+    def read_spilled(self, index):
+        entry = self.spill_rendered.get(index)
+        if entry is None:
+            self.spill_file.seek(self.spill_offsets[index])
+            entry = self.make_entry(self.spill_file.readline().rstrip("\n"))
+            if len(self.spill_rendered) >= self.capacity * 8:
+                self.spill_rendered.clear()
+            self.spill_rendered[index] = entry
+        return entry
+    
+    def rerender(self):
+        """Отрисовать видимые строки, добавленные без отрисовщика (автобой)"""
+        self.entries = deque((self.make_entry(text) for text, _ in self.entries), maxlen=self.capacity)
+    
+    def start(self, text):
+        """Начать новый бой: очистить видимые строки, историю сохранить"""
+        self.entries.clear()
+        self.push(text)
+    
+    def clear(self):
+        self.entries.clear()
+        self.history.clear()
+        self.spill_offsets = []
+        self.spill_rendered = {}
+        if self.spill_file is not None:
+            self.spill_file.close()
+            self.spill_file = None
+    
+    @property
+    def history_size(self):
+        return len(self.spill_offsets) + len(self.history)
+    
+    def max_scroll(self):
+        if not self.history_limit:
+            return 0
+        return max(0, self.history_size - self.capacity)
+    
+    def window(self, scroll=0):
+        """Строки для вывода; scroll - на сколько строк прокручено назад от последней"""
+        if not scroll or not self.history_limit:
+            return list(self.entries)
+        
+        scroll = min(scroll, self.max_scroll())
+        end = self.history_size - scroll
+        start = max(0, end - self.capacity)
+        spilled = len(self.spill_offsets)
+        
+        lines = []
+        for index in range(start, end):
+            if index < spilled:
+                lines.append(self.read_spilled(index))
+            else:
+                entry = self.history[index - spilled]
+                if entry[1] is None:
+                    # Строка автобоя отрисовывается один раз и остаётся в истории готовой
+                    entry = self.make_entry(entry[0])
+                    self.history[index - spilled] = entry
+                lines.append(entry)
+        return lines
+    
+    def texts(self):
+        return [text for text, _ in self.entries]
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def __bool__(self):
+        return bool(self.entries)
+
+
+class BattleHistory:
+    """История боёв в колонках фиксированной ширины; при заполнении соседние записи сливаются попарно"""
+    # Средние за бой в записи; при слиянии усредняются с весом по числу боёв
+    AVERAGED = (("turns", "H"), ("damage_dealt", "I"), ("damage_taken", "I"), ("gold", "I"), ("exp", "I"))
+    # Счётчики в записи; при слиянии складываются
+    COUNTED = (("wins", "I"), ("battles", "I"))
+    
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.columns = {name: array.array(code) for name, code in self.AVERAGED + self.COUNTED}
+        # Индекс локации последнего боя записи; имена хранятся один раз
+        self.columns["location"] = array.array("B")
+        self.location_names = []
+        # Итоги по локациям считаются точно и не теряются при прореживании
+        self.location_results = {}
+        # Сколько боёв сливается в одну запись; удваивается при каждом прореживании
+        self.stride = 1
+        self.total = 0
+        self.version = 0
+    
+    def location_index(self, name):
+        if name not in self.location_names:
+            self.location_names.append(name)
+        return self.location_names.index(name)
+    
+    def append(self, location, outcome, turns, damage_dealt, damage_taken, gold, exp):
+        """Добавить бой; outcome - victory, defeat или fled"""
+        values = {"turns": turns, "damage_dealt": damage_dealt, "damage_taken": damage_taken,
+                  "gold": gold, "exp": exp}
+        won = 1 if outcome == "victory" else 0
+        battles = self.columns["battles"]
+        
+        if not battles or battles[-1] >= self.stride:
+            if len(battles) >= self.capacity:
+                self.downsample()
+        
+        if battles and battles[-1] < self.stride:
+            # Последняя запись ещё не набрала stride боёв: новый бой сливается в неё
+            weight = battles[-1]
+            for name, _ in self.AVERAGED:
+                column = self.columns[name]
+                column[-1] = round((column[-1] * weight + values[name]) / (weight + 1))
+            self.columns["wins"][-1] += won
+            battles[-1] += 1
+            self.columns["location"][-1] = self.location_index(location)
+        else:
+            for name, _ in self.AVERAGED:
+                self.columns[name].append(values[name])
+            self.columns["wins"].append(won)
+            battles.append(1)
+            self.columns["location"].append(self.location_index(location))
+        
+        results = self.location_results.setdefault(location, {"victory": 0, "defeat": 0, "fled": 0})
+        results[outcome] += 1
+        self.total += 1
+        self.version += 1
+    
+    def downsample(self):
+        """Слить соседние записи попарно: память остаётся ограниченной, график - равномерным по времени"""
+        battles = self.columns["battles"]
+        size = len(battles)
+        pairs = [(i, i + 1) for i in range(0, size - 1, 2)]
+        
+        for name, _ in self.AVERAGED:
+            column = self.columns[name]
+            merged = [round((column[a] * battles[a] + column[b] * battles[b]) / (battles[a] + battles[b]))
+                      for a, b in pairs]
+            if size % 2:
+                merged.append(column[-1])
+            column[:] = array.array(column.typecode, merged)
+        
+        for name in ("wins", "battles"):
+            column = self.columns[name]
+            merged = [column[a] + column[b] for a, b in pairs]
+            if size % 2:
+                merged.append(column[-1])
+            column[:] = array.array(column.typecode, merged)
+        
+        location = self.columns["location"]
+        location[:] = array.array("B", [location[b] for _, b in pairs] + ([location[-1]] if size % 2 else []))
+        self.stride *= 2
+    
+    def series(self, name):
+        """Колонка для графика: по одному значению на запись"""
+        return self.columns[name]
+    
+    def win_rates(self):
+        """(локация, боёв, побед) в порядке первого появления локации"""
+        rates = []
+        for name in self.location_names:
+            results = self.location_results[name]
+            rates.append((name, sum(results.values()), results["victory"]))
+        return rates
+    
+    def __len__(self):
+        return len(self.columns["battles"])
+
+
+LOCATIONS = [
+    {"name": "Тёмный лес", "level_req": 1, "enemy_level_min": 1, "enemy_level_max": 2, "color": SUCCESS_COLOR},
+    {"name": "Заброшенная крепость", "level_req": 3, "enemy_level_min": 3, "enemy_level_max": 4, "color": INFO_COLOR},
+    {"name": "Пещера гоблинов", "level_req": 5, "enemy_level_min": 5, "enemy_level_max": 6, "color": WARNING_COLOR},
+    {"name": "Логово орков", "level_req": 7, "enemy_level_min": 7, "enemy_level_max": 9, "color": DANGER_COLOR},
+    {"name": "Драконье гнездо", "level_req": 10, "enemy_level_min": 10, "enemy_level_max": 13, "color": PURPLE_COLOR},
+]
+
+
+# Сколько спутников идёт с обычным врагом: 0, 1 или 2
+PACK_EXTRA_WEIGHTS = [60, 30, 10]
+
+
+def create_encounter(location, is_boss=False, size=None):
+    """Враги одной встречи: одиночка или стая, элитный враг со свитой, босс с помощниками"""
+    level_min, level_max = location["enemy_level_min"], location["enemy_level_max"]
+    
+    if is_boss:
+        leader = Boss(level_max, location["name"])
+        extra = random.randint(0, 2)
+    else:
+        leader = Enemy(random.randint(level_min, level_max))
+        if leader.is_elite:
+            extra = random.randint(1, 3)
+        else:
+            extra = random.choices(range(len(PACK_EXTRA_WEIGHTS)), weights=PACK_EXTRA_WEIGHTS)[0]
+    
+    if size is not None:
+        extra = size - 1
+    
+    enemies = [leader]
+    for _ in range(extra):
+        enemies.append(Enemy(random.randint(level_min, level_max), allow_stronger=False).make_minion())
+    return enemies
+
+
+def create_shop_items():
+    """Ассортимент магазина"""
+    return [
+        ShopItem("Зелье здоровья", "potion_hp", 30, "Восстанавливает 50 HP", "unlimited", {"value": 50}),
+        ShopItem("Зелье маны", "potion_mana", 25, "Восстанавливает 40 маны", "unlimited", {"value": 40}),
+        
+        ShopItem("Мульти зелье", "potion_multi", 50, "Восстанавливает 40 HP и 30 маны", "unlimited", {"hp": 40, "mana": 30}),
+        
+        ShopItem("Улучшить атаку", "upgrade_attack", 60, "+5 к атаке (навсегда)", "unlimited", {"value": 5}),
+        ShopItem("Улучшить защиту", "upgrade_defense", 60, "+3 к защите (навсегда)", "unlimited", {"value": 3}),
+    ]
+
+
+# Товары не меняются между играми: все сессии делят одни объекты, у каждой свой список наличия
+SHOP_ITEMS = tuple(create_shop_items())
+
+
+class GameSession:
+    """Правила одной игры без экрана: локации, бой со стаей, магазин и экипировка; интерфейс и сервер работают через неё"""
+    # Общий бюджет ИИ на ход всей стаи и сколько строк стаи писать в журнал до сводки
+    PACK_AI_BUDGET = 0.006
+    LOG_BATCH_LINES = 3
+    
+    def __init__(self, battle_log=None, stash=None, runs=None):
+        self.state = "menu"
+        self.player = None
+        self.enemies = []
+        self.target_index = 0
+        self.battle_turns = 0
+        self.damage_taken_before = 0
+        self.current_location = None
+        self.locations = LOCATIONS
+        self.shop_items = list(SHOP_ITEMS)
+        self.battle_log = battle_log if battle_log is not None else BattleLog(4)
+        self.message = ""
+        self.message_timer = 0
+        self.turbo = False
+        self.auto_policy = AutoBattlePolicy()
+        # Склад rpg_stash; без него лут сверх инвентаря пропадает
+        self.stash = stash
+        # История забегов rpg_runs; итог пишется при поражении и при выходе из незаконченного забега
+        self.runs = runs
+        self.run_started = None
+    
+    def notify(self, event, **data):
+        """Хук интерфейса: частицы, звуки, обновление кнопок; без экрана событие просто пропускается"""
+    
+    def new_game(self, name=None):
+        self.finish_run("quit")
+        self.player = Player(name or tr("battle.hero"))
+        self.run_started = time.monotonic()
+        self.state = "game"
+        self.message = tr("msg.welcome")
+        self.message_timer = 90
+        self.battle_log.clear()
+    
+    def finish_run(self, outcome):
+        """Записать итог текущего забега в историю; каждый забег записывается один раз"""
+        if self.runs is not None and self.run_started is not None:
+            self.runs.add(self.player, time.monotonic() - self.run_started, outcome)
+        self.run_started = None
+    
+    def refresh_shop_items(self):
+        """Обновить ассортимент магазина"""
+        self.shop_items = list(SHOP_ITEMS)
+    
+    @property
+    def enemy(self):
+        """Текущая цель игрока"""
+        return self.enemies[self.target_index] if self.enemies else None
+    
+    def alive_enemies(self):
+        return [enemy for enemy in self.enemies if enemy.hp > 0]
+    
+    def select_target(self, index):
+        if 0 <= index < len(self.enemies) and self.enemies[index].hp > 0:
+            self.target_index = index
+    
+    def start_battle_in_location(self, location_index, is_boss=False):
+        """Начать битву в выбранной локации"""
+        location = self.locations[location_index]
+        
+        if self.player.level < location["level_req"]:
+            self.message = tr("msg.level_required", level=location["level_req"])
+            self.message_timer = 90
+            return
+        
+        self.current_location = location
+        
+        self.enemies = create_encounter(location, is_boss)
+        self.target_index = 0
+        self.battle_turns = 0
+        self.damage_taken_before = self.player.stats["total_damage_taken"]
+        TELEMETRY.record("battle_start", location=location["name"], level=self.player.level, boss=is_boss,
+                         enemies=[enemy.name for enemy in self.enemies], auto=self.turbo)
+        if is_boss:
+            adds_text = " " + tr("log.boss_adds", count=len(self.enemies) - 1) if len(self.enemies) > 1 else ""
+            self.battle_log.start(tr("log.boss_battle", name=self.enemy.name, adds=adds_text))
+        elif len(self.enemies) > 1:
+            self.battle_log.start(tr("log.pack", count=len(self.enemies), location=location["name"]))
+        else:
+            self.battle_log.start(tr("log.encounter", location=location["name"]))
+        
+        self.state = "battle"
+        self.message = tr("msg.battle_started")
+        self.message_timer = 90
+        self.notify("battle_started")
+    
+    def auto_battle_turn(self):
+        """Один ход игрока по политике автобоя"""
+        self.target_index = self.auto_policy.choose_target(self.enemies)
+        action, argument = self.auto_policy.choose(self.player, self.enemies)
+        if action == "item":
+            self.use_item_in_battle(argument)
+        elif action == "skill":
+            self.use_skill(argument)
+        else:
+            self.player_basic_attack()
+    
+    def check_kills(self):
+        """Отметить павших врагов и перевести цель; True, если стая разбита и бой выигран"""
+        for enemy in self.enemies:
+            if enemy.hp <= 0 and not enemy.defeated:
+                enemy.defeated = True
+                if len(self.enemies) > 1:
+                    self.battle_log.push(tr("log.enemy_defeated", name=enemy.name))
+        
+        alive = [index for index, enemy in enumerate(self.enemies) if enemy.hp > 0]
+        if not alive:
+            self.victory()
+            return True
+        if self.target_index not in alive:
+            self.target_index = alive[0]
+        return False
+    
+    def push_batch(self, lines, summary):
+        """Строки хода стаи: по одной, пока их немного, иначе одна сводка"""
+        if len(lines) <= self.LOG_BATCH_LINES:
+            for line in lines:
+                self.battle_log.push(line)
+        else:
+            self.battle_log.push(summary)
+    
+    def player_basic_attack(self):
+        self.battle_turns += 1
+        base_damage = self.player.attack + random.randint(-4, 4)
+        damage, is_crit = self.player.calculate_attack_damage(base_damage)
+        target = self.enemy
+        actual_damage = target.take_damage(damage)
+        
+        crit_text = " " + tr("log.crit_tag") if is_crit else ""
+        log_msg = tr("log.player_attack", crit=crit_text, damage=actual_damage)
+        self.battle_log.push(log_msg)
+        self.notify("attack", crit=is_crit)
+        
+        if self.player.equipped["weapon"] and self.player.equipped["weapon"].effect:
+            self.apply_weapon_effect(self.player.equipped["weapon"].effect, target)
+        
+        if self.check_kills():
+            return
+        
+        self.enemy_turn()
+    
+    def apply_weapon_effect(self, effect, target):
+        """Применить эффект оружия к цели"""
+        if effect == "poison":
+            dot_damage = random.randint(3, 8)
+            target.hp = max(0, target.hp - dot_damage)
+            target.status_effects.apply("poison")
+            self.battle_log.push(tr("log.weapon_poison", damage=dot_damage))
+            self.notify("weapon_effect", effect="poison")
+        elif effect == "fire":
+            fire_damage = random.randint(5, 12)
+            target.hp = max(0, target.hp - fire_damage)
+            target.status_effects.apply("burn")
+            self.battle_log.push(tr("log.weapon_fire", damage=fire_damage))
+            self.notify("weapon_effect", effect="fire")
+        elif effect == "ice":
+            if random.random() < 0.2:
+                target.status_effects.apply("freeze")
+                self.battle_log.push(tr("log.weapon_freeze"))
+                self.notify("weapon_effect", effect="freeze")
+            else:
+                ice_damage = random.randint(2, 6)
+                target.hp = max(0, target.hp - ice_damage)
+                self.battle_log.push(tr("log.weapon_ice", damage=ice_damage))
+                self.notify("weapon_effect", effect="ice")
+        elif effect == "lightning":
+            lightning_damage = random.randint(8, 15)
+            target.hp = max(0, target.hp - lightning_damage)
+            self.battle_log.push(tr("log.weapon_lightning", damage=lightning_damage))
+            self.notify("weapon_effect", effect="lightning")
+    
+    def enemy_turn(self):
+        """Ход всей стаи одним проходом; бюджет ИИ делится между живыми врагами"""
+        alive = self.alive_enemies()
+        budget = self.PACK_AI_BUDGET / len(alive)
+        hp_before = self.player.hp
+        lines = []
+        acted = frozen = 0
+        
+        for enemy in alive:
+            if "freeze" in enemy.status_effects:
+                lines.append(tr("log.enemy_frozen", name=enemy.name))
+                frozen += 1
+                continue
+            
+            action = enemy.choose_action(self.player, budget)
+            lines.append(tr("log.enemy_action", text=enemy.perform_action(action, self.player)))
+            acted += 1
+            if self.player.hp <= 0:
+                break
+        
+        damage_taken = hp_before - self.player.hp
+        summary = tr("log.enemies_summary", acted=acted, frozen=frozen, damage=damage_taken)
+        self.push_batch(lines, summary)
+        
+        if damage_taken > 0:
+            self.notify("player_hit", damage=damage_taken)
+        
+        if self.player.hp <= 0:
+            self.defeat()
+            return
+        
+        self.end_round()
+    
+    def end_round(self):
+        """Конец раунда: тики и истечение эффектов у врагов и игрока"""
+        lines = []
+        for enemy in self.alive_enemies():
+            lines.extend(enemy.end_turn())
+        self.push_batch(lines, tr("log.effects_summary", count=len(lines)))
+        if self.check_kills():
+            return
+        
+        for message in self.player.end_turn():
+            self.battle_log.push(message)
+        if self.player.hp <= 0:
+            self.defeat()
+    
+    def use_skill(self, skill_index):
+        if skill_index < len(self.player.skills):
+            skill = self.player.skills[skill_index]
+            targets = [self.enemy]
+            if skill.area:
+                targets += [enemy for enemy in self.alive_enemies() if enemy is not self.enemy]
+            success, msg = self.player.use_skill(skill_index, targets)
+            
+            if success:
+                self.battle_turns += 1
+                self.battle_log.push(tr("log.skill", text=msg))
+                self.notify("skill", skill=skill)
+                
+                if self.check_kills():
+                    return
+                
+                self.enemy_turn()
+            else:
+                self.battle_log.push(tr("log.error", text=msg))
+    
+    def use_item_in_battle(self, handle):
+        if handle in self.player.inventory:
+            item = self.player.inventory.get(handle)
+            success, msg = self.player.use_item(handle)
+            if success:
+                self.battle_turns += 1
+                self.battle_log.push(tr("log.item", text=msg))
+                self.notify("item", item=item, handle=handle)
+                
+                self.enemy_turn()
+            else:
+                self.battle_log.push(tr("log.error", text=msg))
+    
+    def victory(self):
+        """Победа в бою с выпадением лута со всей стаи"""
+        exp_reward = sum(enemy.exp_reward for enemy in self.enemies)
+        gold_reward = sum(enemy.gold_reward for enemy in self.enemies)
+        self.player.gain_exp(exp_reward)
+        self.player.gold += gold_reward
+        
+        self.player.stats["enemies_killed"] += len(self.enemies)
+        self.player.stats["gold_earned"] += gold_reward
+        
+        self.player.stats["bosses_killed"] += sum(1 for enemy in self.enemies if getattr(enemy, "is_boss", False))
+        
+        self.player.restore_mana(50)
+        
+        loot_messages = []
+        overflow = []
+        skipped_items = 0
+        
+        for item in (item for enemy in self.enemies for item in enemy.loot):
+            kept = self.player.can_add_to_inventory()
+            stashed = not kept and self.stash is not None
+            TELEMETRY.record("loot_drop", item_type=item.item_type, rarity=item.rarity, value=item.value,
+                             effect=item.effect, kept=kept, stashed=stashed)
+            if kept:
+                self.player.inventory.add(item)
+                self.player.stats["items_collected"] += 1
+                rarity_name = item.get_rarity_name()
+                loot_messages.append(tr("victory.loot", name=item.name, rarity=rarity_name))
+            elif stashed:
+                overflow.append(item)
+            else:
+                skipped_items += 1
+        
+        if overflow:
+            # Весь лишний лут боя - одна вставка в базу
+            self.stash.store(overflow)
+            self.player.stats["items_collected"] += len(overflow)
+        
+        msg_parts = [tr("victory.rewards", exp=exp_reward, gold=gold_reward)]
+        if loot_messages:
+            msg_parts.extend(loot_messages)
+        if overflow:
+            msg_parts.append(tr("victory.stashed", count=len(overflow)))
+        if skipped_items > 0:
+            msg_parts.append(tr("victory.inventory_full", count=skipped_items))
+        
+        self.message = "\n".join(msg_parts)
+        self.message_timer = 180
+        self.state = "victory"
+        self.notify("victory")
+        self.record_battle_end("victory", exp_reward, gold_reward)
+    
+    def defeat(self):
+        self.message = tr("defeat.message")
+        self.message_timer = 150
+        self.state = "defeat"
+        self.notify("defeat")
+        self.record_battle_end("defeat")
+        self.finish_run("defeat")
+    
+    def record_battle_end(self, result, exp=0, gold=0):
+        """Итог боя: запись в историю игрока и в телеметрию, пачка событий боя сразу уходит потоку записи"""
+        location = self.current_location["name"] if self.current_location else None
+        damage_dealt = sum(enemy.max_hp - max(0, enemy.hp) for enemy in self.enemies)
+        damage_taken = self.player.stats["total_damage_taken"] - self.damage_taken_before
+        self.player.battle_history.append(location, result, self.battle_turns, damage_dealt, damage_taken, gold, exp)
+        
+        TELEMETRY.record("battle_end", result=result, location=location, hp=self.player.hp,
+                         enemies_left=len(self.alive_enemies()), turns=self.battle_turns, exp=exp, gold=gold)
+        TELEMETRY.flush()
+    
+    def run_away(self):
+        self.battle_turns += 1
+        chance = 0.6 if self.player.hp < self.player.max_hp * 0.3 else 0.4
+        success = random.random() < chance
+        TELEMETRY.record("flee", success=success, chance=chance)
+        if success:
+            self.battle_log.push(tr("log.flee_success"))
+            self.state = "game"
+            self.record_battle_end("fled")
+        else:
+            self.battle_log.push(tr("log.flee_failed"))
+            self.enemy_turn()
+    
+    def finish_battle(self):
+        """Закрыть итог боя: после победы - к выбору действий, после поражения - в меню"""
+        if self.state == "victory":
+            self.state = "game"
+            self.message = tr("msg.ready")
+            self.message_timer = 60
+        elif self.state == "defeat":
+            self.state = "menu"
+    
+    def equip_item(self, handle):
+        """Надеть предмет или выпить зелье вне боя"""
+        success, msg = self.player.use_item(handle)
+        if success:
+            self.message = msg
+            self.message_timer = 90
+        return success
+    
+    def unequip_item(self, slot):
+        success, msg = self.player.unequip_item(slot)
+        if success:
+            self.message = msg
+            self.message_timer = 90
+        return success
+    
+    def sell_item(self, handle):
+        item = self.player.inventory.get(handle)
+        success, _ = self.player.sell_item(handle)
+        if success:
+            self.message = tr("equipment.sold", name=item.name, price=item.sell_price)
+            self.message_timer = 90
+        return success
+    
+    def deposit_items(self, handles):
+        """Перенести предметы из инвентаря на склад одной транзакцией; возвращает их число"""
+        if self.stash is None:
+            self.message = tr("stash.disabled")
+            self.message_timer = 90
+            return 0
+        items = [self.player.inventory.remove(handle) for handle in list(handles) if handle in self.player.inventory]
+        if items:
+            self.stash.store(items)
+        self.message = tr("stash.deposited", count=len(items))
+        self.message_timer = 60
+        return len(items)
+    
+    def withdraw_items(self, stash_ids):
+        """Забрать предметы со склада, сколько поместится в инвентарь; возвращает их число"""
+        if self.stash is None:
+            self.message = tr("stash.disabled")
+            self.message_timer = 90
+            return 0
+        free = self.player.max_inventory - len(self.player.inventory)
+        if free <= 0:
+            self.message = tr("player.inventory_full")
+            self.message_timer = 90
+            return 0
+        items = self.stash.take(list(stash_ids)[:free])
+        for item in items:
+            self.player.inventory.add(item)
+        self.message = tr("stash.withdrawn", count=len(items))
+        self.message_timer = 60
+        return len(items)
+    
+    def buy_shop_item(self, shop_item):
+        """Купить товар в магазине"""
+        price = shop_item.get_current_price(self.player)
+        
+        if self.player.gold < price:
+            self.message = tr("shop.not_enough_gold", price=price)
+            self.message_timer = 60
+            return
+        
+        if shop_item.item_type in ["potion_hp", "potion_mana"]:
+            if not self.player.can_add_to_inventory():
+                self.message = tr("shop.inventory_full")
+                self.message_timer = 90
+                return
+            
+            self.player.gold -= price
+            item_type = shop_item.item_type
+            value = shop_item.item_data["value"]
+            self.player.inventory.add(
+                Item(shop_item.name, item_type, value, shop_item.description, "common")
+            )
+            self.message = tr("shop.bought", name=shop_item.name)
+            self.message_timer = 60
+        
+        elif shop_item.item_type == "potion_multi":
+            if not self.player.can_add_to_inventory():
+                self.message = tr("shop.inventory_full")
+                self.message_timer = 90
+                return
+            
+            self.player.gold -= price
+            item = Item(shop_item.name, "potion_multi", shop_item.item_data["hp"], 
+                        tr("shop.multi_potion_desc", hp=shop_item.item_data["hp"], mana=shop_item.item_data["mana"]),
+                        "uncommon")
+            item.mana_value = shop_item.item_data["mana"]
+            self.player.inventory.add(item)
+            self.message = tr("shop.bought", name=shop_item.name)
+            self.message_timer = 60
+        
+        elif shop_item.item_type == "upgrade_attack":
+            self.player.gold -= price
+            self.player.upgrade("attack", shop_item.item_data["value"])
+            self.player.attack_upgrades_bought += 1
+            self.notify("shop_changed")
+            self.message = tr("shop.attack_upgraded", value=shop_item.item_data["value"], price=shop_item.get_current_price(self.player))
+            self.message_timer = 90
+        
+        elif shop_item.item_type == "upgrade_defense":
+            self.player.gold -= price
+            self.player.upgrade("defense", shop_item.item_data["value"])
+            self.player.defense_upgrades_bought += 1
+            self.notify("shop_changed")
+            self.message = tr("shop.defense_upgraded", value=shop_item.item_data["value"], price=shop_item.get_current_price(self.player))
+            self.message_timer = 90
+        
+        elif shop_item.item_type == "upgrade_hp":
+            self.player.gold -= price
+            self.player.upgrade("max_hp", shop_item.item_data["value"])
+            self.player.hp += shop_item.item_data["value"]  # Восстанавливаем тоже
+            self.message = tr("shop.hp_upgraded", value=shop_item.item_data["value"])
+            self.message_timer = 60
+        
+        elif shop_item.item_type == "upgrade_mana":
+            self.player.gold -= price
+            self.player.upgrade("max_mana", shop_item.item_data["value"])
+            self.player.mana += shop_item.item_data["value"]  # Восстанавливаем тоже
+            self.message = tr("shop.mana_upgraded", value=shop_item.item_data["value"])
+            self.message_timer = 60
+        
+        elif shop_item.item_type == "equipment":
+            if not self.player.can_add_to_inventory():
+                self.message = tr("shop.inventory_full")
+                self.message_timer = 90
+                return
+            
+            self.player.gold -= price
+            data = shop_item.item_data
+            item = Item(
+                shop_item.name,
+                data["item_type"],
+                data["value"],
+                shop_item.description,
+                data["rarity"],
+                data.get("effect"),
+                data.get("armor_slot")
+            )
+            self.player.inventory.add(item)
+            
+            if shop_item.stock != "unlimited":
+                self.shop_items.remove(shop_item)
+                self.notify("shop_changed")
+            
+            rarity_name = item.get_rarity_name()
+            self.message = tr("shop.bought_rarity", name=shop_item.name, rarity=rarity_name)
+            self.message_timer = 90
+        
+        TELEMETRY.record("purchase", item=shop_item.name, item_type=shop_item.item_type, price=price,
+                         gold_left=self.player.gold)
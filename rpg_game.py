@@ -2,636 +2,63 @@ import pygame
 import sys
 import random
 import math
+import time
+import argparse
+from collections import deque
 
-pygame.init()
+from rpg_alloc import AllocationTracker
+from rpg_audio import AUDIO, SOUND_SPECS, pre_init
+from rpg_i18n import tr, set_language, available_languages, DEFAULT_LANGUAGE
+from rpg_telemetry import TELEMETRY
+from rpg_runs import DEFAULT_RUNS_PATH, METRICS as RUN_METRICS, RunHistory, format_duration
+from rpg_stash import CATEGORIES as STASH_CATEGORIES, ORDERS as STASH_ORDERS, PAGE_SIZE as STASH_PAGE_SIZE
+from rpg_stash import DEFAULT_STASH_PATH, LOCAL_OWNER, Stash, StashDatabase, item_category
+from rpg_textures import paint_gradient, paint_radial_glow, paint_ellipse_glow
+from rpg_core import (
+    BG_COLOR, CARD_BG, OVERLAY_BG,
+    ACCENT_PRIMARY,
+    SUCCESS_COLOR, SUCCESS_HOVER,
+    DANGER_COLOR, DANGER_HOVER,
+    WARNING_COLOR, WARNING_HOVER,
+    PURPLE_COLOR, PURPLE_HOVER,
+    INFO_COLOR, MANA_COLOR,
+    TEXT_PRIMARY, TEXT_SECONDARY, TEXT_DISABLED,
+    RARITY_ORDER,
+    Enemy,
+    BattleLog, GameSession,
+)
 
 SCREEN_WIDTH = 900
 SCREEN_HEIGHT = 650
 
-BG_COLOR = (12, 17, 30)
-CARD_BG = (22, 32, 50)
-OVERLAY_BG = (8, 12, 20)
-
-ACCENT_PRIMARY = (66, 135, 245)
-ACCENT_SECONDARY = (88, 166, 255)
-
-SUCCESS_COLOR = (52, 211, 153)
-SUCCESS_HOVER = (74, 222, 170)
-
-DANGER_COLOR = (239, 68, 68)
-DANGER_HOVER = (248, 113, 113)
-
-WARNING_COLOR = (251, 191, 36)
-WARNING_HOVER = (252, 211, 77)
-
-PURPLE_COLOR = (168, 85, 247)
-PURPLE_HOVER = (192, 132, 252)
-
-INFO_COLOR = (96, 165, 250)
-MANA_COLOR = (99, 179, 237)
-
-TEXT_PRIMARY = (241, 245, 249)
-TEXT_SECONDARY = (148, 163, 184)
-TEXT_DISABLED = (100, 116, 139)
-
-RARITY_COMMON = (156, 163, 175)
-RARITY_UNCOMMON = (34, 197, 94)
-RARITY_RARE = (59, 130, 246)
-RARITY_EPIC = (168, 85, 247)
-RARITY_LEGENDARY = (234, 179, 8)
-
-pygame.font.init()
-FONT_TITLE = pygame.font.Font(None, 48)
-FONT_LARGE = pygame.font.Font(None, 32)
-FONT_MEDIUM = pygame.font.Font(None, 26)
-FONT_SMALL = pygame.font.Font(None, 22)
-FONT_TINY = pygame.font.Font(None, 18)
-
-
-class Skill:
-    """Класс навыка"""
-    def __init__(self, name, damage, mana_cost, effect_type="damage", effect_value=0, description=""):
-        self.name = name
-        self.damage = damage
-        self.mana_cost = mana_cost
-        self.effect_type = effect_type
-        self.effect_value = effect_value
-        self.description = description
-
-
-class Item:
-    """Класс предмета с системой редкости и эффектами"""
-    def __init__(self, name, item_type, value, description="", rarity="common", effect=None, armor_slot=None):
-        self.name = name
-        self.item_type = item_type
-        self.value = value
-        self.description = description
-        self.rarity = rarity
-        self.effect = effect
-        self.armor_slot = armor_slot
-        
-        self.sell_price = self.calculate_sell_price()
-    
-    def calculate_sell_price(self):
-        """Рассчитать цену продажи по редкости"""
-        base_prices = {
-            "common": 5,
-            "uncommon": 15,
-            "rare": 40,
-            "epic": 100,
-            "legendary": 300
-        }
-        
-        if self.item_type == "potion_hp" or self.item_type == "potion_mana":
-            return self.value // 2
-        
-        multiplier = 1
-        if self.item_type == "weapon":
-            multiplier = self.value * 2
-        elif self.item_type == "armor":
-            multiplier = self.value // 3
-        
-        return base_prices.get(self.rarity, 5) + multiplier
-    
-    def get_rarity_color(self):
-        """Получить цвет редкости"""
-        colors = {
-            "common": RARITY_COMMON,
-            "uncommon": RARITY_UNCOMMON,
-            "rare": RARITY_RARE,
-            "epic": RARITY_EPIC,
-            "legendary": RARITY_LEGENDARY
-        }
-        return colors.get(self.rarity, RARITY_COMMON)
-    
-    def get_rarity_name(self):
-        """Получить название редкости на русском"""
-        names = {
-            "common": "Обычный",
-            "uncommon": "Необычный",
-            "rare": "Редкий",
-            "epic": "Эпический",
-            "legendary": "Легендарный"
-        }
-        return names.get(self.rarity, "Обычный")
-
-
-class ShopItem:
-    """Товар в магазине"""
-    def __init__(self, name, item_type, base_price, description, stock="unlimited", item_data=None):
-        self.name = name
-        self.item_type = item_type
-        self.base_price = base_price
-        self.description = description
-        self.stock = stock
-        self.item_data = item_data
-        self.sold_count = 0
-    
-    def get_current_price(self, player=None):
-        """Получить текущую цену (может зависеть от количества покупок)"""
-        if self.item_type == "upgrade_attack" and player:
-            return int(self.base_price * (1.5 ** player.attack_upgrades_bought))
-        elif self.item_type == "upgrade_defense" and player:
-            return int(self.base_price * (1.5 ** player.defense_upgrades_bought))
-        return self.base_price
-    
-    def get_color(self):
-        """Цвет товара в зависимости от типа"""
-        if self.item_type == "potion_hp":
-            return SUCCESS_COLOR
-        elif self.item_type == "potion_mana":
-            return MANA_COLOR
-        elif self.item_type == "potion_multi":
-            return PURPLE_COLOR
-        elif self.item_type in ["upgrade_attack", "upgrade_defense"]:
-            return WARNING_COLOR
-        elif self.item_data and "rarity" in self.item_data:
-            temp_item = Item("temp", "weapon", 0, "", self.item_data["rarity"])
-            return temp_item.get_rarity_color()
-        else:
-            return ACCENT_PRIMARY
-
-
-class Player:
-    """Класс игрока с системой экипировки и статистикой"""
-    def __init__(self, name):
-        self.name = name
-        self.level = 1
-        self.hp = 120
-        self.max_hp = 120
-        self.mana = 100
-        self.max_mana = 100
-        self.attack = 15
-        self.defense = 8
-        self.exp = 0
-        self.exp_to_level = 100
-        self.gold = 100
-        
-        self.attack_upgrades_bought = 0
-        self.defense_upgrades_bought = 0
-        
-        self.equipped = {
-            "head": None,      # Шлем
-            "chest": None,     # Нагрудник
-            "legs": None,      # Поножи
-            "weapon": None     # Оружие
-        }
-        
-        self.max_inventory = 10
-        
-        self.inventory = [
-            Item("Зелье здоровья", "potion_hp", 50, "Восстанавливает 50 HP", "common"),
-            Item("Зелье маны", "potion_mana", 40, "Восстанавливает 40 маны", "common"),
-        ]
-        
-        self.skills = [
-            Skill("Мощный удар", 35, 25, "damage", 0, "Сильная атака"),
-            Skill("Молния", 45, 40, "damage", 0, "Магический урон"),
-            Skill("Защита", 0, 20, "buff", 5, "+5 защиты на 2 хода"),
-            Skill("Огненный шар", 55, 50, "damage", 0, "Мощное заклинание"),
-        ]
-        
-        self.status_effects = {}
-        
-        self.stats = {
-            "enemies_killed": 0,
-            "bosses_killed": 0,
-            "gold_earned": 0,
-            "critical_hits": 0,
-            "total_damage_dealt": 0,
-            "total_damage_taken": 0,
-            "items_collected": 0,
-            "potions_used": 0
-        }
-        
-        self.crit_chance = 0.15
-        self.crit_multiplier = 2.0
-    
-    def equip_item(self, item):
-        """Экипировать предмет в соответствующий слот"""
-        if item.item_type == "weapon":
-            if self.equipped["weapon"]:
-                old_weapon = self.equipped["weapon"]
-                self.attack -= old_weapon.value
-                if len(self.inventory) < self.max_inventory:
-                    self.inventory.append(old_weapon)
-            
-            self.equipped["weapon"] = item
-            self.attack += item.value
-            return True, f"Экипировано: {item.name}"
-            
-        elif item.item_type == "armor":
-            if not item.armor_slot or item.armor_slot not in ["head", "chest", "legs"]:
-                return False, "Неверный тип брони"
-            
-            slot = item.armor_slot
-            
-            if self.equipped[slot]:
-                old_armor = self.equipped[slot]
-                self.max_hp -= old_armor.value
-                self.hp = min(self.hp, self.max_hp)
-                if len(self.inventory) < self.max_inventory:
-                    self.inventory.append(old_armor)
-            
-            self.equipped[slot] = item
-            self.max_hp += item.value
-            self.hp += item.value
-            return True, f"Экипировано: {item.name}"
-        
-        return False, "Не удалось экипировать"
-    
-    def unequip_item(self, slot):
-        """Снять предмет из слота"""
-        if self.equipped[slot]:
-            item = self.equipped[slot]
-            
-            if len(self.inventory) >= self.max_inventory:
-                return False, "Инвентарь полон!"
-            
-            if item.item_type == "weapon":
-                self.attack -= item.value
-            elif item.item_type == "armor":
-                self.max_hp -= item.value
-                self.hp = min(self.hp, self.max_hp)
-            
-            self.inventory.append(item)
-            self.equipped[slot] = None
-            return True, f"Снято: {item.name}"
-        
-        return False, "Слот пуст"
-    
-    def sell_item(self, item_index):
-        """Продать предмет"""
-        if item_index < len(self.inventory):
-            item = self.inventory[item_index]
-            price = item.sell_price
-            self.gold += price
-            self.inventory.pop(item_index)
-            return True, f"Продано за {price} золота!"
-        return False, "Предмет не найден"
-    
-    def can_add_to_inventory(self):
-        """Проверка, можно ли добавить предмет"""
-        return len(self.inventory) < self.max_inventory
-    
-    def equip_weapon(self, bonus):
-        """Экипировать оружие (старый метод для совместимости)"""
-        self.attack += bonus
-    
-    def equip_armor(self, bonus):
-        """Экипировать броню (старый метод для совместимости)"""
-        self.max_hp += bonus
-        self.hp += bonus
-        
-    def take_damage(self, damage):
-        defense_bonus = self.status_effects.get("buff_defense", 0) * 5
-        total_defense = self.defense + defense_bonus
-        actual_damage = max(1, damage - total_defense)
-        self.hp -= actual_damage
-        self.stats["total_damage_taken"] += actual_damage
-        if self.hp < 0:
-            self.hp = 0
-        return actual_damage
-    
-    def calculate_attack_damage(self, base_damage):
-        """Рассчитать урон с учётом крита"""
-        is_crit = random.random() < self.crit_chance
-        damage = base_damage
-        
-        if is_crit:
-            damage = int(base_damage * self.crit_multiplier)
-            self.stats["critical_hits"] += 1
-        
-        if self.equipped["weapon"] and self.equipped["weapon"].effect:
-            pass
-        
-        self.stats["total_damage_dealt"] += damage
-        return damage, is_crit
-    
-    def heal(self, amount):
-        self.hp += amount
-        if self.hp > self.max_hp:
-            self.hp = self.max_hp
-    
-    def restore_mana(self, amount):
-        self.mana += amount
-        if self.mana > self.max_mana:
-            self.mana = self.max_mana
-    
-    def use_item(self, item_index):
-        if item_index < len(self.inventory):
-            item = self.inventory[item_index]
-            if item.item_type == "potion_hp":
-                self.heal(item.value)
-                self.inventory.pop(item_index)
-                self.stats["potions_used"] += 1
-                return True, f"Восстановлено {item.value} HP"
-            elif item.item_type == "potion_mana":
-                self.restore_mana(item.value)
-                self.inventory.pop(item_index)
-                self.stats["potions_used"] += 1
-                return True, f"Восстановлено {item.value} маны"
-            elif item.item_type == "potion_multi":
-                hp_restore = item.value
-                mana_restore = getattr(item, 'mana_value', 30)  # По умолчанию 30 маны
-                self.heal(hp_restore)
-                self.restore_mana(mana_restore)
-                self.inventory.pop(item_index)
-                self.stats["potions_used"] += 1
-                return True, f"Восстановлено {hp_restore} HP и {mana_restore} маны"
-            elif item.item_type == "weapon":
-                success, msg = self.equip_item(item)
-                if success:
-                    self.inventory.pop(item_index)
-                return success, msg
-            elif item.item_type == "armor":
-                success, msg = self.equip_item(item)
-                if success:
-                    self.inventory.pop(item_index)
-                return success, msg
-        return False, "Предмет недоступен"
-    
-    def use_skill(self, skill_index, target):
-        if skill_index < len(self.skills):
-            skill = self.skills[skill_index]
-            if self.mana >= skill.mana_cost:
-                self.mana -= skill.mana_cost
-                
-                if skill.effect_type == "damage":
-                    damage = skill.damage + random.randint(-5, 5)
-                    actual_damage = target.take_damage(damage)
-                    return True, f"{skill.name} нанёс {actual_damage} урона!"
-                elif skill.effect_type == "buff":
-                    self.status_effects["buff_defense"] = 2
-                    return True, "Защита усилена на 2 хода!"
-                    
-        return False, "Недостаточно маны!"
-    
-    def end_turn(self):
-        for effect in list(self.status_effects.keys()):
-            self.status_effects[effect] -= 1
-            if self.status_effects[effect] <= 0:
-                del self.status_effects[effect]
-    
-    def gain_exp(self, amount):
-        self.exp += amount
-        if self.exp >= self.exp_to_level:
-            self.level_up()
-    
-    def level_up(self):
-        self.level += 1
-        self.exp = 0
-        self.exp_to_level = int(self.exp_to_level * 1.5)
-        self.max_hp += 25
-        self.hp = self.max_hp
-        self.max_mana += 20
-        self.mana = self.max_mana
-        self.attack += 5
-        self.defense += 3
-
-
-class Enemy:
-    """Класс врага с ИИ"""
-    def __init__(self, level, allow_stronger=True):
-        self.level = level
-        
-        if allow_stronger and random.random() < 0.3:
-            self.level = level + random.randint(1, 2)
-            self.is_elite = True
-        else:
-            self.is_elite = False
-        
-        enemy_types = {
-            "Гоблин": {"hp_mult": 1.0, "attack_mult": 0.9, "defense_mult": 0.8},
-            "Орк": {"hp_mult": 1.3, "attack_mult": 1.2, "defense_mult": 1.0},
-            "Скелет": {"hp_mult": 0.8, "attack_mult": 1.1, "defense_mult": 0.7},
-            "Тёмный маг": {"hp_mult": 0.9, "attack_mult": 1.4, "defense_mult": 0.6},
-            "Дракон": {"hp_mult": 1.5, "attack_mult": 1.3, "defense_mult": 1.2},
-        }
-        
-        self.name, stats = random.choice(list(enemy_types.items()))
-        if self.is_elite:
-            self.name = f"[ЭЛИТНЫЙ] {self.name}"
-        
-        base_hp = 40 + (self.level * 20)
-        self.max_hp = int(base_hp * stats["hp_mult"])
-        self.hp = self.max_hp
-        
-        base_attack = 12 + (self.level * 4)
-        self.attack = int(base_attack * stats["attack_mult"])
-        
-        base_defense = 5 + self.level
-        self.defense = int(base_defense * stats["defense_mult"])
-        
-        self.exp_reward = 40 + (self.level * 15)
-        self.gold_reward = 15 + (self.level * 8)
-        
-        if self.is_elite:
-            self.exp_reward = int(self.exp_reward * 1.5)
-            self.gold_reward = int(self.gold_reward * 1.5)
-        
-        self.defending = False
-        self.charge = 0
-        
-        self.loot = self.generate_loot()
-    
-    def generate_loot(self):
-        """Генерация выпадающих предметов с системой редкости"""
-        loot = []
-        
-        rarity_roll = random.random()
-        if rarity_roll < 0.50:
-            rarity = "common"
-        elif rarity_roll < 0.75:
-            rarity = "uncommon"
-        elif rarity_roll < 0.90:
-            rarity = "rare"
-        elif rarity_roll < 0.98:
-            rarity = "epic"
-        else:
-            rarity = "legendary"
-        
-        rarity_multipliers = {
-            "common": 1.0,
-            "uncommon": 1.3,
-            "rare": 1.7,
-            "epic": 2.2,
-            "legendary": 3.0
-        }
-        mult = rarity_multipliers[rarity]
-        
-        if random.random() < 0.2:
-            weapon_bonus = int(random.randint(3, 8) * mult)
-            effect = None
-            effect_text = ""
-            
-            if rarity in ["rare", "epic", "legendary"] and random.random() < 0.3:
-                effect = random.choice(["poison", "fire", "ice", "lightning"])
-                effect_names = {
-                    "poison": "[ЯД]",
-                    "fire": "[ОГОНЬ]",
-                    "ice": "[ЛЁД]",
-                    "lightning": "[МОЛНИЯ]"
-                }
-                effect_text = f" {effect_names[effect]}"
-            
-            loot.append(Item(
-                f"Меч +{weapon_bonus}{effect_text}",
-                "weapon",
-                weapon_bonus,
-                f"Увеличивает атаку на {weapon_bonus}",
-                rarity,
-                effect
-            ))
-        
-        if random.random() < 0.2:
-            armor_bonus = int(random.randint(15, 35) * mult)
-            slot = random.choice(["head", "chest", "legs"])
-            slot_names = {"head": "Шлем", "chest": "Нагрудник", "legs": "Поножи"}
-            
-            loot.append(Item(
-                f"{slot_names[slot]} +{armor_bonus}",
-                "armor",
-                armor_bonus,
-                f"Увеличивает макс. HP на {armor_bonus}",
-                rarity,
-                None,
-                slot
-            ))
-        
-        if self.is_elite and random.random() < 0.4:
-            weapon_bonus = int(random.randint(8, 15) * mult)
-            elite_rarity = random.choice(["rare", "epic"]) if rarity in ["common", "uncommon"] else rarity
-            loot.append(Item(
-                f"Редкий меч +{weapon_bonus}",
-                "weapon",
-                weapon_bonus,
-                f"Увеличивает атаку на {weapon_bonus}",
-                elite_rarity
-            ))
-        
-        return loot
-    
-    def take_damage(self, damage):
-        defense_mult = 2 if self.defending else 1
-        actual_damage = max(1, damage - (self.defense * defense_mult))
-        self.hp -= actual_damage
-        if self.hp < 0:
-            self.hp = 0
-        self.defending = False
-        return actual_damage
-    
-    def choose_action(self, player):
-        if self.hp < self.max_hp * 0.3 and random.random() < 0.4:
-            return "defend"
-        elif self.charge >= 1:
-            self.charge = 0
-            return "heavy_attack"
-        elif random.random() < 0.3:
-            self.charge += 1
-            return "charge"
-        else:
-            return "attack"
-    
-    def perform_action(self, action, player):
-        if action == "attack":
-            damage = self.attack + random.randint(-3, 3)
-            actual = player.take_damage(damage)
-            return f"{self.name} атакует! Урон: {actual}"
-        elif action == "heavy_attack":
-            damage = int(self.attack * 1.8) + random.randint(-5, 5)
-            actual = player.take_damage(damage)
-            return f"{self.name} использует мощную атаку! Урон: {actual}"
-        elif action == "defend":
-            self.defending = True
-            return f"{self.name} принимает защитную стойку!"
-        elif action == "charge":
-            return f"{self.name} готовит мощную атаку..."
-        return ""
-
-
-class Boss(Enemy):
-    """Класс босса - усиленная версия врага"""
-    def __init__(self, level, location_name):
-        super().__init__(level, allow_stronger=False)
-        
-        self.is_elite = True
-        self.is_boss = True
-        
-        boss_names = {
-            "Тёмный лес": "Древний Энт",
-            "Заброшенная крепость": "Рыцарь-Смерть",
-            "Пещера гоблинов": "Король Гоблинов",
-            "Логово орков": "Вождь Орков",
-            "Драконье гнездо": "Древний Дракон"
-        }
-        
-        self.name = f"[БОСС] {boss_names.get(location_name, 'Неизвестный босс')}"
-        
-        self.max_hp = int(self.max_hp * 2.5)
-        self.hp = self.max_hp
-        self.attack = int(self.attack * 1.8)
-        self.defense = int(self.defense * 1.5)
-        
-        self.exp_reward = int(self.exp_reward * 3)
-        self.gold_reward = int(self.gold_reward * 4)
-        
-        self.loot = self.generate_boss_loot()
-    
-    def generate_boss_loot(self):
-        """Генерация уникального лута для боссов"""
-        loot = []
-        
-        num_items = random.randint(1, 2)
-        
-        for _ in range(num_items):
-            item_type = random.choice(["weapon", "armor"])
-            rarity = random.choices(
-                ["rare", "epic", "legendary"],
-                weights=[50, 35, 15]
-            )[0]
-            
-            if item_type == "weapon":
-                bonus = random.randint(10, 25) if rarity == "rare" else random.randint(20, 40) if rarity == "epic" else random.randint(35, 60)
-                effect = random.choice([None, "poison", "fire", "ice", "lightning"])
-                effect_text = ""
-                if effect == "poison":
-                    effect_text = " [ЯД]"
-                elif effect == "fire":
-                    effect_text = " [ОГОНЬ]"
-                elif effect == "ice":
-                    effect_text = " [ЛЁД]"
-                elif effect == "lightning":
-                    effect_text = " [МОЛНИЯ]"
-                
-                loot.append(Item(
-                    f"Меч босса +{bonus}{effect_text}",
-                    "weapon",
-                    bonus,
-                    f"Легендарное оружие босса. Атака +{bonus}",
-                    rarity,
-                    effect
-                ))
-            else:
-                bonus = random.randint(30, 60) if rarity == "rare" else random.randint(50, 90) if rarity == "epic" else random.randint(80, 130)
-                slot = random.choice(["head", "chest", "legs"])
-                slot_names = {"head": "Шлем", "chest": "Нагрудник", "legs": "Поножи"}
-                
-                loot.append(Item(
-                    f"{slot_names[slot]} босса +{bonus}",
-                    "armor",
-                    bonus,
-                    f"Легендарная броня босса. HP +{bonus}",
-                    rarity,
-                    None,
-                    slot
-                ))
-        
-        return loot
+# Шрифты создаются при запуске игры, чтобы импорт модуля не поднимал SDL
+FONT_TITLE = None
+FONT_LARGE = None
+FONT_MEDIUM = None
+FONT_SMALL = None
+FONT_TINY = None
+
+
+def init_pygame():
+    """Инициализировать pygame и шрифты при первом использовании"""
+    global FONT_TITLE, FONT_LARGE, FONT_MEDIUM, FONT_SMALL, FONT_TINY
+    if FONT_TITLE is not None:
+        return
+    
+    pre_init()
+    pygame.init()
+    pygame.font.init()
+    FONT_TITLE = pygame.font.Font(None, 48)
+    FONT_LARGE = pygame.font.Font(None, 32)
+    FONT_MEDIUM = pygame.font.Font(None, 26)
+    FONT_SMALL = pygame.font.Font(None, 22)
+    FONT_TINY = pygame.font.Font(None, 18)
 
 
 class Star:
     """Анимированная звезда для фона"""
+    ALPHA_STEP = 16
+    
     def __init__(self):
         self.x = random.randint(0, SCREEN_WIDTH)
         self.y = random.randint(0, SCREEN_HEIGHT)
@@ -655,15 +82,23 @@ class Star:
             self.alpha = 80
             self.alpha_direction = 1
     
+    @staticmethod
+    def paint(surface, radius, alpha):
+        pygame.draw.circle(surface, (255, 255, 255, alpha), (radius, radius), radius)
+    
     def draw(self, screen):
-        star_surface = pygame.Surface((int(self.size * 2), int(self.size * 2)), pygame.SRCALPHA)
-        pygame.draw.circle(star_surface, (255, 255, 255, int(self.alpha)), 
-                          (int(self.size), int(self.size)), int(self.size))
-        screen.blit(star_surface, (int(self.x - self.size), int(self.y - self.size)))
+        size = int(self.size * 2)
+        radius = int(self.size)
+        # Яркость квантуется, чтобы все звёзды делили несколько спрайтов атласа
+        alpha = int(self.alpha) // self.ALPHA_STEP * self.ALPHA_STEP
+        ATLAS.blit(screen, ("star", size, radius, alpha), (int(self.x - self.size), int(self.y - self.size)),
+                   size, size, self.paint, radius, alpha)
 
 
 class Particle:
     """Класс частицы для красивых эффектов"""
+    ALPHA_STEP = 32
+    
     def __init__(self, x, y, color, particle_type="circle"):
         self.x = x
         self.y = y
@@ -683,6 +118,25 @@ class Particle:
         self.vel_y += self.gravity
         return self.lifetime > 0
     
+    @staticmethod
+    def paint_star(surface, color, current_size, alpha):
+        color_with_alpha = (*color, alpha)
+        center_x, center_y = int(current_size * 1.5), int(current_size * 1.5)
+        
+        pygame.draw.circle(surface, color_with_alpha, (center_x, center_y), int(current_size))
+        
+        for angle in range(0, 360, 45):
+            rad = math.radians(angle)
+            end_x = int(center_x + math.cos(rad) * current_size * 2)
+            end_y = int(center_y + math.sin(rad) * current_size * 2)
+            pygame.draw.line(surface, color_with_alpha, (center_x, center_y), (end_x, end_y), 2)
+    
+    @staticmethod
+    def paint_circle(surface, color, current_size, alpha):
+        center = int(current_size * 2)
+        pygame.draw.circle(surface, (*color, alpha // 3), (center, center), int(current_size * 2))
+        pygame.draw.circle(surface, (*color, alpha), (center, center), int(current_size))
+    
     def draw(self, screen):
         alpha = int(255 * (self.lifetime / self.max_lifetime))
         current_size = self.size * (self.lifetime / self.max_lifetime)
@@ -690,36 +144,384 @@ class Particle:
         if current_size < 0.5:
             return
         
+        # Размер с шагом 0.5 и прозрачность с шагом ALPHA_STEP: спрайт берётся из атласа, а не рисуется заново
+        current_size = round(current_size * 2) / 2
+        alpha = min(255, (alpha // self.ALPHA_STEP + 1) * self.ALPHA_STEP)
+        color = tuple(self.color[:3])
+        
         if self.type == "star":
-            surf = pygame.Surface((int(current_size * 3), int(current_size * 3)), pygame.SRCALPHA)
-            color_with_alpha = (*self.color[:3], alpha)
-            center_x, center_y = int(current_size * 1.5), int(current_size * 1.5)
-            
-            pygame.draw.circle(surf, color_with_alpha, (center_x, center_y), int(current_size))
-            
-            for angle in range(0, 360, 45):
-                rad = math.radians(angle)
-                end_x = int(center_x + math.cos(rad) * current_size * 2)
-                end_y = int(center_y + math.sin(rad) * current_size * 2)
-                pygame.draw.line(surf, color_with_alpha, (center_x, center_y), (end_x, end_y), 2)
-            
-            screen.blit(surf, (self.x - current_size * 1.5, self.y - current_size * 1.5))
+            size = int(current_size * 3)
+            ATLAS.blit(screen, ("spark", color, current_size, alpha),
+                       (self.x - current_size * 1.5, self.y - current_size * 1.5),
+                       size, size, self.paint_star, color, current_size, alpha)
         else:
-            surf = pygame.Surface((int(current_size * 4), int(current_size * 4)), pygame.SRCALPHA)
-            center = int(current_size * 2)
-            
-            glow_alpha = alpha // 3
-            pygame.draw.circle(surf, (*self.color[:3], glow_alpha), 
-                             (center, center), int(current_size * 2))
-            
-            pygame.draw.circle(surf, (*self.color[:3], alpha), 
-                             (center, center), int(current_size))
-            
-            screen.blit(surf, (self.x - current_size * 2, self.y - current_size * 2))
+            size = int(current_size * 4)
+            ATLAS.blit(screen, ("particle", color, current_size, alpha),
+                       (self.x - current_size * 2, self.y - current_size * 2),
+                       size, size, self.paint_circle, color, current_size, alpha)
+
+
+def to_display(surface, alpha=True):
+    """Перевести поверхность в формат экрана, если окно уже создано, чтобы blit не конвертировал её каждый кадр"""
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+class TextCache:
+    """Кэш отрендеренного текста"""
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.surfaces = {}
+
+    def render(self, font, text, color):
+        """Получить поверхность текста, рендеря её только при первом запросе"""
+        key = (font, text, color)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            if len(self.surfaces) >= self.max_size:
+                del self.surfaces[next(iter(self.surfaces))]
+            surface = to_display(font.render(text, True, color))
+            self.surfaces[key] = surface
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+TEXT_CACHE = TextCache()
+
+
+class SpriteAtlas:
+    """Мелкие декоративные спрайты, упакованные полками в несколько страниц в формате экрана"""
+    PAGE_SIZE = 512
+    MAX_PAGES = 6
+    
+    def __init__(self):
+        self.pages = []
+        self.sprites = {}
+        self.baked = {}
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+    
+    def new_page(self):
+        page = to_display(pygame.Surface((self.PAGE_SIZE, self.PAGE_SIZE), pygame.SRCALPHA))
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        self.shelf_x = 0
+        self.shelf_y = 0
+        self.shelf_height = 0
+    
+    def allocate(self, width, height):
+        """Место под спрайт на текущей полке; при переполнении всех страниц атлас собирается заново"""
+        if not self.pages:
+            self.new_page()
+        if self.shelf_x + width > self.PAGE_SIZE:
+            self.shelf_y += self.shelf_height
+            self.shelf_x = 0
+            self.shelf_height = 0
+        if self.shelf_y + height > self.PAGE_SIZE:
+            if len(self.pages) >= self.MAX_PAGES:
+                self.clear()
+            self.new_page()
+        
+        rect = pygame.Rect(self.shelf_x, self.shelf_y, width, height)
+        # Зазор в пиксель, чтобы сглаженные края соседей не попадали в спрайт
+        self.shelf_x += width + 1
+        self.shelf_height = max(self.shelf_height, height + 1)
+        return self.pages[-1], rect
+    
+    def get(self, key, width, height, paint, *args):
+        """Страница и прямоугольник спрайта; paint(surface, *args) рисует его при первом запросе"""
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            width, height = max(1, width), max(1, height)
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            paint(surface, *args)
+            page, rect = self.allocate(width, height)
+            page.blit(surface, rect, special_flags=pygame.BLEND_RGBA_MAX)
+            sprite = (page, rect)
+            self.sprites[key] = sprite
+        return sprite
+    
+    def blit(self, screen, key, pos, width, height, paint, *args):
+        page, rect = self.get(key, width, height, paint, *args)
+        screen.blit(page, pos, rect)
+    
+    def bake(self, key, width, height, paint, *args):
+        """Отдельная поверхность для крупных слоёв и тех, чья прозрачность меняется через set_alpha"""
+        surface = self.baked.get(key)
+        if surface is None:
+            surface = pygame.Surface((width, height), pygame.SRCALPHA)
+            paint(surface, *args)
+            surface = to_display(surface)
+            self.baked[key] = surface
+        return surface
+    
+    def clear(self):
+        self.pages = []
+        self.sprites.clear()
+
+
+ATLAS = SpriteAtlas()
+
+
+class Presenter:
+    """Вывод внутреннего холста SCREEN_WIDTH x SCREEN_HEIGHT в окно с масштабом и пересчёт координат мыши"""
+    MIN_SCALE = 0.5
+    MAX_SCALE = 2.0
+    MOUSE_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP)
+    
+    def __init__(self):
+        self.window = None
+        self.canvas = None
+        self.scale = 1.0
+    
+    def open(self, scale=1.0, scaled=False, vsync=False):
+        """Создать окно и вернуть холст, на котором рисует игра.
+        
+        scale задаёт только размер окна относительно холста: игра всё равно рисует полный холст, а при scale,
+        отличном от единицы, каждый кадр добавляет масштабирование всего холста в окно, так что заливку
+        не экономит ни уменьшение, ни увеличение. С scaled окно дополнительно растягивает видеокарта через pygame.SCALED.
+        """
+        self.scale = max(self.MIN_SCALE, min(self.MAX_SCALE, scale))
+        size = (round(SCREEN_WIDTH * self.scale), round(SCREEN_HEIGHT * self.scale))
+        # Вертикальная синхронизация в pygame доступна только вместе с SCALED
+        flags = pygame.SCALED if scaled or vsync else 0
+        try:
+            self.window = pygame.display.set_mode(size, flags, vsync=1 if vsync else 0)
+        except pygame.error:
+            self.window = pygame.display.set_mode(size, flags)
+        
+        if self.window.get_size() == (SCREEN_WIDTH, SCREEN_HEIGHT):
+            self.canvas = self.window
+        else:
+            self.canvas = to_display(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), alpha=False)
+        return self.canvas
+    
+    def present(self):
+        if self.canvas is not self.window:
+            size = self.window.get_size()
+            if self.scale == int(self.scale):
+                pygame.transform.scale(self.canvas, size, self.window)
+            else:
+                pygame.transform.smoothscale(self.canvas, size, self.window)
+        pygame.display.flip()
+    
+    def to_canvas(self, pos):
+        if self.canvas is self.window:
+            return pos
+        return (int(pos[0] / self.scale), int(pos[1] / self.scale))
+    
+    def map_event(self, event):
+        """Перевести координаты события мыши из окна в холст"""
+        if self.canvas is not self.window and event.type in self.MOUSE_EVENTS:
+            event.pos = self.to_canvas(event.pos)
+        return event
+
+
+PRESENTER = Presenter()
+
+
+def get_mouse_pos():
+    """Позиция мыши в координатах холста"""
+    return PRESENTER.to_canvas(pygame.mouse.get_pos())
+
+
+class ProgressBarRenderer:
+    """Прогресс-бар с заранее отрисованными слоями для каждого цвета и размера"""
+    GLOW_WIDTH = 8
+
+    def __init__(self, text_cache):
+        self.text_cache = text_cache
+        self.layers = {}
+        self.glows = {}
+
+    def get_layers(self, width, height, color):
+        """Пустая рамка, полностью заполненная полоса и обводка"""
+        key = (width, height, color)
+        layers = self.layers.get(key)
+        if layers is None:
+            layers = self.build_layers(width, height, color)
+            self.layers[key] = layers
+        return layers
+
+    def build_layers(self, width, height, color):
+        radius = height // 2
+        rect = pygame.Rect(0, 0, width, height)
+
+        back = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.rect(back, (20, 25, 35), rect, border_radius=radius)
+        pygame.draw.rect(back, (15, 18, 25), rect.inflate(-2, -2), border_radius=radius)
+
+        fill = pygame.Surface((width, height), pygame.SRCALPHA)
+        paint_gradient(fill.subsurface((2, 0, width - 4, height)), [(0, color), (1, tuple(c * 0.85 for c in color))])
+        pygame.draw.rect(fill, color, rect, border_radius=radius)
+
+        shine_height = max(2, height // 3)
+        shine = pygame.Surface((width - 4, shine_height), pygame.SRCALPHA)
+        paint_gradient(shine, [(0, (255, 255, 255, 60)), (1, (255, 255, 255, 0))])
+        fill.blit(shine, (2, 2))
+
+        frame = pygame.Surface((width, height), pygame.SRCALPHA)
+        border_color = tuple(min(255, c + 20) for c in color)
+        pygame.draw.rect(frame, border_color, rect, 1, border_radius=radius)
+        pygame.draw.rect(frame, (255, 255, 255), rect.inflate(-2, -2), 1, border_radius=radius)
+        pygame.draw.rect(frame, (255, 255, 255), rect, 1, border_radius=radius)
+
+        return to_display(back), to_display(fill), to_display(frame)
+
+    def get_glow(self, height, color):
+        """Спрайт пульсирующего свечения на краю заполнения"""
+        key = (height, color)
+        glow = self.glows.get(key)
+        if glow is None:
+            glow = pygame.Surface((self.GLOW_WIDTH, height), pygame.SRCALPHA)
+            paint_gradient(glow, [(0, (*color, 40)), (1, (*color, 0))], vertical=False)
+            glow = to_display(glow)
+            self.glows[key] = glow
+        return glow
+
+    def draw(self, screen, x, y, width, height, value, max_value, color, label=""):
+        back, fill, frame = self.get_layers(width, height, color)
+        screen.blit(back, (x, y))
+
+        fill_width = int((value / max_value) * width) if max_value > 0 else 0
+        fill_width = max(0, min(width, fill_width))
+        if fill_width > 4:
+            # Тело полосы обрезается по ширине, а скруглённый конец берётся с правого края заготовки
+            radius = height // 2
+            body_width = max(0, fill_width - radius)
+            cap_width = fill_width - body_width
+            if body_width:
+                screen.blit(fill, (x, y), pygame.Rect(0, 0, body_width, height))
+            screen.blit(fill, (x + body_width, y), pygame.Rect(width - cap_width, 0, cap_width, height))
+
+            if fill_width < width - 2:
+                pulse = abs(math.sin(pygame.time.get_ticks() / 800)) * 0.5 + 0.5
+                glow = self.get_glow(height, color)
+                glow.set_alpha(int(255 * pulse))
+                screen.blit(glow, (x + fill_width - 4, y))
+
+        screen.blit(frame, (x, y))
+
+        if label:
+            text = tr("hud.fraction", value=value, max=max_value)
+            center = (x + width // 2, y + height // 2)
+            shadow = self.text_cache.render(FONT_TINY, text, (0, 0, 0))
+            screen.blit(shadow, shadow.get_rect(center=(center[0] + 1, center[1] + 1)))
+            text_surface = self.text_cache.render(FONT_TINY, text, TEXT_PRIMARY)
+            screen.blit(text_surface, text_surface.get_rect(center=center))
+
+
+class SparklineRenderer:
+    """Мини-графики по колонкам истории боёв; поверхность перестраивается только после нового боя"""
+    def __init__(self):
+        self.graphs = {}
+    
+    def get(self, history, column, width, height, color):
+        key = (column, width, height, color)
+        entry = self.graphs.get(key)
+        if entry is None or entry[0] is not history or entry[1] != history.version:
+            entry = (history, history.version, self.build(history.series(column), width, height, color))
+            self.graphs[key] = entry
+        return entry[2]
+    
+    def build(self, values, width, height, color):
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.rect(surface, (255, 255, 255, 12), surface.get_rect(), border_radius=4)
+        if not values:
+            return to_display(surface)
+        
+        peak = max(values) or 1
+        inner = height - 6
+        step = (width - 6) / max(1, len(values) - 1)
+        points = [(3 + i * step, height - 3 - value / peak * inner) for i, value in enumerate(values)]
+        if len(points) > 1:
+            area = points + [(points[-1][0], height - 3), (points[0][0], height - 3)]
+            pygame.draw.polygon(surface, (*color, 50), area)
+            pygame.draw.aalines(surface, color, False, points)
+        pygame.draw.circle(surface, color, (int(points[-1][0]), int(points[-1][1])), 2)
+        return to_display(surface)
+
+
+class CardRenderer:
+    """Карточки с тенями, рамкой и бликом, отрисованные один раз для каждого размера"""
+    PAD_LEFT = 3
+    PAD_RIGHT = 11
+    PAD_BOTTOM = 21
+    
+    def __init__(self):
+        self.cards = {}
+    
+    def get_card(self, width, height):
+        key = (width, height)
+        card = self.cards.get(key)
+        if card is None:
+            card = self.build_card(width, height)
+            self.cards[key] = card
+        return card
+    
+    def build_card(self, width, height):
+        left = self.PAD_LEFT
+        surface = pygame.Surface((width + left + self.PAD_RIGHT, height + self.PAD_BOTTOM), pygame.SRCALPHA)
+        
+        for i in range(3):
+            shadow_offset = 3 + i * 2
+            shadow_alpha = 40 - i * 10
+            shadow = pygame.Surface((width + shadow_offset * 2, height + shadow_offset * 2), pygame.SRCALPHA)
+            pygame.draw.rect(shadow, (0, 0, 0, shadow_alpha), shadow.get_rect(), border_radius=15)
+            surface.blit(shadow, (left - shadow_offset // 2, shadow_offset))
+        
+        card = pygame.Surface((width, height), pygame.SRCALPHA)
+        paint_gradient(card, [(0, CARD_BG), (1, tuple(c * 0.92 for c in CARD_BG))])
+        pygame.draw.rect(card, CARD_BG, card.get_rect(), border_radius=12)
+        surface.blit(card, (left, 0))
+        
+        pygame.draw.rect(surface, (255, 255, 255), pygame.Rect(left, 0, width, height), 1, border_radius=12)
+        pygame.draw.rect(surface, (255, 255, 255), pygame.Rect(left + 1, 1, width - 2, height - 2), 1, border_radius=11)
+        
+        shine_width = width // 3
+        shine_height = height // 4
+        shine = pygame.Surface((shine_width, shine_height), pygame.SRCALPHA)
+        paint_radial_glow(shine, (255, 255, 255), 25)
+        surface.blit(shine, (left + 10, 10))
+        
+        return to_display(surface)
+    
+    def draw(self, screen, x, y, width, height, alpha=255):
+        card = self.get_card(width, height)
+        card.set_alpha(alpha)
+        screen.blit(card, (x - self.PAD_LEFT, y))
+
+
+class ScreenLayers:
+    """Неподвижные части экранов, запечённые в одну поверхность; слой перестраивается, когда меняется его ключ"""
+    def __init__(self):
+        self.layers = {}
+    
+    def draw(self, screen, name, key, paint):
+        entry = self.layers.get(name)
+        if entry is None or entry[0] != key:
+            canvas = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            paint(canvas)
+            # Хранится только занятая часть холста, чтобы пустые поля не смешивались с экраном в каждом кадре
+            bounds = canvas.get_bounding_rect()
+            entry = (key, to_display(canvas.subsurface(bounds).copy()), bounds.topleft)
+            self.layers[name] = entry
+        screen.blit(entry[1], entry[2])
+    
+    def clear(self):
+        self.layers.clear()
 
 
 class Button:
     """Современная компактная кнопка с плавными анимациями"""
+    skin_cache = {}
+    # Поднимается любой кнопкой, у которой анимация наведения или нажатия ещё не закончилась
+    animating = False
+    
     def __init__(self, x, y, width, height, text, color=ACCENT_PRIMARY, hover_color=None, icon=None):
         self.base_rect = pygame.Rect(x, y, width, height)
         self.rect = self.base_rect.copy()
@@ -733,7 +535,7 @@ class Button:
         self.icon = icon
         
     def update(self, dt=0.016):
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = get_mouse_pos()
         self.is_hovered = self.rect.collidepoint(mouse_pos)
         
         if self.is_hovered:
@@ -751,25 +553,55 @@ class Button:
         
         lift = int(self.hover_progress * 2)
         self.rect.y = self.base_rect.y - lift
+        
+        if 0.0 < self.hover_progress < 1.0 or self.click_progress > 0:
+            Button.animating = True
+    
+    def get_skin(self):
+        """Тень, блик и вспышка нажатия для размера кнопки, общие для всех кнопок"""
+        key = self.rect.size
+        skin = Button.skin_cache.get(key)
+        if skin is None:
+            width, height = key
+            border_radius = 10
+            
+            shadow = pygame.Surface((width + 8, height + 8), pygame.SRCALPHA)
+            pygame.draw.rect(shadow, (0, 0, 0), shadow.get_rect(), border_radius=border_radius)
+            
+            shine_height = height // 3
+            shine = pygame.Surface((width - 10, shine_height), pygame.SRCALPHA)
+            paint_gradient(shine, [(0, (255, 255, 255, 25)), (1, (255, 255, 255, 0))])
+            
+            click_overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+            pygame.draw.rect(click_overlay, (255, 255, 255), click_overlay.get_rect(), border_radius=border_radius)
+            
+            skin = (to_display(shadow), to_display(shine), to_display(click_overlay))
+            Button.skin_cache[key] = skin
+        return skin
+    
+    def paint_glow(self, surface, border_radius):
+        pygame.draw.rect(surface, (*self.hover_color, 40), surface.get_rect(), border_radius=border_radius)
+    
+    def warm(self):
+        """Подготовить скин и текст кнопки заранее"""
+        self.get_skin()
+        TEXT_CACHE.render(FONT_SMALL, self.text, TEXT_PRIMARY)
+        TEXT_CACHE.render(FONT_SMALL, self.text, (0, 0, 0, 100))
     
     def draw(self, screen):
         border_radius = 10
+        shadow_surface, shine_surface, click_overlay = self.get_skin()
         
         shadow_offset = 4 + int(self.hover_progress * 2)
-        shadow_rect = self.rect.copy()
-        shadow_rect.y += shadow_offset
-        shadow_surface = pygame.Surface((self.rect.width + 8, self.rect.height + 8), pygame.SRCALPHA)
-        shadow_alpha = int(30 + self.hover_progress * 20)
-        pygame.draw.rect(shadow_surface, (0, 0, 0, shadow_alpha), 
-                        shadow_surface.get_rect(), border_radius=border_radius)
-        screen.blit(shadow_surface, (shadow_rect.x - 4, shadow_rect.y - 4))
+        shadow_surface.set_alpha(int(30 + self.hover_progress * 20))
+        screen.blit(shadow_surface, (self.rect.x - 4, self.rect.y + shadow_offset - 4))
         
         if self.hover_progress > 0.1:
-            glow_alpha = int(40 * self.hover_progress)
             glow_rect = self.rect.inflate(8, 8)
-            glow_surface = pygame.Surface((glow_rect.width, glow_rect.height), pygame.SRCALPHA)
-            pygame.draw.rect(glow_surface, (*self.color, glow_alpha), 
-                           glow_surface.get_rect(), border_radius=border_radius + 2)
+            # Свечение запекается в цвете наведения, а нарастание задаёт прозрачность слоя
+            glow_surface = ATLAS.bake(("button_glow", glow_rect.size, self.hover_color),
+                                      glow_rect.width, glow_rect.height, self.paint_glow, border_radius + 2)
+            glow_surface.set_alpha(int(255 * self.hover_progress))
             screen.blit(glow_surface, (glow_rect.x - 4, glow_rect.y - 4))
         
         pygame.draw.rect(screen, self.color, self.rect, border_radius=border_radius)
@@ -778,25 +610,16 @@ class Button:
         border_color = tuple(min(255, c + 40) for c in self.color)
         pygame.draw.rect(screen, (*border_color, border_alpha), self.rect, 2, border_radius=border_radius)
         
-        shine_rect = pygame.Rect(self.rect.x + 5, self.rect.y + 2, self.rect.width - 10, self.rect.height // 3)
-        shine_surface = pygame.Surface((shine_rect.width, shine_rect.height), pygame.SRCALPHA)
-        for i in range(shine_rect.height):
-            shine_alpha = int(25 * (1 - i / shine_rect.height))
-            pygame.draw.line(shine_surface, (255, 255, 255, shine_alpha), 
-                           (0, i), (shine_rect.width, i))
-        screen.blit(shine_surface, (shine_rect.x, shine_rect.y))
+        screen.blit(shine_surface, (self.rect.x + 5, self.rect.y + 2))
         
         if self.click_progress > 0:
-            click_overlay = pygame.Surface(self.rect.size, pygame.SRCALPHA)
-            click_alpha = int(self.click_progress * 60)
-            pygame.draw.rect(click_overlay, (255, 255, 255, click_alpha), 
-                           click_overlay.get_rect(), border_radius=border_radius)
+            click_overlay.set_alpha(int(self.click_progress * 60))
             screen.blit(click_overlay, self.rect)
         
-        text_surface = FONT_SMALL.render(self.text, True, TEXT_PRIMARY)
+        text_surface = TEXT_CACHE.render(FONT_SMALL, self.text, TEXT_PRIMARY)
         text_rect = text_surface.get_rect(center=self.rect.center)
         
-        text_shadow = FONT_SMALL.render(self.text, True, (0, 0, 0, 100))
+        text_shadow = TEXT_CACHE.render(FONT_SMALL, self.text, (0, 0, 0, 100))
         shadow_rect = text_shadow.get_rect(center=(self.rect.centerx + 1, self.rect.centery + 1))
         screen.blit(text_shadow, shadow_rect)
         screen.blit(text_surface, text_rect)
@@ -808,13 +631,40 @@ class Button:
             if self.rect.collidepoint(event.pos):
                 self.is_hovered = True
                 self.click_progress = 1.0
+                AUDIO.play("click")
                 return True
         return False
 
 
+class ModalCompositor:
+    """Общий затемняющий слой и вывод закэшированных кадров модальных окон"""
+    def __init__(self):
+        self.overlay = None
+    
+    def draw_overlay(self, screen, alpha):
+        """Затемнить экран одним переиспользуемым полноэкранным слоем"""
+        if self.overlay is None:
+            self.overlay = to_display(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), alpha=False)
+            self.overlay.fill(OVERLAY_BG)
+        self.overlay.set_alpha(alpha)
+        screen.blit(self.overlay, (0, 0))
+    
+    def draw_frame(self, screen, frame, pos, scale=1.0, alpha=255):
+        """Вывести кадр окна; во время анимации кадр масштабируется, а не перерисовывается"""
+        if scale != 1.0:
+            size = (max(1, int(frame.get_width() * scale)), max(1, int(frame.get_height() * scale)))
+            frame = pygame.transform.smoothscale(frame, size)
+        frame.set_alpha(alpha)
+        screen.blit(frame, pos)
+
+
 class ModalWindow:
     """Модальное окно с анимацией появления"""
-    def __init__(self, width, height, title=""):
+    SHADOW_PAD_X = 10
+    SHADOW_PAD_TOP = 5
+    SHADOW_PAD_BOTTOM = 15
+    
+    def __init__(self, width, height, title="", compositor=None):
         self.width = width
         self.height = height
         self.title = title
@@ -824,6 +674,8 @@ class ModalWindow:
         self.animation_progress = 0.0
         self.is_open = False
         self.target_open = False
+        self.compositor = compositor if compositor else ModalCompositor()
+        self.frame = None
         
     def open(self):
         self.target_open = True
@@ -840,13 +692,33 @@ class ModalWindow:
             if self.animation_progress == 0:
                 self.is_open = False
     
+    def get_frame(self):
+        """Полностью открытое окно с тенью и заголовком, рисуется один раз"""
+        if self.frame is None:
+            pad_x = self.SHADOW_PAD_X
+            pad_top = self.SHADOW_PAD_TOP
+            frame = pygame.Surface((self.width + pad_x * 2, self.height + pad_top + self.SHADOW_PAD_BOTTOM),
+                                   pygame.SRCALPHA)
+            pygame.draw.rect(frame, (0, 0, 0, 60), frame.get_rect(), border_radius=18)
+            
+            window_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            pygame.draw.rect(window_surface, CARD_BG, window_surface.get_rect(), border_radius=15)
+            pygame.draw.rect(window_surface, (*ACCENT_PRIMARY, 100), 
+                           window_surface.get_rect(), 2, border_radius=15)
+            frame.blit(window_surface, (pad_x, pad_top))
+            
+            if self.title:
+                title_surface = FONT_LARGE.render(self.title, True, TEXT_PRIMARY)
+                title_rect = title_surface.get_rect(centerx=pad_x + self.width // 2, y=pad_top + 20)
+                frame.blit(title_surface, title_rect)
+            
+            self.frame = to_display(frame)
+        return self.frame
+    
     def draw_background(self, screen):
         """Затемнение фона"""
         if self.animation_progress > 0:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-            overlay_alpha = int(180 * self.animation_progress)
-            overlay.fill((*OVERLAY_BG, overlay_alpha))
-            screen.blit(overlay, (0, 0))
+            self.compositor.draw_overlay(screen, int(180 * self.animation_progress))
     
     def draw(self, screen):
         """Отрисовка окна"""
@@ -858,27 +730,9 @@ class ModalWindow:
             scaled_y = (SCREEN_HEIGHT - scaled_height) // 2
             scaled_rect = pygame.Rect(scaled_x, scaled_y, scaled_width, scaled_height)
             
-            shadow_surface = pygame.Surface((scaled_width + 20, scaled_height + 20), pygame.SRCALPHA)
-            shadow_alpha = int(60 * self.animation_progress)
-            pygame.draw.rect(shadow_surface, (0, 0, 0, shadow_alpha), 
-                           shadow_surface.get_rect(), border_radius=18)
-            screen.blit(shadow_surface, (scaled_x - 10, scaled_y - 5))
-            
-            window_surface = pygame.Surface((scaled_width, scaled_height), pygame.SRCALPHA)
+            frame_pos = (scaled_x - int(self.SHADOW_PAD_X * scale), scaled_y - int(self.SHADOW_PAD_TOP * scale))
             alpha = int(255 * self.animation_progress)
-            pygame.draw.rect(window_surface, (*CARD_BG, alpha), 
-                           window_surface.get_rect(), border_radius=15)
-            
-            pygame.draw.rect(window_surface, (*ACCENT_PRIMARY, int(100 * self.animation_progress)), 
-                           window_surface.get_rect(), 2, border_radius=15)
-            
-            screen.blit(window_surface, scaled_rect)
-            
-            if self.title:
-                title_surface = FONT_LARGE.render(self.title, True, TEXT_PRIMARY)
-                title_rect = title_surface.get_rect(centerx=scaled_rect.centerx, y=scaled_y + 20)
-                title_surface.set_alpha(alpha)
-                screen.blit(title_surface, title_rect)
+            self.compositor.draw_frame(screen, self.get_frame(), frame_pos, scale, alpha)
             
             return scaled_rect
         return None
@@ -886,7 +740,9 @@ class ModalWindow:
 
 class ItemDetailWindow:
     """Окно с подробной информацией о предмете"""
-    def __init__(self):
+    SHADOW_PAD = 5
+    
+    def __init__(self, compositor=None):
         self.is_open = False
         self.item = None
         self.x = 0
@@ -894,6 +750,9 @@ class ItemDetailWindow:
         self.width = 350
         self.height = 200
         self.animation_progress = 0.0
+        self.compositor = compositor if compositor else ModalCompositor()
+        self.frame = None
+        self.frame_item = None
     
     def open(self, item, x, y):
         """Открыть окно для предмета"""
@@ -916,88 +775,90 @@ class ItemDetailWindow:
         elif not self.is_open and self.animation_progress > 0:
             self.animation_progress = max(0.0, self.animation_progress - 0.15)
     
+    def get_frame(self):
+        """Кадр окна для текущего предмета, перерисовывается только при смене предмета"""
+        if self.frame is not None and self.frame_item is self.item:
+            return self.frame
+        
+        pad = self.SHADOW_PAD
+        frame = pygame.Surface((self.width + pad * 2, self.height + pad * 2), pygame.SRCALPHA)
+        pygame.draw.rect(frame, (0, 0, 0, 80), frame.get_rect(), border_radius=12)
+        
+        window_rect = pygame.Rect(pad, pad, self.width, self.height)
+        surf = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        pygame.draw.rect(surf, (28, 38, 58), surf.get_rect(), border_radius=10)
+        frame.blit(surf, window_rect)
+        
+        if self.item.item_type == "weapon":
+            stripe_color = DANGER_COLOR
+            type_text = tr("item.type.weapon")
+        elif self.item.item_type == "armor":
+            stripe_color = ACCENT_PRIMARY
+            type_text = tr("item.type.armor")
+        elif self.item.item_type == "potion_hp":
+            stripe_color = SUCCESS_COLOR
+            type_text = tr("item.type.potion_hp")
+        elif self.item.item_type == "potion_mana":
+            stripe_color = MANA_COLOR
+            type_text = tr("item.type.potion_mana")
+        else:
+            stripe_color = INFO_COLOR
+            type_text = tr("item.type.other")
+        
+        frame.fill(stripe_color, pygame.Rect(pad, pad, self.width, 4))
+        
+        pygame.draw.rect(frame, stripe_color, window_rect, 2, border_radius=10)
+        
+        type_surf = FONT_TINY.render(type_text, True, stripe_color)
+        frame.blit(type_surf, (pad + 15, pad + 15))
+        
+        name_surf = FONT_MEDIUM.render(self.item.name, True, TEXT_PRIMARY)
+        frame.blit(name_surf, (pad + 15, pad + 40))
+        
+        if self.item.description:
+            desc_surf = FONT_SMALL.render(self.item.description, True, TEXT_SECONDARY)
+            frame.blit(desc_surf, (pad + 15, pad + 75))
+        
+        y_offset = 110
+        if self.item.item_type == "weapon":
+            effect_text = tr("item.effect.weapon", value=self.item.value)
+            effect_surf = FONT_SMALL.render(effect_text, True, DANGER_COLOR)
+        elif self.item.item_type == "armor":
+            effect_text = tr("item.effect.armor", value=self.item.value)
+            effect_surf = FONT_SMALL.render(effect_text, True, ACCENT_PRIMARY)
+        elif self.item.item_type == "potion_hp":
+            effect_text = tr("item.effect.potion_hp", value=self.item.value)
+            effect_surf = FONT_SMALL.render(effect_text, True, SUCCESS_COLOR)
+        elif self.item.item_type == "potion_mana":
+            effect_text = tr("item.effect.potion_mana", value=self.item.value)
+            effect_surf = FONT_SMALL.render(effect_text, True, MANA_COLOR)
+        else:
+            effect_surf = None
+        
+        if effect_surf:
+            frame.blit(effect_surf, (pad + 15, pad + y_offset))
+        
+        y_offset += 35
+        if self.item.item_type in ["potion_hp", "potion_mana"]:
+            hint_text = tr("item.hint.potion")
+        elif self.item.item_type in ["weapon", "armor"]:
+            hint_text = tr("item.hint.equipment")
+        else:
+            hint_text = tr("item.hint.other")
+        
+        hint_surf = FONT_TINY.render(hint_text, True, TEXT_DISABLED)
+        frame.blit(hint_surf, (pad + 15, pad + y_offset))
+        
+        self.frame = to_display(frame)
+        self.frame_item = self.item
+        return self.frame
+    
     def draw(self, screen):
         """Отрисовка окна"""
         if self.animation_progress > 0 and self.item:
-            scale = self.animation_progress
             alpha = int(255 * self.animation_progress)
-            
-            shadow = pygame.Surface((self.width + 10, self.height + 10), pygame.SRCALPHA)
-            pygame.draw.rect(shadow, (0, 0, 0, int(80 * scale)), shadow.get_rect(), border_radius=12)
-            screen.blit(shadow, (self.x - 5, self.y - 5))
-            
-            window_rect = pygame.Rect(self.x, self.y, self.width, self.height)
-            
-            surf = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-            pygame.draw.rect(surf, (28, 38, 58, alpha), surf.get_rect(), border_radius=10)
-            screen.blit(surf, window_rect)
-            
-            if self.item.item_type == "weapon":
-                stripe_color = DANGER_COLOR
-                type_text = "ОРУЖИЕ"
-            elif self.item.item_type == "armor":
-                stripe_color = ACCENT_PRIMARY
-                type_text = "БРОНЯ"
-            elif self.item.item_type == "potion_hp":
-                stripe_color = SUCCESS_COLOR
-                type_text = "ЗЕЛЬЕ ЗДОРОВЬЯ"
-            elif self.item.item_type == "potion_mana":
-                stripe_color = MANA_COLOR
-                type_text = "ЗЕЛЬЕ МАНЫ"
-            else:
-                stripe_color = INFO_COLOR
-                type_text = "ПРЕДМЕТ"
-            
-            stripe_surf = pygame.Surface((self.width, 4), pygame.SRCALPHA)
-            stripe_surf.fill((*stripe_color, alpha))
-            screen.blit(stripe_surf, (self.x, self.y))
-            
-            pygame.draw.rect(screen, (*stripe_color, int(150 * scale)), window_rect, 2, border_radius=10)
-            
-            type_surf = FONT_TINY.render(type_text, True, stripe_color)
-            type_surf.set_alpha(alpha)
-            screen.blit(type_surf, (self.x + 15, self.y + 15))
-            
-            name_surf = FONT_MEDIUM.render(self.item.name, True, TEXT_PRIMARY)
-            name_surf.set_alpha(alpha)
-            screen.blit(name_surf, (self.x + 15, self.y + 40))
-            
-            if self.item.description:
-                desc_surf = FONT_SMALL.render(self.item.description, True, TEXT_SECONDARY)
-                desc_surf.set_alpha(alpha)
-                screen.blit(desc_surf, (self.x + 15, self.y + 75))
-            
-            y_offset = 110
-            if self.item.item_type == "weapon":
-                effect_text = f"Эффект: +{self.item.value} к атаке"
-                effect_surf = FONT_SMALL.render(effect_text, True, DANGER_COLOR)
-            elif self.item.item_type == "armor":
-                effect_text = f"Эффект: +{self.item.value} к максимальному HP"
-                effect_surf = FONT_SMALL.render(effect_text, True, ACCENT_PRIMARY)
-            elif self.item.item_type == "potion_hp":
-                effect_text = f"Эффект: восстанавливает {self.item.value} HP"
-                effect_surf = FONT_SMALL.render(effect_text, True, SUCCESS_COLOR)
-            elif self.item.item_type == "potion_mana":
-                effect_text = f"Эффект: восстанавливает {self.item.value} маны"
-                effect_surf = FONT_SMALL.render(effect_text, True, MANA_COLOR)
-            else:
-                effect_surf = None
-            
-            if effect_surf:
-                effect_surf.set_alpha(alpha)
-                screen.blit(effect_surf, (self.x + 15, self.y + y_offset))
-            
-            y_offset += 35
-            if self.item.item_type in ["potion_hp", "potion_mana"]:
-                hint_text = "Можно использовать в меню и бою"
-            elif self.item.item_type in ["weapon", "armor"]:
-                hint_text = "Можно экипировать в бою"
-            else:
-                hint_text = "Нажмите для использования"
-            
-            hint_surf = FONT_TINY.render(hint_text, True, TEXT_DISABLED)
-            hint_surf.set_alpha(alpha)
-            screen.blit(hint_surf, (self.x + 15, self.y + y_offset))
+            self.compositor.draw_frame(screen, self.get_frame(), 
+                                       (self.x - self.SHADOW_PAD, self.y - self.SHADOW_PAD), alpha=alpha)
 
 
 class EquipmentSlot:
@@ -1014,7 +875,7 @@ class EquipmentSlot:
     
     def draw(self, screen, equipped_item=None):
         """Отрисовка слота"""
-        mouse_pos = pygame.mouse.get_pos()
+        mouse_pos = get_mouse_pos()
         self.is_hovered = self.rect.collidepoint(mouse_pos)
         
         if self.is_hovered:
@@ -1027,31 +888,24 @@ class EquipmentSlot:
         border_color = ACCENT_PRIMARY if self.is_hovered else (60, 70, 90)
         pygame.draw.rect(screen, border_color, self.rect, 2, border_radius=8)
         
-        slot_labels = {
-            "head": "ГОЛОВА",
-            "chest": "ТОРС",
-            "legs": "НОГИ",
-            "weapon": "ОРУЖИЕ"
-        }
-        
         if equipped_item:
             item_color = equipped_item.get_rarity_color()
             
             short_name = equipped_item.name[:8] if len(equipped_item.name) > 8 else equipped_item.name
-            item_text = FONT_TINY.render(short_name, True, item_color)
+            item_text = TEXT_CACHE.render(FONT_TINY, short_name, item_color)
             text_rect = item_text.get_rect(center=(self.rect.centerx, self.rect.centery + 10))
             screen.blit(item_text, text_rect)
             
-            bonus_text = FONT_TINY.render(f"+{equipped_item.value}", True, TEXT_PRIMARY)
+            bonus_text = TEXT_CACHE.render(FONT_TINY, f"+{equipped_item.value}", TEXT_PRIMARY)
             bonus_rect = bonus_text.get_rect(center=(self.rect.centerx, self.rect.centery - 10))
             screen.blit(bonus_text, bonus_rect)
         else:
-            label = slot_labels.get(self.slot_type, "СЛОТ")
-            label_surf = FONT_TINY.render(label, True, TEXT_DISABLED)
+            label = tr("slot.empty." + self.slot_type)
+            label_surf = TEXT_CACHE.render(FONT_TINY, label, TEXT_DISABLED)
             label_rect = label_surf.get_rect(center=self.rect.center)
             screen.blit(label_surf, label_rect)
         
-        name_surf = FONT_TINY.render(self.slot_name, True, TEXT_SECONDARY)
+        name_surf = TEXT_CACHE.render(FONT_TINY, self.slot_name, TEXT_SECONDARY)
         name_rect = name_surf.get_rect(center=(self.rect.centerx, self.rect.bottom + 12))
         screen.blit(name_surf, name_rect)
     
@@ -1066,34 +920,253 @@ class EquipmentSlot:
         return False
 
 
-class Game:
+class VirtualList:
+    """Прокручиваемый список, который создаёт, обновляет и рисует только строки в области просмотра"""
+    def __init__(self, x, y, width, height, describe, row_height=50, row_gap=10,
+                 category=None, sort_keys=None):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.describe = describe
+        self.row_height = row_height
+        self.row_step = row_height + row_gap
+        self.category_of = category
+        self.sort_key_funcs = sort_keys or {}
+        
+        self.items = []
+        self.key_cache = {}
+        self.view = []
+        self.category = "all"
+        self.sort_by = None
+        self.descending = False
+        
+        self.scroll = 0.0
+        self.target_scroll = 0.0
+        self.rows = {}
+    
+    def set_items(self, items, keep_scroll=False):
+        """Заменить содержимое списка; ключи сортировки пересчитываются лениво"""
+        self.items = list(items)
+        self.key_cache = {}
+        self.rebuild_view(keep_scroll)
+    
+    def remove(self, item):
+        if item in self.items:
+            self.set_items([other for other in self.items if other != item], keep_scroll=True)
+    
+    def set_category(self, category):
+        self.category = category
+        self.rebuild_view()
+    
+    def set_sort(self, sort_by, descending=False):
+        self.sort_by = sort_by
+        self.descending = descending
+        self.rebuild_view()
+    
+    def get_sort_keys(self, sort_by):
+        """Ключи сортировки вычисляются один раз на набор элементов"""
+        keys = self.key_cache.get(sort_by)
+        if keys is None:
+            key_func = self.sort_key_funcs[sort_by]
+            keys = [key_func(item) for item in self.items]
+            self.key_cache[sort_by] = keys
+        return keys
+    
+    def rebuild_view(self, keep_scroll=False):
+        order = range(len(self.items))
+        if self.sort_by:
+            keys = self.get_sort_keys(self.sort_by)
+            order = sorted(order, key=keys.__getitem__, reverse=self.descending)
+        if self.category != "all" and self.category_of:
+            order = [i for i in order if self.category_of(self.items[i]) == self.category]
+        self.view = [self.items[i] for i in order]
+        
+        self.rows = {}
+        if keep_scroll:
+            self.target_scroll = min(self.target_scroll, self.max_scroll())
+            self.scroll = min(self.scroll, self.max_scroll())
+        else:
+            self.scroll = self.target_scroll = 0.0
+    
+    def max_scroll(self):
+        content_height = len(self.view) * self.row_step - (self.row_step - self.row_height)
+        return max(0, content_height - self.rect.height)
+    
+    def scroll_by(self, rows):
+        self.target_scroll = max(0, min(self.max_scroll(), self.target_scroll + rows * self.row_step))
+    
+    def visible_range(self):
+        first = int(self.scroll // self.row_step)
+        last = int((self.scroll + self.rect.height) // self.row_step) + 1
+        return first, min(last, len(self.view))
+    
+    def update(self, dt=0.016):
+        self.scroll += (self.target_scroll - self.scroll) * min(1.0, dt * 12)
+        if abs(self.target_scroll - self.scroll) < 0.5:
+            self.scroll = self.target_scroll
+        
+        first, last = self.visible_range()
+        for index in list(self.rows):
+            if index < first or index >= last:
+                del self.rows[index]
+        
+        for index in range(first, last):
+            row_y = self.rect.y + int(index * self.row_step - self.scroll)
+            button = self.rows.get(index)
+            if button is None:
+                text, color = self.describe(self.view[index])
+                button = Button(self.rect.x, row_y, self.rect.width, self.row_height, text, color,
+                                tuple(min(255, c + 30) for c in color))
+                self.rows[index] = button
+            button.base_rect.y = row_y
+            button.update(dt)
+    
+    def draw(self, screen):
+        previous_clip = screen.get_clip()
+        screen.set_clip(self.rect.inflate(16, 16).clip(previous_clip))
+        for button in self.rows.values():
+            button.draw(screen)
+        screen.set_clip(previous_clip)
+    
+    def item_at(self, pos):
+        if not self.rect.collidepoint(pos):
+            return None
+        for index, button in self.rows.items():
+            if button.rect.collidepoint(pos):
+                return self.view[index]
+        return None
+    
+    def handle_event(self, event):
+        """Прокрутка колесом; возвращает элемент, по которому кликнули"""
+        if event.type == pygame.MOUSEWHEEL:
+            if self.rect.collidepoint(get_mouse_pos()):
+                self.scroll_by(-event.y)
+            return None
+        
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and not self.rect.collidepoint(event.pos):
+            return None
+        
+        for index, button in self.rows.items():
+            if button.handle_event(event):
+                return self.view[index]
+        return None
+
+
+class StartupPreloader:
+    """Прогрев кэшей небольшими порциями между кадрами, чтобы не задерживать первый кадр"""
+    def __init__(self, frame_budget=0.004):
+        self.frame_budget = frame_budget
+        self.tasks = deque()
+        self.completed = 0
+    
+    def add(self, task, *args):
+        self.tasks.append((task, args))
+    
+    @property
+    def finished(self):
+        return not self.tasks
+    
+    def step(self):
+        """Выполнить задачи в пределах бюджета кадра, вернуть True, когда всё прогрето"""
+        deadline = time.perf_counter() + self.frame_budget
+        while self.tasks and time.perf_counter() < deadline:
+            task, args = self.tasks.popleft()
+            task(*args)
+            self.completed += 1
+        return self.finished
+
+
+class Game(GameSession):
     """Основной класс игры"""
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Убей злюк")
+    # Размеры карточек, которые рисуют экраны игры
+    CARD_SIZES = [
+        (360, 520), (480, 90), (280, 180), (700, 60), (500, 60), (600, 400), (420, 180),
+        (600, 65), (600, 100), (600, 135), (600, 170), (600, 180),
+    ]
+    # Полосы прогресса: размер и цвет
+    PROGRESS_BARS = [
+        (270, 20, DANGER_COLOR), (270, 20, MANA_COLOR), (270, 20, WARNING_COLOR),
+        (240, 18, DANGER_COLOR), (240, 18, MANA_COLOR),
+    ]
+    
+    BATTLE_LOG_HISTORY = 500
+    AUTO_BATTLE_BATCH = 5
+    AUTO_BATTLE_TURN_LIMIT = 200
+    # Частицы эффектов оружия: количество, цвет, вид
+    WEAPON_PARTICLES = {
+        "poison": (10, (34, 197, 94), "circle"),
+        "fire": (15, (239, 68, 68), "star"),
+        "freeze": (12, (59, 130, 246), "star"),
+        "lightning": (20, (234, 179, 8), "star"),
+    }
+    
+    ACTIVE_FPS = 60
+    # Как часто пересобирается фон с плывущими пятнами, мс
+    BACKGROUND_STEP_MS = 100
+    # Сколько кадров без анимаций и ввода нужно, чтобы перейти в режим простоя
+    IDLE_AFTER_FRAMES = 30
+    # На этих экранах анимация идёт всегда: пульсирующий заголовок и частицы меню
+    ALWAYS_ANIMATED = ("menu",)
+    # Среднее число новых поверхностей за кадр на экране в режиме --alloc-report; прогрев кэшей и первые
+    # кадры посещения экрана в среднее не входят
+    ALLOCATION_BUDGETS = {
+        "menu": 1, "game": 1, "locations": 1, "battle": 1, "victory": 1, "defeat": 1,
+        "shop": 1, "stats": 1, "equipment": 1, "stash": 1,
+    }
+    
+    def __init__(self, show_metrics=False, full_battle_log=False, scale=1.0, scaled=False, vsync=False,
+                 idle_fps=10, sound=True, music=None, language=DEFAULT_LANGUAGE, telemetry=None,
+                 alloc_report=False, stash=None, runs=None):
+        self.startup_time = time.perf_counter()
+        self.show_metrics = show_metrics
+        self.allocations = None
+        if alloc_report:
+            # Счётчики ставятся до создания шрифтов и окна, чтобы учесть и их
+            self.allocations = AllocationTracker(self.ALLOCATION_BUDGETS)
+            self.allocations.install()
+        self.startup_metrics = {}
+        self.idle_fps = idle_fps
+        self.idle_frames = 0
+        
+        set_language(language)
+        init_pygame()
+        self.screen = PRESENTER.open(scale, scaled, vsync)
+        pygame.display.set_caption(tr("game.title"))
+        AUDIO.open(sound)
+        if music:
+            AUDIO.play_music(music)
+        if telemetry:
+            TELEMETRY.open(telemetry)
         self.clock = pygame.time.Clock()
         self.running = True
         
-        self.state = "menu"
-        self.player = None
-        self.enemy = None
-        self.message = ""
-        self.message_timer = 0
-        self.battle_log = []
+        super().__init__(BattleLog(4, self.render_log_line,
+                                   self.BATTLE_LOG_HISTORY if full_battle_log else 0),
+                         Stash(StashDatabase(stash), LOCAL_OWNER) if stash else None,
+                         RunHistory(runs) if runs else None)
+        self.enemy_card_rects = []
+        self.battle_log_scroll = 0
         
         self.stars = [Star() for _ in range(120)]
         self.particles = []
-        
-        self.inventory_modal = ModalWindow(500, 450, "Инвентарь")
-        self.skills_modal = ModalWindow(500, 500, "Навыки")
-        self.item_detail_window = ItemDetailWindow()
-        self.equipment_modal = ModalWindow(700, 500, "Экипировка")
+        self.background = None
+        self.background_gradient = None
+        self.background_step = None
+
+        self.progress_bars = ProgressBarRenderer(TEXT_CACHE)
+        self.cards = CardRenderer()
+        self.layers = ScreenLayers()
+        self.sparklines = SparklineRenderer()
+
+        self.compositor = ModalCompositor()
+        self.inventory_modal = ModalWindow(500, 450, tr("modal.inventory"), self.compositor)
+        self.skills_modal = ModalWindow(500, 500, tr("modal.skills"), self.compositor)
+        self.item_detail_window = ItemDetailWindow(self.compositor)
+        self.equipment_modal = ModalWindow(700, 500, tr("modal.equipment"), self.compositor)
         
         self.equipment_slots = {
-            "head": EquipmentSlot(250, 150, "head", "Голова"),
-            "chest": EquipmentSlot(250, 230, "chest", "Торс"),
-            "legs": EquipmentSlot(250, 310, "legs", "Ноги"),
-            "weapon": EquipmentSlot(250, 390, "weapon", "Оружие")
+            "head": EquipmentSlot(250, 150, "head", tr("slot.head")),
+            "chest": EquipmentSlot(250, 230, "chest", tr("slot.chest")),
+            "legs": EquipmentSlot(250, 310, "legs", tr("slot.legs")),
+            "weapon": EquipmentSlot(250, 390, "weapon", tr("slot.weapon"))
         }
         
         self.dragging_item = None
@@ -1104,74 +1177,177 @@ class Game:
         self.selected_sell_item = None
         
         self.menu_buttons = [
-            Button(325, 300, 250, 50, "Новая игра", SUCCESS_COLOR, SUCCESS_HOVER),
-            Button(325, 370, 250, 50, "Выход", DANGER_COLOR, DANGER_HOVER)
+            Button(325, 300, 250, 50, tr("menu.new_game"), SUCCESS_COLOR, SUCCESS_HOVER),
+            Button(325, 370, 250, 50, tr("menu.quit"), DANGER_COLOR, DANGER_HOVER)
         ]
+        self.runs_metric = "level"
+        self.runs_metric_button = Button(575, 447, 120, 28, tr("runs.metric.level"), (60, 70, 90), (80, 90, 110))
         
         self.game_buttons = [
-            Button(140, 560, 130, 45, "Локации", ACCENT_PRIMARY, tuple(min(255, c + 30) for c in ACCENT_PRIMARY)),
-            Button(290, 560, 130, 45, "Магазин", WARNING_COLOR, WARNING_HOVER),
-            Button(440, 560, 140, 45, "Экипировка", PURPLE_COLOR, PURPLE_HOVER),
-            Button(600, 560, 130, 45, "Статистика", INFO_COLOR, tuple(min(255, c + 30) for c in INFO_COLOR))
+            Button(85, 560, 130, 45, tr("game.locations"), ACCENT_PRIMARY, tuple(min(255, c + 30) for c in ACCENT_PRIMARY)),
+            Button(230, 560, 130, 45, tr("game.shop"), WARNING_COLOR, WARNING_HOVER),
+            Button(375, 560, 140, 45, tr("game.equipment"), PURPLE_COLOR, PURPLE_HOVER),
+            Button(530, 560, 130, 45, tr("game.stash"), SUCCESS_COLOR, SUCCESS_HOVER),
+            Button(675, 560, 130, 45, tr("game.stats"), INFO_COLOR, tuple(min(255, c + 30) for c in INFO_COLOR))
         ]
         
         self.battle_main_buttons = [
-            Button(130, 560, 140, 45, "Атаковать", DANGER_COLOR, DANGER_HOVER),
-            Button(290, 560, 140, 45, "Навыки", PURPLE_COLOR, PURPLE_HOVER),
-            Button(450, 560, 140, 45, "Предметы", SUCCESS_COLOR, SUCCESS_HOVER),
-            Button(610, 560, 120, 45, "Бежать", (70, 80, 100))
+            Button(130, 560, 140, 45, tr("battle.attack"), DANGER_COLOR, DANGER_HOVER),
+            Button(290, 560, 140, 45, tr("battle.skills"), PURPLE_COLOR, PURPLE_HOVER),
+            Button(450, 560, 140, 45, tr("battle.items"), SUCCESS_COLOR, SUCCESS_HOVER),
+            Button(610, 560, 120, 45, tr("battle.flee"), (70, 80, 100))
         ]
         
         self.skill_buttons = []
         self.inventory_buttons = []
-        
-        self.shop_buttons = [
-            Button(250, 260, 400, 45, "Зелье здоровья (30 золота)", SUCCESS_COLOR, SUCCESS_HOVER),
-            Button(250, 320, 400, 45, "Зелье маны (25 золота)", MANA_COLOR, INFO_COLOR),
-            Button(250, 380, 400, 45, "Улучшить атаку (60 золота)", DANGER_COLOR, DANGER_HOVER),
-            Button(250, 520, 400, 45, "Назад", (60, 70, 90))
+        self.inventory_handles = []
+        self.inventory_list = VirtualList(220, 160, 360, 300, self.describe_inventory_entry)
+        
+        self.shop_list = VirtualList(
+            200, 250, 500, 270, self.describe_shop_item,
+            category=lambda shop_item: shop_item.get_category(),
+            sort_keys={
+                "rarity": lambda shop_item: -RARITY_ORDER.get(shop_item.get_rarity(), 0),
+                "price": lambda shop_item: shop_item.get_current_price(self.player),
+            }
+        )
+        self.shop_category_buttons = [
+            Button(200 + i * 110, 200, 100, 36, name, (60, 70, 90), (80, 90, 110))
+            for i, name in enumerate([tr("shop.all"), tr("shop.potions"), tr("shop.upgrades"), tr("shop.equipment")])
         ]
+        self.shop_sort_button = Button(640, 200, 60, 36, tr("shop.sort"), (60, 70, 90), (80, 90, 110))
+        self.shop_back_button = Button(300, 530, 300, 45, tr("common.back"), (60, 70, 90), (80, 90, 110))
         
-        self.equipment_back_button = Button(250, 475, 120, 45, "Назад", (60, 70, 90), (80, 90, 110))
-        self.equipment_sell_button = Button(390, 475, 200, 45, "Продать предмет", DANGER_COLOR, DANGER_HOVER)
+        self.equipment_back_button = Button(250, 475, 120, 45, tr("common.back"), (60, 70, 90), (80, 90, 110))
+        self.equipment_sell_button = Button(390, 475, 200, 45, tr("equipment.sell"), DANGER_COLOR, DANGER_HOVER)
         
-        self.stats_back_button = Button(250, 580, 400, 50, "Назад в меню", (70, 80, 100), (90, 100, 120))
+        self.stats_back_button = Button(250, 580, 400, 50, tr("common.back_to_menu"), (70, 80, 100), (90, 100, 120))
         
-        self.locations = [
-            {"name": "Тёмный лес", "level_req": 1, "enemy_level_min": 1, "enemy_level_max": 2, "color": SUCCESS_COLOR},
-            {"name": "Заброшенная крепость", "level_req": 3, "enemy_level_min": 3, "enemy_level_max": 4, "color": INFO_COLOR},
-            {"name": "Пещера гоблинов", "level_req": 5, "enemy_level_min": 5, "enemy_level_max": 6, "color": WARNING_COLOR},
-            {"name": "Логово орков", "level_req": 7, "enemy_level_min": 7, "enemy_level_max": 9, "color": DANGER_COLOR},
-            {"name": "Драконье гнездо", "level_req": 10, "enemy_level_min": 10, "enemy_level_max": 13, "color": PURPLE_COLOR},
+        # На экране склада только текущая страница: размер базы не влияет ни на кадр, ни на память
+        self.stash_inventory_list = VirtualList(30, 185, 270, 316, self.describe_inventory_entry, row_height=40, row_gap=6)
+        self.stash_list = VirtualList(330, 185, 540, 316, self.describe_stash_entry, row_height=34, row_gap=6)
+        self.stash_category_buttons = [
+            Button(30 + i * 120, 105, 110, 36, tr(key), (60, 70, 90), (80, 90, 110))
+            for i, key in enumerate(["shop.all", "shop.potions", "slot.weapon", "slot.head", "slot.chest", "slot.legs"])
         ]
+        self.stash_sort_button = Button(750, 105, 120, 36, tr("stash.sort.value"), (60, 70, 90), (80, 90, 110))
+        self.stash_prev_button = Button(330, 512, 60, 36, "<", (60, 70, 90), (80, 90, 110))
+        self.stash_next_button = Button(810, 512, 60, 36, ">", (60, 70, 90), (80, 90, 110))
+        self.stash_deposit_button = Button(30, 565, 270, 45, tr("stash.deposit_all"), PURPLE_COLOR, PURPLE_HOVER)
+        self.stash_withdraw_button = Button(330, 565, 260, 45, tr("stash.withdraw_page"), SUCCESS_COLOR, SUCCESS_HOVER)
+        self.stash_back_button = Button(610, 565, 260, 45, tr("common.back"), (60, 70, 90), (80, 90, 110))
+        self.stash_category = "all"
+        self.stash_order = "value"
+        self.stash_page = 0
+        self.stash_pages = 1
+        self.stash_total = 0
         
         self.location_buttons = []
         self.boss_buttons = []
-        self.current_location = None
+        self.auto_buttons = []
         
-        self.shop_items = []
-        self.shop_scroll_offset = 0
         self.shop_category = "all"  # "all", "potions", "upgrades", "equipment"
-        self.refresh_shop_items()
-    
-    def refresh_shop_items(self):
-        """Обновить ассортимент магазина"""
-        self.shop_items = [
-            ShopItem("Зелье здоровья", "potion_hp", 30, "Восстанавливает 50 HP", "unlimited", {"value": 50}),
-            ShopItem("Зелье маны", "potion_mana", 25, "Восстанавливает 40 маны", "unlimited", {"value": 40}),
-            
-            ShopItem("Мульти зелье", "potion_multi", 50, "Восстанавливает 40 HP и 30 маны", "unlimited", {"hp": 40, "mana": 30}),
-            
-            ShopItem("Улучшить атаку", "upgrade_attack", 60, "+5 к атаке (навсегда)", "unlimited", {"value": 5}),
-            ShopItem("Улучшить защиту", "upgrade_defense", 60, "+3 к защите (навсегда)", "unlimited", {"value": 3}),
+        self.shop_sort = None  # None, "rarity", "price"
+        
+        self.preloader = StartupPreloader()
+        self.schedule_preload()
+    
+    def schedule_preload(self):
+        """Поставить в очередь прогрев кэшей для всех экранов"""
+        preload = self.preloader
+        
+        for button in (self.menu_buttons + [self.runs_metric_button] + self.game_buttons + self.battle_main_buttons + self.shop_category_buttons
+                       + [self.shop_sort_button, self.shop_back_button, self.equipment_back_button, self.equipment_sell_button, self.stats_back_button]
+                       + self.stash_category_buttons + [self.stash_sort_button, self.stash_prev_button, self.stash_next_button,
+                                                        self.stash_deposit_button, self.stash_withdraw_button, self.stash_back_button]):
+            preload.add(button.warm)
+        
+        # Кнопки, которые создаются при открытии экранов
+        for width, height in [(320, 50), (110, 50), (100, 50), (400, 50), (360, 50), (360, 55), (130, 50), (500, 50), (300, 50)]:
+            preload.add(Button(0, 0, width, height, "").get_skin)
+        for location in self.locations:
+            preload.add(Button(0, 0, 320, 50, tr("locations.open", name=location["name"], level=location["level_req"])).warm)
+            preload.add(Button(0, 0, 320, 50, tr("locations.locked", name=location["name"], level=location["level_req"])).warm)
+        preload.add(Button(0, 0, 110, 50, tr("locations.boss")).warm)
+        preload.add(Button(0, 0, 100, 50, tr("locations.auto", count=self.AUTO_BATTLE_BATCH)).warm)
+        
+        for modal in (self.inventory_modal, self.skills_modal, self.equipment_modal):
+            preload.add(modal.get_frame)
+        
+        for name in SOUND_SPECS:
+            preload.add(AUDIO.load, name)
+        
+        for width, height in self.CARD_SIZES:
+            preload.add(self.cards.get_card, width, height)
+        
+        for width, height, color in self.PROGRESS_BARS:
+            preload.add(self.progress_bars.get_layers, width, height, color)
+            preload.add(self.progress_bars.get_glow, height, color)
+        
+        static_texts = [
+            (FONT_TITLE, tr("shop.title"), WARNING_COLOR), (FONT_TITLE, tr("shop.title"), (0, 0, 0)),
+            (FONT_TITLE, tr("locations.title"), ACCENT_PRIMARY), (FONT_TITLE, tr("locations.title"), (0, 0, 0)),
+            (FONT_TITLE, tr("stats.title"), INFO_COLOR), (FONT_TITLE, tr("stats.title"), (0, 0, 0)),
+            (FONT_SMALL, "HP", DANGER_COLOR), (FONT_SMALL, "MP", MANA_COLOR), (FONT_SMALL, "XP", WARNING_COLOR),
+            (FONT_MEDIUM, tr("battle.hero"), SUCCESS_COLOR), (FONT_SMALL, tr("battle.log_title"), TEXT_SECONDARY),
+            (FONT_MEDIUM, tr("modal.inventory"), TEXT_PRIMARY),
+            (FONT_TINY, tr("battle.skills_hint"), TEXT_SECONDARY),
+            (FONT_TINY, tr("battle.potions_hint"), TEXT_SECONDARY),
+            (FONT_TINY, tr("battle.equipment_hint"), TEXT_SECONDARY),
+            (FONT_SMALL, tr("battle.inventory_empty"), TEXT_SECONDARY),
+            (FONT_TINY, tr("equipment.hint"), TEXT_SECONDARY),
+            (FONT_TINY, tr("equipment.sell_hint"), DANGER_COLOR),
+            (FONT_LARGE, tr("victory.title"), SUCCESS_COLOR), (FONT_TINY, tr("victory.continue"), TEXT_SECONDARY),
+            (FONT_LARGE, tr("defeat.title"), DANGER_COLOR), (FONT_SMALL, tr("defeat.continue"), TEXT_SECONDARY),
         ]
-    
-    def new_game(self):
-        self.player = Player("Герой")
-        self.state = "game"
-        self.message = "Добро пожаловать в игру!"
-        self.message_timer = 90
-        self.battle_log = []
+        for label in [tr(key) for key in ("stats.enemies_killed", "stats.bosses_killed", "stats.gold_earned",
+                                          "stats.critical_hits", "stats.damage_dealt", "stats.damage_taken",
+                                          "stats.items_collected", "stats.potions_used")]:
+            static_texts.append((FONT_SMALL, label, TEXT_SECONDARY))
+        for slot in self.equipment_slots.values():
+            static_texts.append((FONT_TINY, slot.slot_name, TEXT_SECONDARY))
+        
+        for font, text, color in static_texts:
+            preload.add(TEXT_CACHE.render, font, text, color)
+    
+    def update_startup_metrics(self):
+        """Замер времени до первого кадра и до полного прогрева кэшей"""
+        elapsed = time.perf_counter() - self.startup_time
+        metrics = self.startup_metrics
+        if "time_to_first_frame" not in metrics:
+            metrics["time_to_first_frame"] = elapsed
+            return
+        
+        if "time_to_interactive" not in metrics and self.preloader.step():
+            metrics["time_to_interactive"] = elapsed
+            metrics["preloaded_assets"] = self.preloader.completed
+            if self.show_metrics:
+                print(f"Первый кадр: {metrics['time_to_first_frame'] * 1000:.1f} мс, "
+                      f"готовность: {metrics['time_to_interactive'] * 1000:.1f} мс, "
+                      f"прогрето ресурсов: {metrics['preloaded_assets']}")
+    
+    def animations_active(self):
+        """Есть ли на экране анимация, которой нужна полная частота кадров"""
+        if self.state in self.ALWAYS_ANIMATED or self.particles or self.message_timer > 0 or Button.animating:
+            return True
+        if "time_to_interactive" not in self.startup_metrics:
+            return True
+        windows = (self.inventory_modal, self.skills_modal, self.equipment_modal, self.item_detail_window)
+        return any(0.0 < window.animation_progress < 1.0 for window in windows)
+    
+    @property
+    def idle(self):
+        return self.idle_fps > 0 and self.idle_frames >= self.IDLE_AFTER_FRAMES
+    
+    def next_events(self):
+        """События и dt кадра; в простое поток спит в event.wait до ввода или до кадра нижней частоты"""
+        if not self.idle:
+            dt = self.clock.tick(self.ACTIVE_FPS) / 1000.0
+            return pygame.event.get(), dt
+        
+        event = pygame.event.wait(int(1000 / self.idle_fps))
+        events = [] if event.type == pygame.NOEVENT else [event] + pygame.event.get()
+        return events, self.clock.tick() / 1000.0
     
     def open_locations(self):
         """Открыть экран выбора локаций"""
@@ -1179,6 +1355,7 @@ class Game:
         
         self.location_buttons = []
         self.boss_buttons = []
+        self.auto_buttons = []
         y_offset = 200
         
         for i, location in enumerate(self.locations):
@@ -1192,59 +1369,90 @@ class Game:
                 hover_color = (60, 65, 80)
             
             if is_available:
-                btn_text = f"{location['name']} (Уровень {location['level_req']}+)"
+                btn_text = tr("locations.open", name=location["name"], level=location["level_req"])
             else:
-                btn_text = f"{location['name']} [ЗАКРЫТО - нужен {location['level_req']} ур.]"
+                btn_text = tr("locations.locked", name=location["name"], level=location["level_req"])
             
             button = Button(170, y_offset, 320, 50, btn_text, btn_color, hover_color)
             self.location_buttons.append(button)
             
-            boss_btn_text = "БОСС"
+            boss_btn_text = tr("locations.boss")
             boss_color = DANGER_COLOR if is_available else (50, 55, 70)
             boss_hover = DANGER_HOVER if is_available else (60, 65, 80)
             boss_button = Button(510, y_offset, 110, 50, boss_btn_text, boss_color, boss_hover)
             self.boss_buttons.append(boss_button)
             
+            auto_color = PURPLE_COLOR if is_available else (50, 55, 70)
+            auto_hover = PURPLE_HOVER if is_available else (60, 65, 80)
+            auto_button = Button(640, y_offset, 100, 50, tr("locations.auto", count=self.AUTO_BATTLE_BATCH), auto_color, auto_hover)
+            self.auto_buttons.append(auto_button)
+            
             y_offset += 65
     
-    def start_battle_in_location(self, location_index, is_boss=False):
-        """Начать битву в выбранной локации"""
-        location = self.locations[location_index]
-        
-        if self.player.level < location["level_req"]:
-            self.message = f"Нужен {location['level_req']} уровень!"
-            self.message_timer = 90
+    def auto_battle(self, location_index, count=None):
+        """Автобой: несколько боёв подряд без отрисовки и частиц, на экран выводится только итог"""
+        count = count or self.AUTO_BATTLE_BATCH
+        player = self.player
+        gold_before = player.gold
+        items_before = player.stats["items_collected"]
+        level_before = player.level
+        
+        fought = won = exp_gained = 0
+        out_of_potions = False
+        renderer = self.battle_log.renderer
+        self.battle_log.renderer = None
+        self.turbo = True
+        try:
+            for _ in range(count):
+                if fought and self.auto_policy.needs_potion(player) and self.auto_policy.potion_handle(player) is None:
+                    out_of_potions = True
+                    break
+                
+                self.start_battle_in_location(location_index)
+                if self.state != "battle":
+                    break
+                self.auto_policy.reset()
+                fought += 1
+                
+                turns = 0
+                while self.state == "battle" and turns < self.AUTO_BATTLE_TURN_LIMIT:
+                    self.auto_battle_turn()
+                    turns += 1
+                
+                if self.state != "victory":
+                    break
+                won += 1
+                exp_gained += sum(enemy.exp_reward for enemy in self.enemies)
+        finally:
+            self.turbo = False
+            self.battle_log.renderer = renderer
+            self.battle_log.rerender()
+        
+        if self.state != "victory":
+            # Поражение или затянувшийся бой остаются на своём экране
             return
         
-        self.current_location = location
-        
-        if is_boss:
-            self.enemy = Boss(location["enemy_level_max"], location["name"])
-            self.battle_log = [f"БИТВА С БОССОМ: {self.enemy.name}!"]
-        else:
-            enemy_level = random.randint(location["enemy_level_min"], location["enemy_level_max"])
-            self.enemy = Enemy(enemy_level)
-            self.battle_log = [f"Встреча с врагом в локации '{location['name']}'!"]
-        
-        self.state = "battle"
-        self.message = f"Бой начался!"
-        self.message_timer = 90
-        
-        self.skill_buttons = []
-        for i, skill in enumerate(self.player.skills):
-            can_use = self.player.mana >= skill.mana_cost
-            color = PURPLE_COLOR if can_use else (50, 55, 70)
-            hover = PURPLE_HOVER if can_use else (60, 65, 80)
-            self.skill_buttons.append(
-                Button(220, 150 + i * 60, 360, 50, 
-                      f"{skill.name} (Мана: {skill.mana_cost})", color, hover)
-            )
+        summary = [
+            tr("auto.wins", won=won, fought=fought),
+            tr("auto.rewards", exp=exp_gained, gold=player.gold - gold_before),
+            tr("auto.items", count=player.stats["items_collected"] - items_before),
+        ]
+        if player.level > level_before:
+            summary.append(tr("auto.level_up", level=player.level))
+        if out_of_potions:
+            summary.append(tr("auto.out_of_potions"))
+        self.message = "\n".join(summary)
+        self.message_timer = 180
     
     def start_battle(self):
-        self.enemy = Enemy(self.player.level)
+        self.enemies = [Enemy(self.player.level)]
+        self.target_index = 0
+        self.battle_turns = 0
+        self.damage_taken_before = self.player.stats["total_damage_taken"]
         self.state = "battle"
-        self.battle_log = [f"Встреча с врагом: {self.enemy.name}!"]
-        self.message = f"Бой начался!"
+        self.battle_log.start(tr("log.encounter_named", name=self.enemy.name))
+        self.battle_log_scroll = 0
+        self.message = tr("msg.battle_started")
         self.message_timer = 90
         
         self.skill_buttons = []
@@ -1254,36 +1462,39 @@ class Game:
             hover = PURPLE_HOVER if can_use else (60, 65, 80)
             self.skill_buttons.append(
                 Button(220, 150 + i * 60, 360, 50, 
-                      f"{skill.name} (Мана: {skill.mana_cost})", color, hover)
+                      tr("battle.skill_button", name=skill.name, mana=skill.mana_cost), color, hover)
             )
     
+    def describe_inventory_entry(self, handle):
+        """Текст и цвет строки инвентаря в бою"""
+        return self.describe_item(self.player.inventory.get(handle))
+    
+    def describe_stash_entry(self, entry):
+        """Текст и цвет строки склада: entry - (id в базе, предмет)"""
+        return self.describe_item(entry[1])
+    
+    def describe_item(self, item):
+        color = item.get_rarity_color()
+        
+        if item.item_type == "weapon":
+            item_text = tr("inventory.weapon", name=item.name, value=item.value)
+        elif item.item_type == "armor":
+            slot_text = tr("inventory.slot_short." + item.armor_slot) if item.armor_slot else ""
+            item_text = tr("inventory.armor", slot=slot_text, name=item.name, value=item.value)
+        elif item.item_type == "potion_hp":
+            item_text = f"{item.name} (+{item.value} HP)"
+            color = SUCCESS_COLOR
+        elif item.item_type == "potion_mana":
+            item_text = f"{item.name} (+{item.value} MP)"
+            color = MANA_COLOR
+        else:
+            item_text = item.name
+        return item_text, color
+    
     def open_inventory_modal(self):
         """Открыть модальное окно инвентаря"""
         self.inventory_modal.open()
-        
-        self.inventory_buttons = []
-        for i, item in enumerate(self.player.inventory):
-            color = item.get_rarity_color()
-            
-            if item.item_type == "weapon":
-                item_text = f"{item.name} (+{item.value} АТК)"
-            elif item.item_type == "armor":
-                slot_names = {"head": "Ш", "chest": "Т", "legs": "Н"}
-                slot_text = f"[{slot_names.get(item.armor_slot, '?')}]" if item.armor_slot else ""
-                item_text = f"{slot_text} {item.name} (+{item.value} HP)"
-            elif item.item_type == "potion_hp":
-                item_text = f"{item.name} (+{item.value} HP)"
-                color = SUCCESS_COLOR
-            elif item.item_type == "potion_mana":
-                item_text = f"{item.name} (+{item.value} MP)"
-                color = MANA_COLOR
-            else:
-                item_text = item.name
-            
-            self.inventory_buttons.append(
-                Button(220, 120 + i * 60, 360, 50, item_text, color, 
-                      tuple(min(255, c + 30) for c in color))
-            )
+        self.inventory_list.set_items(self.player.inventory.handles())
     
     def open_equipment(self):
         """Открыть окно экипировки"""
@@ -1295,13 +1506,11 @@ class Game:
     def update_equipment_inventory_buttons(self):
         """Обновить кнопки инвентаря в окне экипировки (только оружие и броня)"""
         self.inventory_buttons = []
+        self.inventory_handles = []
         start_x = 380
         start_y = 150
         
-        equipment_items = [item for item in self.player.inventory 
-                          if item.item_type in ["weapon", "armor"]]
-        
-        for i, item in enumerate(equipment_items):
+        for i, (handle, item) in enumerate(self.player.inventory.equipment.items()):
             row = i // 2
             col = i % 2
             
@@ -1311,16 +1520,16 @@ class Game:
             color = item.get_rarity_color()
             
             if item.item_type == "weapon":
-                item_text = f"Оружие +{item.value}"
+                item_text = tr("equipment.weapon_button", value=item.value)
             elif item.item_type == "armor":
-                slot_names = {"head": "Шлем", "chest": "Торс", "legs": "Ноги"}
-                slot_name = slot_names.get(item.armor_slot, "Броня")
-                item_text = f"{slot_name} +{item.value}"
+                slot_name = tr("equipment.slot." + (item.armor_slot or "armor"))
+                item_text = tr("equipment.armor_button", slot=slot_name, value=item.value)
             else:
                 item_text = item.name[:6]
             
             button = Button(x, y, 130, 50, item_text, color, tuple(min(255, c + 30) for c in color))
             self.inventory_buttons.append(button)
+            self.inventory_handles.append(handle)
     
     def open_skills_modal(self):
         """Открыть модальное окно навыков"""
@@ -1333,206 +1542,81 @@ class Game:
             hover = PURPLE_HOVER if can_use else (60, 65, 80)
             self.skill_buttons.append(
                 Button(220, 120 + i * 70, 360, 55, 
-                      f"{skill.name} (Мана: {skill.mana_cost})", color, hover)
+                      tr("battle.skill_button", name=skill.name, mana=skill.mana_cost), color, hover)
             )
     
-    def player_basic_attack(self):
-        base_damage = self.player.attack + random.randint(-4, 4)
-        damage, is_crit = self.player.calculate_attack_damage(base_damage)
-        actual_damage = self.enemy.take_damage(damage)
-        
-        crit_text = " [КРИТ!]" if is_crit else ""
-        log_msg = f"[Атака] Вы атаковали{crit_text}! Урон: {actual_damage}"
-        self.battle_log.append(log_msg)
-        
-        particle_count = 25 if is_crit else 15
-        particle_color = WARNING_COLOR if is_crit else DANGER_COLOR
-        self.spawn_particles(580, 120, particle_count, particle_color, "star" if is_crit else "circle")
-        
-        if self.player.equipped["weapon"] and self.player.equipped["weapon"].effect:
-            self.apply_weapon_effect(self.player.equipped["weapon"].effect)
-        
-        if self.enemy.hp <= 0:
-            self.victory()
-            return
-        
-        self.player.end_turn()
-        self.enemy_turn()
-    
-    def apply_weapon_effect(self, effect):
-        """Применить эффект оружия"""
-        if effect == "poison":
-            dot_damage = random.randint(3, 8)
-            self.enemy.hp -= dot_damage
-            self.battle_log.append(f"[ЯД] Враг получил {dot_damage} урона от яда!")
-            self.spawn_particles(580, 120, 10, (34, 197, 94), "circle")
-        elif effect == "fire":
-            fire_damage = random.randint(5, 12)
-            self.enemy.hp -= fire_damage
-            self.battle_log.append(f"[ОГОНЬ] Враг горит! Урон: {fire_damage}")
-            self.spawn_particles(580, 120, 15, (239, 68, 68), "star")
-        elif effect == "ice":
-            if random.random() < 0.2:
-                self.battle_log.append(f"[ЛЁД] Враг заморожен!")
-                self.spawn_particles(580, 120, 12, (59, 130, 246), "star")
-            else:
-                ice_damage = random.randint(2, 6)
-                self.enemy.hp -= ice_damage
-                self.battle_log.append(f"[ЛЁД] Холод наносит {ice_damage} урона")
-        elif effect == "lightning":
-            lightning_damage = random.randint(8, 15)
-            self.enemy.hp -= lightning_damage
-            self.battle_log.append(f"[МОЛНИЯ] Разряд! Урон: {lightning_damage}")
-            self.spawn_particles(580, 120, 20, (234, 179, 8), "star")
-    
-    def enemy_turn(self):
-        action = self.enemy.choose_action(self.player)
-        result = self.enemy.perform_action(action, self.player)
-        self.battle_log.append(f"[Враг] {result}")
-        
-        if "урон" in result.lower() or "атаку" in result.lower():
+    def new_game(self):
+        super().new_game()
+        self.battle_log_scroll = 0
+    
+    def notify(self, event, **data):
+        """Частицы, звуки и обновление кнопок по событиям правил"""
+        if event == "attack":
+            is_crit = data["crit"]
+            particle_count = 25 if is_crit else 15
+            particle_color = WARNING_COLOR if is_crit else DANGER_COLOR
+            self.spawn_particles(580, 120, particle_count, particle_color, "star" if is_crit else "circle")
+            self.play_sound("crit" if is_crit else "hit")
+        elif event == "weapon_effect":
+            effect = data["effect"]
+            self.play_sound("ice" if effect == "freeze" else effect)
+            if effect in self.WEAPON_PARTICLES:
+                self.spawn_particles(580, 120, *self.WEAPON_PARTICLES[effect])
+        elif event == "player_hit":
             self.spawn_particles(160, 120, 10, DANGER_COLOR, "circle")
-        
-        if len(self.battle_log) > 4:
-            self.battle_log = self.battle_log[-4:]
-        
-        if self.player.hp <= 0:
-            self.defeat()
-    
-    def use_skill(self, skill_index):
-        if skill_index < len(self.player.skills):
-            skill = self.player.skills[skill_index]
-            success, msg = self.player.use_skill(skill_index, self.enemy)
-            
-            if success:
-                self.battle_log.append(f"[Навык] {msg}")
-                self.skills_modal.close()
-                
-                if "Молния" in skill.name:
-                    self.spawn_particles(580, 120, 20, (99, 179, 237), "star")
-                elif "Огненный шар" in skill.name:
-                    self.spawn_particles(580, 120, 25, (239, 68, 68), "star")
-                elif "Мощный удар" in skill.name:
-                    self.spawn_particles(580, 120, 15, WARNING_COLOR, "circle")
-                else:
-                    self.spawn_particles(160, 120, 10, SUCCESS_COLOR, "star")
-                
-                if self.enemy.hp <= 0:
-                    self.victory()
-                    return
-                
-                self.player.end_turn()
-                self.enemy_turn()
-            else:
-                self.battle_log.append(f"[Ошибка] {msg}")
-                
-            if len(self.battle_log) > 4:
-                self.battle_log = self.battle_log[-4:]
-    
-    def use_item_in_battle(self, item_index):
-        if item_index < len(self.player.inventory):
-            item = self.player.inventory[item_index]
-            success, msg = self.player.use_item(item_index)
-            if success:
-                self.battle_log.append(f"[Предмет] {msg}")
-                self.inventory_modal.close()
-                
-                if "здоров" in item.name.lower():
-                    self.spawn_particles(160, 120, 15, SUCCESS_COLOR, "circle")
-                elif "маны" in item.name.lower():
-                    self.spawn_particles(160, 120, 15, MANA_COLOR, "star")
-                
-                self.inventory_buttons = []
-                for i, inv_item in enumerate(self.player.inventory):
-                    if inv_item.item_type == "weapon":
-                        item_text = f"{inv_item.name} (+{inv_item.value} АТК)"
-                        color = DANGER_COLOR
-                    elif inv_item.item_type == "armor":
-                        item_text = f"{inv_item.name} (+{inv_item.value} HP)"
-                        color = ACCENT_PRIMARY
-                    elif inv_item.item_type == "potion_hp":
-                        item_text = f"{inv_item.name} (+{inv_item.value} HP)"
-                        color = SUCCESS_COLOR
-                    elif inv_item.item_type == "potion_mana":
-                        item_text = f"{inv_item.name} (+{inv_item.value} MP)"
-                        color = MANA_COLOR
-                    elif inv_item.item_type == "potion_multi":
-                        mana_val = getattr(inv_item, 'mana_value', 30)
-                        item_text = f"{inv_item.name} (HP+MP)"
-                        color = PURPLE_COLOR
-                    else:
-                        item_text = inv_item.name
-                        color = SUCCESS_COLOR
-                    
-                    self.inventory_buttons.append(
-                        Button(220, 120 + i * 60, 360, 50, item_text, color, 
-                              tuple(min(255, c + 30) for c in color))
-                    )
-                
-                self.enemy_turn()
+        elif event == "skill":
+            self.skills_modal.close()
+            skill = data["skill"]
+            if "Молния" in skill.name:
+                self.spawn_particles(580, 120, 20, (99, 179, 237), "star")
+            elif "Огненный шар" in skill.name:
+                self.spawn_particles(580, 120, 25, (239, 68, 68), "star")
+            elif "Мощный удар" in skill.name:
+                self.spawn_particles(580, 120, 15, WARNING_COLOR, "circle")
             else:
-                self.battle_log.append(f"[Ошибка] {msg}")
-            
-            if len(self.battle_log) > 4:
-                self.battle_log = self.battle_log[-4:]
-    
-    def victory(self):
-        """Победа в бою с выпадением лута"""
-        self.player.gain_exp(self.enemy.exp_reward)
-        self.player.gold += self.enemy.gold_reward
-        
-        self.player.stats["enemies_killed"] += 1
-        self.player.stats["gold_earned"] += self.enemy.gold_reward
-        
-        if hasattr(self.enemy, 'is_boss') and self.enemy.is_boss:
-            self.player.stats["bosses_killed"] += 1
-        
-        self.player.restore_mana(50)
-        
-        for _ in range(30):
-            self.spawn_particles(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, 1, WARNING_COLOR, "star")
-        
-        loot_messages = []
-        skipped_items = 0
-        
-        for item in self.enemy.loot:
-            if self.player.can_add_to_inventory():
-                self.player.inventory.append(item)
-                self.player.stats["items_collected"] += 1
-                rarity_name = item.get_rarity_name()
-                loot_messages.append(f"[ЛУТ] {item.name} ({rarity_name})")
-            else:
-                skipped_items += 1
-        
-        msg_parts = [f"ПОБЕДА! +{self.enemy.exp_reward} опыта, +{self.enemy.gold_reward} золота"]
-        if loot_messages:
-            msg_parts.extend(loot_messages)
-        if skipped_items > 0:
-            msg_parts.append(f"[!] Инвентарь полон! Пропущено предметов: {skipped_items}")
-        
-        self.message = "\n".join(msg_parts)
-        self.message_timer = 180
-        self.state = "victory"
+                self.spawn_particles(160, 120, 10, SUCCESS_COLOR, "star")
+        elif event == "item":
+            self.inventory_modal.close()
+            item = data["item"]
+            if "здоров" in item.name.lower():
+                self.spawn_particles(160, 120, 15, SUCCESS_COLOR, "circle")
+            elif "маны" in item.name.lower():
+                self.spawn_particles(160, 120, 15, MANA_COLOR, "star")
+            # Дескрипторы остальных предметов не сдвигаются, убираем только строку использованного
+            self.inventory_list.remove(data["handle"])
+        elif event == "victory":
+            for _ in range(30):
+                self.spawn_particles(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, 1, WARNING_COLOR, "star")
+            self.play_sound("victory")
+        elif event == "defeat":
+            self.play_sound("defeat")
+        elif event == "battle_started":
+            self.battle_log_scroll = 0
+            self.skill_buttons = []
+            for i, skill in enumerate(self.player.skills):
+                can_use = self.player.mana >= skill.mana_cost
+                color = PURPLE_COLOR if can_use else (50, 55, 70)
+                hover = PURPLE_HOVER if can_use else (60, 65, 80)
+                self.skill_buttons.append(
+                    Button(220, 150 + i * 60, 360, 50, 
+                          tr("battle.skill_button", name=skill.name, mana=skill.mana_cost), color, hover)
+                )
+        elif event == "shop_changed":
+            self.update_shop_buttons()
     
-    def defeat(self):
-        self.message = "Вы погибли! Игра окончена."
-        self.message_timer = 150
-        self.state = "defeat"
+    def render_log_line(self, text):
+        """Отрисовать строку журнала боя один раз при добавлении"""
+        return FONT_TINY.render(text, True, TEXT_PRIMARY)
     
-    def run_away(self):
-        chance = 0.6 if self.player.hp < self.player.max_hp * 0.3 else 0.4
-        if random.random() < chance:
-            self.battle_log.append("[Побег] Вы успешно сбежали!")
-            self.state = "game"
-        else:
-            self.battle_log.append("[Побег] Не удалось сбежать!")
-            self.enemy_turn()
-        
-        if len(self.battle_log) > 4:
-            self.battle_log = self.battle_log[-4:]
+    def play_sound(self, name):
+        """Звук боевого события; автобой идёт молча, как и без частиц"""
+        if not self.turbo:
+            AUDIO.play(name)
     
     def spawn_particles(self, x, y, count, color, particle_type="circle"):
         """Создать частицы для эффектов"""
+        if self.turbo:
+            return
         for _ in range(count):
             self.particles.append(Particle(x, y, color, particle_type))
     
@@ -1540,136 +1624,66 @@ class Game:
         """Обновить все частицы"""
         self.particles = [p for p in self.particles if p.update(dt)]
     
-    def draw_gradient_bg(self):
-        """Красивый многослойный градиентный фон с эффектом глубины"""
-        for i in range(SCREEN_HEIGHT):
-            factor = i / SCREEN_HEIGHT
-            if factor < 0.5:
-                t = factor * 2
-                color = (
-                    int(BG_COLOR[0] + (18 - BG_COLOR[0]) * t),
-                    int(BG_COLOR[1] + (12 - BG_COLOR[1]) * t),
-                    int(BG_COLOR[2] + (45 - BG_COLOR[2]) * t)
-                )
-            else:
-                t = (factor - 0.5) * 2
-                color = (
-                    int(18 + (BG_COLOR[0] - 18) * t),
-                    int(12 + (BG_COLOR[1] - 12) * t),
-                    int(45 + (BG_COLOR[2] - 45) * t)
-                )
-            pygame.draw.line(self.screen, color, (0, i), (SCREEN_WIDTH, i))
-        
-        time_ms = pygame.time.get_ticks()
-        for i in range(3):
-            offset_x = math.sin(time_ms / 3000 + i * 2) * 100
-            offset_y = math.cos(time_ms / 4000 + i * 1.5) * 50
-            x = SCREEN_WIDTH // 4 + i * SCREEN_WIDTH // 3 + offset_x
-            y = SCREEN_HEIGHT // 3 + offset_y
-            
-            for radius in range(150, 0, -30):
-                alpha = int(5 * (1 - radius / 150))
-                surf = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
-                color = (40 + i * 20, 30 + i * 15, 80 + i * 30, alpha)
-                pygame.draw.circle(surf, color, (radius, radius), radius)
-                self.screen.blit(surf, (x - radius, y - radius))
-    
-    def draw_card(self, x, y, width, height, alpha=255):
-        """Красивая современная карточка с эффектами"""
-        shadow_layers = 3
-        for i in range(shadow_layers):
-            shadow_offset = 3 + i * 2
-            shadow_alpha = int((40 - i * 10) * (alpha / 255))
-            shadow = pygame.Surface((width + shadow_offset * 2, height + shadow_offset * 2), pygame.SRCALPHA)
-            pygame.draw.rect(shadow, (0, 0, 0, shadow_alpha), shadow.get_rect(), border_radius=15)
-            self.screen.blit(shadow, (x - shadow_offset // 2, y + shadow_offset))
-        
-        card = pygame.Surface((width, height), pygame.SRCALPHA)
-        
-        for i in range(height):
-            factor = 1 - (i / height) * 0.08
-            gradient_alpha = alpha
-            color = tuple(int(c * factor) for c in CARD_BG)
-            pygame.draw.line(card, (*color, gradient_alpha), (0, i), (width, i))
-        
-        pygame.draw.rect(card, (*CARD_BG, alpha), card.get_rect(), border_radius=12)
-        
-        self.screen.blit(card, (x, y))
-        
-        border_color = (255, 255, 255, int(35 * (alpha / 255)))
-        pygame.draw.rect(self.screen, border_color, 
-                        pygame.Rect(x, y, width, height), 1, border_radius=12)
-        
-        inner_border = pygame.Rect(x + 1, y + 1, width - 2, height - 2)
-        pygame.draw.rect(self.screen, (255, 255, 255, int(15 * (alpha / 255))), 
-                        inner_border, 1, border_radius=11)
-        
-        shine_width = width // 3
-        shine_height = height // 4
-        shine = pygame.Surface((shine_width, shine_height), pygame.SRCALPHA)
-        for i in range(shine_height):
-            for j in range(shine_width):
-                distance = math.sqrt((i / shine_height) ** 2 + (j / shine_width) ** 2)
-                shine_alpha = int(max(0, 25 * (1 - distance) * (alpha / 255)))
-                shine.set_at((j, i), (255, 255, 255, shine_alpha))
-        self.screen.blit(shine, (x + 10, y + 10))
-    
-    def draw_progress_bar(self, x, y, width, height, value, max_value, color, label=""):
-        """Красивый прогресс-бар с градиентом и анимацией"""
-        bg_rect = pygame.Rect(x, y, width, height)
-        
-        pygame.draw.rect(self.screen, (20, 25, 35), bg_rect, border_radius=height // 2)
-        
-        shadow_rect = bg_rect.inflate(-2, -2)
-        pygame.draw.rect(self.screen, (15, 18, 25), shadow_rect, border_radius=height // 2)
-        
-        fill_width = int((value / max_value) * width) if max_value > 0 else 0
-        if fill_width > 4:
-            fill_rect = pygame.Rect(x, y, fill_width, height)
-            
-            for i in range(height):
-                factor = 1 - (i / height) * 0.15
-                gradient_color = tuple(int(c * factor) for c in color)
-                line_rect = pygame.Rect(x + 2, y + i, fill_width - 4, 1)
-                pygame.draw.rect(self.screen, gradient_color, line_rect)
-            
-            pygame.draw.rect(self.screen, color, fill_rect, border_radius=height // 2)
-            
-            shine_height = max(2, height // 3)
-            shine = pygame.Surface((fill_width - 4, shine_height), pygame.SRCALPHA)
-            for i in range(shine_height):
-                shine_alpha = int(60 * (1 - i / shine_height))
-                pygame.draw.line(shine, (255, 255, 255, shine_alpha), 
-                               (0, i), (fill_width - 4, i))
-            self.screen.blit(shine, (x + 2, y + 2))
-            
-            if fill_width < width - 2:
-                pulse = abs(math.sin(pygame.time.get_ticks() / 800)) * 0.5 + 0.5
-                edge_glow = pygame.Surface((8, height), pygame.SRCALPHA)
-                for i in range(8):
-                    alpha = int(40 * pulse * (1 - i / 8))
-                    pygame.draw.line(edge_glow, (*color, alpha), (i, 0), (i, height))
-                self.screen.blit(edge_glow, (x + fill_width - 4, y))
-        
-        border_color = tuple(min(255, c + 20) for c in color)
-        pygame.draw.rect(self.screen, (*border_color, 100), bg_rect, 1, border_radius=height // 2)
-        
-        inner_border = bg_rect.inflate(-2, -2)
-        pygame.draw.rect(self.screen, (255, 255, 255, 25), inner_border, 1, border_radius=height // 2)
-        
-        if label:
-            text = FONT_TINY.render(f"{value}/{max_value}", True, TEXT_PRIMARY)
-            text_rect = text.get_rect(center=(x + width // 2, y + height // 2))
-            
-            shadow = FONT_TINY.render(f"{value}/{max_value}", True, (0, 0, 0))
-            shadow_rect = shadow.get_rect(center=(x + width // 2 + 1, y + height // 2 + 1))
-            self.screen.blit(shadow, shadow_rect)
-            self.screen.blit(text, text_rect)
-            shadow_rect = shadow.get_rect(center=(x + width // 2 + 1, y + height // 2 + 1))
-            self.screen.blit(shadow, shadow_rect)
-            self.screen.blit(text, text_rect)
-        
-        pygame.draw.rect(self.screen, (255, 255, 255, 80), bg_rect, 1, border_radius=height // 2)
+    def draw_gradient_bg(self):
+        """Красивый многослойный градиентный фон с эффектом глубины"""
+        if self.background is None:
+            # Градиент фона не меняется, строится один раз вместо линии на каждую строку в каждом кадре
+            gradient = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            paint_gradient(gradient, [(0, BG_COLOR), (0.5, (18, 12, 45)), (1, BG_COLOR)])
+            self.background_gradient = to_display(gradient, alpha=False)
+            self.background = self.background_gradient.copy()
+        
+        # Пятна почти прозрачны и плывут медленно: фон с ними собирается несколько раз в секунду, а кадр - один blit
+        step = pygame.time.get_ticks() // self.BACKGROUND_STEP_MS
+        if step != self.background_step:
+            self.background_step = step
+            self.background.blit(self.background_gradient, (0, 0))
+            time_ms = step * self.BACKGROUND_STEP_MS
+            for i in range(3):
+                offset_x = math.sin(time_ms / 3000 + i * 2) * 100
+                offset_y = math.cos(time_ms / 4000 + i * 1.5) * 50
+                x = SCREEN_WIDTH // 4 + i * SCREEN_WIDTH // 3 + offset_x
+                y = SCREEN_HEIGHT // 3 + offset_y
+                
+                blob = ATLAS.bake(("bg_blob", i), 300, 300, self.paint_bg_blob, i)
+                self.background.blit(blob, (x - 150, y - 150))
+        self.screen.blit(self.background, (0, 0))
+    
+    @staticmethod
+    def paint_bg_blob(surface, i):
+        """Пятно свечения фона: концентрические круги, наложенные так же, как раньше накладывались на экран"""
+        for radius in range(150, 0, -30):
+            alpha = int(5 * (1 - radius / 150))
+            layer = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            color = (40 + i * 20, 30 + i * 15, 80 + i * 30, alpha)
+            pygame.draw.circle(layer, color, (radius, radius), radius)
+            surface.blit(layer, (150 - radius, 150 - radius))
+    
+    @staticmethod
+    def paint_orbit_dot(surface, alpha):
+        pygame.draw.circle(surface, (*WARNING_COLOR, alpha), (3, 3), 3)
+    
+    @staticmethod
+    def paint_title_outline(surface, title_text):
+        surface.blit(FONT_TITLE.render(title_text, True, (255, 255, 255)), (0, 0))
+    
+    @staticmethod
+    def paint_fill(surface, color):
+        surface.fill(color)
+    
+    @staticmethod
+    def paint_separator(surface, x, y, width):
+        """Разделитель, гаснущий к краям"""
+        paint_gradient(surface.subsurface((x, y, width, 1)),
+                       [(0, (255, 255, 255, 0)), (0.5, (255, 255, 255, 40)), (1, (255, 255, 255, 0))], vertical=False)
+    
+    def draw_card(self, x, y, width, height, alpha=255):
+        """Красивая современная карточка с эффектами"""
+        self.cards.draw(self.screen, x, y, width, height, alpha)
+    
+    def draw_progress_bar(self, x, y, width, height, value, max_value, color, label=""):
+        """Красивый прогресс-бар с градиентом и анимацией"""
+        self.progress_bars.draw(self.screen, x, y, width, height, value, max_value, color, label)
     
     def draw_menu(self):
         """Красивое главное меню с улучшенным дизайном"""
@@ -1687,15 +1701,14 @@ class Game:
             y = 150 + random.randint(-30, 30)
             self.spawn_particles(x, y, 1, WARNING_COLOR, "star")
         
-        title_text = "УБЕЙ ЗЛЮК"
+        title_text = tr("menu.title")
         
         pulse = abs(math.sin(pygame.time.get_ticks() / 1000)) * 0.4 + 0.6
         
-        glow_surface = pygame.Surface((SCREEN_WIDTH, 180), pygame.SRCALPHA)
-        for i in range(50):
-            glow_alpha = int(20 * pulse * (1 - i / 50))
-            pygame.draw.ellipse(glow_surface, (*WARNING_COLOR, glow_alpha), 
-                              (SCREEN_WIDTH // 2 - 280 - i, 70 - i // 2, 560 + i * 2, 50 + i))
+        # Пульс масштабирует прозрачность всех эллипсов одинаково, поэтому хватает одного запечённого слоя
+        glow_surface = ATLAS.bake(("title_glow", "menu"), SCREEN_WIDTH, 180, paint_ellipse_glow,
+                                  WARNING_COLOR, 50, 20, (SCREEN_WIDTH // 2 - 280, 70, 560, 50))
+        glow_surface.set_alpha(int(255 * pulse))
         self.screen.blit(glow_surface, (0, 60))
         
         time_offset = pygame.time.get_ticks() / 1000
@@ -1703,33 +1716,35 @@ class Game:
             angle = (time_offset + i * math.pi / 4) % (2 * math.pi)
             x = SCREEN_WIDTH // 2 + math.cos(angle) * 180
             y = 145 + math.sin(angle) * 30
-            particle_surf = pygame.Surface((6, 6), pygame.SRCALPHA)
-            alpha = int(150 * pulse)
-            pygame.draw.circle(particle_surf, (*WARNING_COLOR, alpha), (3, 3), 3)
-            self.screen.blit(particle_surf, (x - 3, y - 3))
+            alpha = int(150 * pulse) // Star.ALPHA_STEP * Star.ALPHA_STEP
+            ATLAS.blit(self.screen, ("orbit", alpha), (x - 3, y - 3),
+                       6, 6, self.paint_orbit_dot, alpha)
         
         for offset in range(3, 0, -1):
             shadow_alpha = 80 - offset * 20
-            title_shadow = FONT_TITLE.render(title_text, True, (0, 0, 0, shadow_alpha))
+            title_shadow = TEXT_CACHE.render(FONT_TITLE, title_text, (0, 0, 0, shadow_alpha))
             shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + offset, 147 + offset))
             self.screen.blit(title_shadow, shadow_rect)
         
-        title = FONT_TITLE.render(title_text, True, WARNING_COLOR)
+        title = TEXT_CACHE.render(FONT_TITLE, title_text, WARNING_COLOR)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 145))
         self.screen.blit(title, title_rect)
         
-        title_outline = FONT_TITLE.render(title_text, True, (255, 255, 255, int(80 * pulse)))
+        title_outline = ATLAS.bake(("title_outline", title_text), *FONT_TITLE.size(title_text),
+                                   self.paint_title_outline, title_text)
+        title_outline.set_alpha(int(80 * pulse))
         for dx, dy in [(-1, -1), (-1, 1), (1, -1), (1, 1)]:
             outline_rect = title_outline.get_rect(center=(SCREEN_WIDTH // 2 + dx, 145 + dy))
             self.screen.blit(title_outline, outline_rect)
         self.screen.blit(title, title_rect)
         
         subtitle_pulse = abs(math.sin(pygame.time.get_ticks() / 800)) * 80 + 140
-        subtitle = FONT_SMALL.render("Готовы к приключениям?", True, 
-                                     (int(subtitle_pulse), int(subtitle_pulse), int(subtitle_pulse)))
+        subtitle_level = int(subtitle_pulse) // 4 * 4
+        subtitle = TEXT_CACHE.render(FONT_SMALL, tr("menu.subtitle"),
+                                     (subtitle_level, subtitle_level, subtitle_level))
         subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 200))
         
-        subtitle_shadow = FONT_SMALL.render("Готовы к приключениям?", True, (0, 0, 0))
+        subtitle_shadow = TEXT_CACHE.render(FONT_SMALL, tr("menu.subtitle"), (0, 0, 0))
         shadow_rect = subtitle_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 1, 201))
         self.screen.blit(subtitle_shadow, shadow_rect)
         self.screen.blit(subtitle, subtitle_rect)
@@ -1740,20 +1755,49 @@ class Game:
             deco_x_right = SCREEN_WIDTH // 2 + 220 + i * 15
             alpha = int(100 - i * 30)
             
-            deco_surf = pygame.Surface((8, 2), pygame.SRCALPHA)
-            deco_surf.fill((*TEXT_SECONDARY, alpha))
-            self.screen.blit(deco_surf, (deco_x_left, deco_y))
-            self.screen.blit(deco_surf, (deco_x_right, deco_y))
+            deco_page, deco_rect = ATLAS.get(("deco", alpha), 8, 2, self.paint_fill, (*TEXT_SECONDARY, alpha))
+            self.screen.blit(deco_page, (deco_x_left, deco_y), deco_rect)
+            self.screen.blit(deco_page, (deco_x_right, deco_y), deco_rect)
         
         for button in self.menu_buttons:
             button.update()
             button.draw(self.screen)
         
+        if self.runs is not None:
+            # Таблица рекордов берётся из памяти RunHistory и перерисовывается только после нового забега
+            self.layers.draw(self.screen, "menu_runs", (self.runs_metric, self.runs.version), self.paint_runs_layer)
+            self.runs_metric_button.text = tr("runs.metric." + self.runs_metric)
+            self.runs_metric_button.update()
+            self.runs_metric_button.draw(self.screen)
+        
         footer_text = "v1.0 | RPG Adventure"
-        footer = FONT_TINY.render(footer_text, True, TEXT_DISABLED)
+        footer = TEXT_CACHE.render(FONT_TINY, footer_text, TEXT_DISABLED)
         footer_rect = footer.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 30))
         self.screen.blit(footer, footer_rect)
     
+    def paint_runs_layer(self, surface):
+        """Карточка лучших забегов в меню по выбранной метрике"""
+        card_x, card_y, card_width = 195, 440, 510
+        top = self.runs.top(self.runs_metric, 5)
+        self.cards.draw(surface, card_x, card_y, card_width, 170 if top else 80)
+        
+        title = TEXT_CACHE.render(FONT_SMALL, tr("runs.title"), WARNING_COLOR)
+        surface.blit(title, (card_x + 20, card_y + 10))
+        self.paint_separator(surface, card_x + 20, card_y + 42, card_width - 40)
+        
+        if not top:
+            empty = TEXT_CACHE.render(FONT_TINY, tr("runs.empty"), TEXT_SECONDARY)
+            surface.blit(empty, (card_x + 20, card_y + 52))
+            return
+        for rank, run in enumerate(top, 1):
+            value = run.metric(self.runs_metric)
+            if self.runs_metric == "duration":
+                value = format_duration(value)
+            line = tr("runs.row", rank=rank, name=run.player, value=value, level=run.level,
+                      duration=format_duration(run.duration))
+            line_surface = TEXT_CACHE.render(FONT_TINY, line, TEXT_PRIMARY if rank > 1 else WARNING_COLOR)
+            surface.blit(line_surface, (card_x + 20, card_y + 52 + (rank - 1) * 23))
+    
     def draw_game(self):
         """Компактный игровой экран с улучшенным дизайном"""
         self.draw_gradient_bg()
@@ -1770,89 +1814,44 @@ class Game:
             y = 300 + random.randint(-100, 100)
             self.spawn_particles(x, y, 1, ACCENT_PRIMARY, "star")
         
-        self.draw_card(30, 30, 360, 520)
+        player = self.player
+        self.layers.draw(self.screen, "game", (id(player), player.level, player.gold, player.attack, player.defense,
+                                               len(player.inventory), len(player.skills)), self.paint_game_layer)
         
-        pulse = abs(math.sin(pygame.time.get_ticks() / 1200)) * 0.3 + 0.7
+        # Пульс квантуется, чтобы цвета повторялись и текст брался из кэша, а не рендерился каждый кадр
+        pulse = int((abs(math.sin(pygame.time.get_ticks() / 1200)) * 0.3 + 0.7) * 32) / 32
         title_color = tuple(int(c * pulse + (255 - c) * (1 - pulse) * 0.3) for c in ACCENT_PRIMARY)
-        title = FONT_MEDIUM.render("Персонаж", True, title_color)
+        title = TEXT_CACHE.render(FONT_MEDIUM, tr("game.character"), title_color)
         self.screen.blit(title, (50, 45))
         
-        for i in range(310):
-            alpha = int(40 * (1 - abs(i - 155) / 155))
-            pygame.draw.line(self.screen, (255, 255, 255, alpha), (50 + i, 70), (50 + i + 1, 70), 1)
-        
-        y = 80
-        stats = [
-            (f"Уровень: {self.player.level}", TEXT_PRIMARY),
-            (f"Золото: {self.player.gold}", WARNING_COLOR),
-        ]
-        
-        for text, color in stats:
-            surface = FONT_SMALL.render(text, True, color)
-            self.screen.blit(surface, (50, y))
-            y += 28
-        
-        y = 140
-        left_stats = [
-            (f"Атака: {self.player.attack}", DANGER_COLOR),
-            (f"Предметов: {len(self.player.inventory)}", INFO_COLOR),
-        ]
-        right_stats = [
-            (f"Защита: {self.player.defense}", ACCENT_PRIMARY),
-            (f"Навыков: {len(self.player.skills)}", PURPLE_COLOR),
-        ]
-        
-        for (left_text, left_color), (right_text, right_color) in zip(left_stats, right_stats):
-            left_surf = FONT_SMALL.render(left_text, True, left_color)
-            right_surf = FONT_SMALL.render(right_text, True, right_color)
-            self.screen.blit(left_surf, (50, y))
-            self.screen.blit(right_surf, (220, y))
-            y += 28
-        
-        for i in range(310):
-            alpha = int(40 * (1 - abs(i - 155) / 155))
-            pygame.draw.line(self.screen, (255, 255, 255, alpha), (50 + i, y + 5), (50 + i + 1, y + 5), 1)
-        
         y = 235
-        
-        hp_label = FONT_SMALL.render("HP", True, DANGER_COLOR)
-        self.screen.blit(hp_label, (50, y + 2))
         self.draw_progress_bar(90, y, 270, 20, self.player.hp, self.player.max_hp, DANGER_COLOR, "hp")
-        
         y += 45
-        mana_label = FONT_SMALL.render("MP", True, MANA_COLOR)
-        self.screen.blit(mana_label, (50, y + 2))
         self.draw_progress_bar(90, y, 270, 20, self.player.mana, self.player.max_mana, MANA_COLOR, "mana")
-        
         y += 45
-        exp_label = FONT_SMALL.render("XP", True, WARNING_COLOR)
-        self.screen.blit(exp_label, (50, y + 2))
         self.draw_progress_bar(90, y, 270, 20, self.player.exp, self.player.exp_to_level, WARNING_COLOR, "")
         
         exp_percent = int((self.player.exp / self.player.exp_to_level) * 100)
-        percent_text = FONT_TINY.render(f"{exp_percent}%", True, TEXT_SECONDARY)
+        percent_text = TEXT_CACHE.render(FONT_TINY, f"{exp_percent}%", TEXT_SECONDARY)
         percent_rect = percent_text.get_rect(center=(225, y + 28))
         self.screen.blit(percent_text, percent_rect)
         
         y += 50
-        for i in range(310):
-            alpha = int(40 * (1 - abs(i - 155) / 155))
-            pygame.draw.line(self.screen, (255, 255, 255, alpha), (50 + i, y), (50 + i + 1, y), 1)
-        
         if self.player.status_effects:
             y += 10
-            status_title = FONT_TINY.render("Активные эффекты:", True, TEXT_SECONDARY)
+            status_title = TEXT_CACHE.render(FONT_TINY, tr("game.active_effects"), TEXT_SECONDARY)
             self.screen.blit(status_title, (50, y))
             y += 20
             for effect in self.player.status_effects:
-                effect_text = FONT_TINY.render(f"[ЗАЩИТА] x{self.player.status_effects[effect]}", True, ACCENT_PRIMARY)
+                turns_left = self.player.status_effects.remaining(effect.name)
+                effect_text = TEXT_CACHE.render(FONT_TINY, tr("game.effect_turns", label=effect.label, turns=turns_left), ACCENT_PRIMARY)
                 self.screen.blit(effect_text, (50, y))
                 y += 18
         
         y = 515
-        hint_pulse = abs(math.sin(pygame.time.get_ticks() / 600)) * 0.3 + 0.7
+        hint_pulse = int((abs(math.sin(pygame.time.get_ticks() / 600)) * 0.3 + 0.7) * 32) / 32
         hint_color = tuple(int(c * hint_pulse) for c in TEXT_SECONDARY)
-        hint_text = FONT_TINY.render("Выберите действие ниже", True, hint_color)
+        hint_text = TEXT_CACHE.render(FONT_TINY, tr("game.choose_action"), hint_color)
         hint_rect = hint_text.get_rect(center=(210, y))
         self.screen.blit(hint_text, hint_rect)
         
@@ -1869,9 +1868,10 @@ class Game:
             stripe_rect = pygame.Rect(msg_x, msg_y, msg_width, 4)
             pygame.draw.rect(self.screen, WARNING_COLOR, stripe_rect, border_radius=10)
             
-            msg_surface = FONT_MEDIUM.render(self.message, True, WARNING_COLOR)
+            msg_surface = TEXT_CACHE.render(FONT_MEDIUM, self.message, WARNING_COLOR)
             msg_rect = msg_surface.get_rect(center=(SCREEN_WIDTH // 2, msg_y + 45))
             
+            # Этим шрифтом и цветом сообщение рисуется только здесь, прозрачность кэшированной строки задаётся каждый кадр
             msg_surface.set_alpha(int(255 * pulse))
             self.screen.blit(msg_surface, msg_rect)
         
@@ -1879,6 +1879,44 @@ class Game:
             button.update()
             button.draw(self.screen)
     
+    def paint_game_layer(self, surface):
+        """Неподвижная часть игрового экрана: карточка, характеристики, подписи полос и разделители"""
+        self.cards.draw(surface, 30, 30, 360, 520)
+        self.paint_separator(surface, 50, 70, 310)
+        
+        y = 80
+        stats = [
+            (tr("game.level", level=self.player.level), TEXT_PRIMARY),
+            (tr("game.gold", gold=self.player.gold), WARNING_COLOR),
+        ]
+        
+        for text, color in stats:
+            surface.blit(TEXT_CACHE.render(FONT_SMALL, text, color), (50, y))
+            y += 28
+        
+        y = 140
+        left_stats = [
+            (tr("game.attack", attack=self.player.attack), DANGER_COLOR),
+            (tr("game.items", count=len(self.player.inventory)), INFO_COLOR),
+        ]
+        right_stats = [
+            (tr("game.defense", defense=self.player.defense), ACCENT_PRIMARY),
+            (tr("game.skills", count=len(self.player.skills)), PURPLE_COLOR),
+        ]
+        
+        for (left_text, left_color), (right_text, right_color) in zip(left_stats, right_stats):
+            surface.blit(TEXT_CACHE.render(FONT_SMALL, left_text, left_color), (50, y))
+            surface.blit(TEXT_CACHE.render(FONT_SMALL, right_text, right_color), (220, y))
+            y += 28
+        
+        self.paint_separator(surface, 50, y + 5, 310)
+        
+        y = 235
+        for label, color in (("HP", DANGER_COLOR), ("MP", MANA_COLOR), ("XP", WARNING_COLOR)):
+            surface.blit(TEXT_CACHE.render(FONT_SMALL, label, color), (50, y + 2))
+            y += 45
+        self.paint_separator(surface, 50, y + 5, 310)
+    
     def draw_battle(self):
         """Компактный экран боя"""
         self.draw_gradient_bg()
@@ -1890,21 +1928,7 @@ class Game:
         for particle in self.particles:
             particle.draw(self.screen)
         
-        self.draw_card(40, 30, 280, 180)
-        player_title = FONT_MEDIUM.render("Герой", True, SUCCESS_COLOR)
-        self.screen.blit(player_title, (60, 45))
-        
-        y = 85
-        player_stats = [
-            (f"АТК: {self.player.attack}", DANGER_COLOR),
-            (f"ЗАЩ: {self.player.defense}", ACCENT_PRIMARY),
-        ]
-        
-        x_pos = 60
-        for text, color in player_stats:
-            surface = FONT_SMALL.render(text, True, color)
-            self.screen.blit(surface, (x_pos, y))
-            x_pos += 110
+        self.layers.draw(self.screen, "battle", (self.player.attack, self.player.defense), self.paint_battle_layer)
         
         y = 120
         self.draw_progress_bar(60, y, 240, 18, self.player.hp, self.player.max_hp, DANGER_COLOR)
@@ -1913,50 +1937,25 @@ class Game:
         
         if self.player.status_effects:
             y = 180
-            status_text = "[ЗАЩИТА]"
-            status_surf = FONT_TINY.render(status_text, True, ACCENT_PRIMARY)
+            status_text = " ".join(effect.label for effect in self.player.status_effects)
+            status_surf = TEXT_CACHE.render(FONT_TINY, status_text, ACCENT_PRIMARY)
             self.screen.blit(status_surf, (60, y))
         
-        self.draw_card(580, 30, 280, 180)
-        enemy_title = FONT_MEDIUM.render(f"{self.enemy.name}", True, DANGER_COLOR)
-        self.screen.blit(enemy_title, (600, 45))
-        
-        y = 85
-        enemy_stats = [
-            (f"АТК: {self.enemy.attack}", DANGER_COLOR),
-            (f"ЗАЩ: {self.enemy.defense}", ACCENT_PRIMARY),
-        ]
-        
-        x_pos = 600
-        for text, color in enemy_stats:
-            surface = FONT_SMALL.render(text, True, color)
-            self.screen.blit(surface, (x_pos, y))
-            x_pos += 110
-        
-        y = 120
-        self.draw_progress_bar(600, y, 240, 18, self.enemy.hp, self.enemy.max_hp, DANGER_COLOR)
-        
-        if self.enemy.defending:
-            y = 150
-            status_text = "[В ЗАЩИТЕ]"
-            status_surf = FONT_TINY.render(status_text, True, INFO_COLOR)
-            self.screen.blit(status_surf, (600, y))
-        elif self.enemy.charge > 0:
-            y = 150
-            status_text = "[ЗАРЯДКА]"
-            status_surf = FONT_TINY.render(status_text, True, WARNING_COLOR)
-            self.screen.blit(status_surf, (600, y))
+        if len(self.enemies) > 1:
+            self.draw_enemy_pack()
+        else:
+            self.draw_enemy_card()
         
         if self.battle_log:
-            log_height = min(len(self.battle_log) * 35 + 30, 180)
+            log_lines = self.battle_log.window(self.battle_log_scroll)
+            log_height = min(len(log_lines) * 35 + 30, 180)
             self.draw_card(150, 240, 600, log_height)
             
-            log_title = FONT_SMALL.render("Лог боя", True, TEXT_SECONDARY)
+            log_title = TEXT_CACHE.render(FONT_SMALL, tr("battle.log_title"), TEXT_SECONDARY)
             self.screen.blit(log_title, (170, 250))
             
             y = 280
-            for i, log in enumerate(self.battle_log[-4:]):
-                log_surf = FONT_TINY.render(log, True, TEXT_PRIMARY)
+            for _, log_surf in log_lines:
                 self.screen.blit(log_surf, (170, y))
                 y += 35
         
@@ -1975,7 +1974,7 @@ class Game:
                     button.draw(self.screen)
                 
                 desc_y = modal_rect.bottom - 100
-                desc_text = FONT_TINY.render("Выберите навык для использования", True, TEXT_SECONDARY)
+                desc_text = TEXT_CACHE.render(FONT_TINY, tr("battle.skills_hint"), TEXT_SECONDARY)
                 desc_rect = desc_text.get_rect(centerx=modal_rect.centerx, y=desc_y)
                 self.screen.blit(desc_text, desc_rect)
         
@@ -1985,21 +1984,20 @@ class Game:
             modal_rect = self.inventory_modal.draw(self.screen)
             
             if modal_rect and self.inventory_modal.animation_progress > 0.5:
-                if self.inventory_buttons:
-                    for button in self.inventory_buttons:
-                        button.update()
-                        button.draw(self.screen)
+                if self.inventory_list.view:
+                    self.inventory_list.update()
+                    self.inventory_list.draw(self.screen)
                     
                     hint_y = modal_rect.bottom - 60
-                    hint_text = FONT_TINY.render("Зелья можно использовать в меню и в бою", True, TEXT_SECONDARY)
+                    hint_text = TEXT_CACHE.render(FONT_TINY, tr("battle.potions_hint"), TEXT_SECONDARY)
                     hint_rect = hint_text.get_rect(centerx=modal_rect.centerx, y=hint_y)
                     self.screen.blit(hint_text, hint_rect)
                     
-                    hint2_text = FONT_TINY.render("Оружие и броню можно использовать только в бою", True, TEXT_SECONDARY)
+                    hint2_text = TEXT_CACHE.render(FONT_TINY, tr("battle.equipment_hint"), TEXT_SECONDARY)
                     hint2_rect = hint2_text.get_rect(centerx=modal_rect.centerx, y=hint_y + 18)
                     self.screen.blit(hint2_text, hint2_rect)
                 else:
-                    empty_text = FONT_SMALL.render("Инвентарь пуст", True, TEXT_SECONDARY)
+                    empty_text = TEXT_CACHE.render(FONT_SMALL, tr("battle.inventory_empty"), TEXT_SECONDARY)
                     empty_rect = empty_text.get_rect(center=(modal_rect.centerx, modal_rect.centery))
                     self.screen.blit(empty_text, empty_rect)
         
@@ -2007,6 +2005,110 @@ class Game:
             self.item_detail_window.update()
             self.item_detail_window.draw(self.screen)
     
+    def paint_battle_layer(self, surface):
+        """Карточка игрока в бою без полос здоровья и маны"""
+        self.cards.draw(surface, 40, 30, 280, 180)
+        player_title = TEXT_CACHE.render(FONT_MEDIUM, tr("battle.hero"), SUCCESS_COLOR)
+        surface.blit(player_title, (60, 45))
+        
+        y = 85
+        player_stats = [
+            (tr("battle.attack_stat", value=self.player.attack), DANGER_COLOR),
+            (tr("battle.defense_stat", value=self.player.defense), ACCENT_PRIMARY),
+        ]
+        
+        x_pos = 60
+        for text, color in player_stats:
+            surface.blit(TEXT_CACHE.render(FONT_SMALL, text, color), (x_pos, y))
+            x_pos += 110
+    
+    def draw_enemy_card(self):
+        """Карточка одиночного врага"""
+        self.enemy_card_rects = []
+        self.draw_card(580, 30, 280, 180)
+        enemy_title = TEXT_CACHE.render(FONT_MEDIUM, f"{self.enemy.name}", DANGER_COLOR)
+        self.screen.blit(enemy_title, (600, 45))
+        
+        y = 85
+        enemy_stats = [
+            (tr("battle.attack_stat", value=self.enemy.attack), DANGER_COLOR),
+            (tr("battle.defense_stat", value=self.enemy.defense), ACCENT_PRIMARY),
+        ]
+        
+        x_pos = 600
+        for text, color in enemy_stats:
+            surface = TEXT_CACHE.render(FONT_SMALL, text, color)
+            self.screen.blit(surface, (x_pos, y))
+            x_pos += 110
+        
+        y = 120
+        self.draw_progress_bar(600, y, 240, 18, self.enemy.hp, self.enemy.max_hp, DANGER_COLOR)
+        
+        if self.enemy.defending:
+            y = 150
+            status_text = tr("battle.enemy_defending")
+            status_surf = TEXT_CACHE.render(FONT_TINY, status_text, INFO_COLOR)
+            self.screen.blit(status_surf, (600, y))
+        elif self.enemy.charge > 0:
+            y = 150
+            status_text = tr("battle.enemy_charging")
+            status_surf = TEXT_CACHE.render(FONT_TINY, status_text, WARNING_COLOR)
+            self.screen.blit(status_surf, (600, y))
+        
+        if self.enemy.status_effects:
+            effects_text = " ".join(effect.label for effect in self.enemy.status_effects)
+            effects_surf = TEXT_CACHE.render(FONT_TINY, effects_text, PURPLE_COLOR)
+            self.screen.blit(effects_surf, (600, 175))
+    
+    def draw_enemy_pack(self):
+        """Компактная сетка карточек стаи; по клику на карточку выбирается цель"""
+        area_x, area_y, area_width, area_height = 340, 30, 540, 180
+        gap = 8
+        count = len(self.enemies)
+        columns = min(count, 4 if count <= 8 else 6)
+        rows = (count + columns - 1) // columns
+        card_width = (area_width - gap * (columns - 1)) // columns
+        card_height = (area_height - gap * (rows - 1)) // rows
+        max_chars = max(4, (card_width - 16) // 7)
+        
+        self.enemy_card_rects = []
+        for index, enemy in enumerate(self.enemies):
+            x = area_x + (index % columns) * (card_width + gap)
+            y = area_y + (index // columns) * (card_height + gap)
+            rect = pygame.Rect(x, y, card_width, card_height)
+            self.enemy_card_rects.append(rect)
+            
+            alive = enemy.hp > 0
+            self.draw_card(x, y, card_width, card_height, 255 if alive else 110)
+            
+            name = enemy.name if len(enemy.name) <= max_chars else enemy.name[:max_chars - 1] + "…"
+            name_color = DANGER_COLOR if alive else TEXT_DISABLED
+            self.screen.blit(TEXT_CACHE.render(FONT_TINY, name, name_color), (x + 8, y + 6))
+            
+            if not alive:
+                self.screen.blit(TEXT_CACHE.render(FONT_TINY, tr("battle.enemy_down"), TEXT_DISABLED), (x + 8, y + 26))
+                continue
+            
+            self.draw_progress_bar(x + 8, y + 26, card_width - 16, 10, enemy.hp, enemy.max_hp, DANGER_COLOR)
+            
+            tags = []
+            if enemy.defending:
+                tags.append(tr("battle.defending_short"))
+            elif enemy.charge > 0:
+                tags.append("[!]")
+            tags.extend(effect.label for effect in enemy.status_effects)
+            if card_height >= 70:
+                stats_key = "battle.card_stats" if card_width >= 130 else "battle.card_stats_short"
+                stats_line = tr(stats_key, attack=enemy.attack, defense=enemy.defense)
+                stats_text = TEXT_CACHE.render(FONT_TINY, stats_line, TEXT_SECONDARY)
+                self.screen.blit(stats_text, (x + 8, y + 42))
+            if tags and card_height >= 54:
+                tags_text = TEXT_CACHE.render(FONT_TINY, " ".join(tags), PURPLE_COLOR)
+                self.screen.blit(tags_text, (x + 8, y + card_height - 20))
+            
+            if index == self.target_index:
+                pygame.draw.rect(self.screen, WARNING_COLOR, rect, 2, border_radius=12)
+    
     def draw_shop(self):
         """Улучшенный магазин"""
         self.draw_gradient_bg()
@@ -2015,47 +2117,129 @@ class Game:
             self.stars[i].update()
             self.stars[i].draw(self.screen)
         
-        title = FONT_TITLE.render("МАГАЗИН", True, WARNING_COLOR)
+        player = self.player
+        self.layers.draw(self.screen, "shop", (player.gold, player.attack, player.defense, player.hp, player.max_hp,
+                                               player.mana, player.max_mana), self.paint_shop_layer)
+        
+        categories = ["all", "potions", "upgrades", "equipment"]
+        for category, button in zip(categories, self.shop_category_buttons):
+            button.update()
+            button.draw(self.screen)
+            if category == self.shop_category:
+                pygame.draw.rect(self.screen, WARNING_COLOR, button.rect, 2, border_radius=10)
+        
+        self.shop_sort_button.text = tr("shop.sort." + self.shop_sort) if self.shop_sort else tr("shop.sort")
+        self.shop_sort_button.update()
+        self.shop_sort_button.draw(self.screen)
+        
+        self.shop_list.update()
+        self.shop_list.draw(self.screen)
+        
+        if self.shop_list.max_scroll() > 0:
+            # Полоса прокрутки справа от списка
+            list_rect = self.shop_list.rect
+            thumb_height = max(30, list_rect.height * list_rect.height // (list_rect.height + self.shop_list.max_scroll()))
+            thumb_y = list_rect.y + (list_rect.height - thumb_height) * self.shop_list.scroll / self.shop_list.max_scroll()
+            pygame.draw.rect(self.screen, TEXT_DISABLED, (list_rect.right + 8, thumb_y, 4, thumb_height), border_radius=2)
+        
+        self.shop_back_button.update()
+        self.shop_back_button.draw(self.screen)
+        
+        if self.message_timer > 0:
+            msg_width = 500
+            msg_height = 60
+            msg_x = SCREEN_WIDTH // 2 - msg_width // 2
+            msg_y = 585
+            
+            alpha = min(255, self.message_timer * 3)
+            self.draw_card(msg_x, msg_y, msg_width, msg_height, alpha)
+            msg_surface = TEXT_CACHE.render(FONT_SMALL, self.message, TEXT_PRIMARY)
+            msg_rect = msg_surface.get_rect(center=(SCREEN_WIDTH // 2, msg_y + 30))
+            self.screen.blit(msg_surface, msg_rect)
+    
+    def paint_shop_layer(self, surface):
+        """Заголовок магазина и карточка с золотом и характеристиками игрока"""
+        title = TEXT_CACHE.render(FONT_TITLE, tr("shop.title"), WARNING_COLOR)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 80))
         
-        title_shadow = FONT_TITLE.render("МАГАЗИН", True, (0, 0, 0))
+        title_shadow = TEXT_CACHE.render(FONT_TITLE, tr("shop.title"), (0, 0, 0))
         shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 2, 82))
-        self.screen.blit(title_shadow, shadow_rect)
-        self.screen.blit(title, title_rect)
+        surface.blit(title_shadow, shadow_rect)
+        surface.blit(title, title_rect)
         
         info_y = 130
         info_width = 700
         info_x = (SCREEN_WIDTH - info_width) // 2
-        self.draw_card(info_x, info_y, info_width, 60)
+        self.cards.draw(surface, info_x, info_y, info_width, 60)
         
-        gold_text = FONT_MEDIUM.render(f"Золото: {self.player.gold}", True, WARNING_COLOR)
-        self.screen.blit(gold_text, (info_x + 20, info_y + 18))
+        gold_text = TEXT_CACHE.render(FONT_MEDIUM, tr("game.gold", gold=self.player.gold), WARNING_COLOR)
+        surface.blit(gold_text, (info_x + 20, info_y + 18))
         
-        stats_text = FONT_SMALL.render(
-            f"Атака: {self.player.attack}  Защита: {self.player.defense}  HP: {self.player.hp}/{self.player.max_hp}  Мана: {self.player.mana}/{self.player.max_mana}",
-            True, TEXT_SECONDARY
+        stats_text = TEXT_CACHE.render(
+            FONT_SMALL,
+            tr("shop.player_stats", attack=self.player.attack, defense=self.player.defense, hp=self.player.hp,
+               max_hp=self.player.max_hp, mana=self.player.mana, max_mana=self.player.max_mana),
+            TEXT_SECONDARY
         )
-        self.screen.blit(stats_text, (info_x + 200, info_y + 20))
+        surface.blit(stats_text, (info_x + 200, info_y + 20))
+    
+    def draw_stash(self):
+        """Склад: инвентарь слева, страница склада справа"""
+        self.draw_gradient_bg()
+        
+        for i in range(0, len(self.stars), 3):
+            self.stars[i].update()
+            self.stars[i].draw(self.screen)
         
-        for button in self.shop_buttons[:-1]:
+        self.layers.draw(self.screen, "stash", (len(self.player.inventory), self.stash_total), self.paint_stash_layer)
+        
+        for category, button in zip(STASH_CATEGORIES, self.stash_category_buttons):
+            button.update()
+            button.draw(self.screen)
+            if category == self.stash_category:
+                pygame.draw.rect(self.screen, SUCCESS_COLOR, button.rect, 2, border_radius=10)
+        
+        self.stash_sort_button.text = tr("stash.sort." + self.stash_order)
+        for button in (self.stash_sort_button, self.stash_prev_button, self.stash_next_button,
+                       self.stash_deposit_button, self.stash_withdraw_button, self.stash_back_button):
             button.update()
             button.draw(self.screen)
         
-        self.shop_buttons[-1].update()
-        self.shop_buttons[-1].draw(self.screen)
+        for virtual_list in (self.stash_inventory_list, self.stash_list):
+            virtual_list.update()
+            virtual_list.draw(self.screen)
+        
+        page_text = TEXT_CACHE.render(FONT_SMALL, tr("stash.page", page=self.stash_page + 1, pages=self.stash_pages),
+                                      TEXT_SECONDARY)
+        self.screen.blit(page_text, page_text.get_rect(center=(600, 530)))
         
         if self.message_timer > 0:
             msg_width = 500
             msg_height = 60
             msg_x = SCREEN_WIDTH // 2 - msg_width // 2
-            msg_y = 560
+            msg_y = 585
             
             alpha = min(255, self.message_timer * 3)
             self.draw_card(msg_x, msg_y, msg_width, msg_height, alpha)
-            msg_surface = FONT_SMALL.render(self.message, True, TEXT_PRIMARY)
+            msg_surface = TEXT_CACHE.render(FONT_SMALL, self.message, TEXT_PRIMARY)
             msg_rect = msg_surface.get_rect(center=(SCREEN_WIDTH // 2, msg_y + 30))
             self.screen.blit(msg_surface, msg_rect)
     
+    def paint_stash_layer(self, surface):
+        """Заголовок склада и подписи колонок с числом предметов"""
+        title_shadow = TEXT_CACHE.render(FONT_TITLE, tr("stash.title"), (0, 0, 0))
+        surface.blit(title_shadow, title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 2, 62)))
+        title = TEXT_CACHE.render(FONT_TITLE, tr("stash.title"), SUCCESS_COLOR)
+        surface.blit(title, title.get_rect(center=(SCREEN_WIDTH // 2, 60)))
+        
+        inventory_text = TEXT_CACHE.render(
+            FONT_SMALL, tr("stash.inventory", count=len(self.player.inventory), capacity=self.player.max_inventory),
+            TEXT_PRIMARY)
+        surface.blit(inventory_text, (30, 155))
+        total_text = TEXT_CACHE.render(FONT_SMALL, tr("stash.total", count=self.stash_total), TEXT_PRIMARY)
+        surface.blit(total_text, (330, 155))
+        self.paint_separator(surface, 30, 178, 840)
+    
     def draw_locations(self):
         """Экран выбора локаций с современным дизайном"""
         self.draw_gradient_bg()
@@ -2067,35 +2251,19 @@ class Game:
         for particle in self.particles:
             particle.draw(self.screen)
         
-        title_text = "ЛОКАЦИИ"
-        
-        glow_surface = pygame.Surface((SCREEN_WIDTH, 120), pygame.SRCALPHA)
-        for i in range(30):
-            glow_alpha = int(12 * (1 - i / 30))
-            pygame.draw.ellipse(glow_surface, (*ACCENT_PRIMARY, glow_alpha), 
-                              (SCREEN_WIDTH // 2 - 200 - i, 60 - i // 2, 400 + i * 2, 30 + i))
-        self.screen.blit(glow_surface, (0, 60))
-        
-        title_shadow = FONT_TITLE.render(title_text, True, (0, 0, 0))
-        shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 2, 102))
-        self.screen.blit(title_shadow, shadow_rect)
-        
-        title = FONT_TITLE.render(title_text, True, ACCENT_PRIMARY)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        self.screen.blit(title, title_rect)
-        
-        subtitle = FONT_SMALL.render(f"Ваш уровень: {self.player.level}", True, TEXT_PRIMARY)
-        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 150))
-        self.screen.blit(subtitle, subtitle_rect)
+        self.layers.draw(self.screen, "locations", self.player.level, self.paint_locations_layer)
         
-        for i, (loc_button, boss_button) in enumerate(zip(self.location_buttons, self.boss_buttons)):
+        for loc_button, boss_button, auto_button in zip(self.location_buttons, self.boss_buttons, self.auto_buttons):
             loc_button.update()
             loc_button.draw(self.screen)
             
             boss_button.update()
             boss_button.draw(self.screen)
+            
+            auto_button.update()
+            auto_button.draw(self.screen)
         
-        back_button = Button(250, 540, 400, 50, "Назад в меню", (70, 80, 100), (90, 100, 120))
+        back_button = Button(250, 540, 400, 50, tr("common.back_to_menu"), (70, 80, 100), (90, 100, 120))
         back_button.update()
         back_button.draw(self.screen)
         
@@ -2104,6 +2272,27 @@ class Game:
         else:
             self.locations_back_button = back_button
     
+    def paint_title(self, surface, title_text, color):
+        """Крупный заголовок экрана со свечением и тенью"""
+        glow_surface = ATLAS.bake(("title_glow", color), SCREEN_WIDTH, 120, paint_ellipse_glow,
+                                  color, 30, 12, (SCREEN_WIDTH // 2 - 200, 60, 400, 30))
+        surface.blit(glow_surface, (0, 60))
+        
+        title_shadow = TEXT_CACHE.render(FONT_TITLE, title_text, (0, 0, 0))
+        shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 2, 102))
+        surface.blit(title_shadow, shadow_rect)
+        
+        title = TEXT_CACHE.render(FONT_TITLE, title_text, color)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
+        surface.blit(title, title_rect)
+    
+    def paint_locations_layer(self, surface):
+        """Заголовок экрана локаций и уровень игрока"""
+        self.paint_title(surface, tr("locations.title"), ACCENT_PRIMARY)
+        subtitle = TEXT_CACHE.render(FONT_SMALL, tr("locations.your_level", level=self.player.level), TEXT_PRIMARY)
+        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 150))
+        surface.blit(subtitle, subtitle_rect)
+    
     def draw_stats(self):
         """Экран статистики игрока"""
         self.draw_gradient_bg()
@@ -2112,41 +2301,35 @@ class Game:
             self.stars[i].update()
             self.stars[i].draw(self.screen)
         
-        title_text = "СТАТИСТИКА"
+        history = self.player.battle_history
+        key = (id(self.player), tuple(self.player.stats.values()), id(history), history.version)
+        self.layers.draw(self.screen, "stats", key, self.paint_stats_layer)
         
-        glow_surface = pygame.Surface((SCREEN_WIDTH, 120), pygame.SRCALPHA)
-        for i in range(30):
-            glow_alpha = int(12 * (1 - i / 30))
-            pygame.draw.ellipse(glow_surface, (*INFO_COLOR, glow_alpha), 
-                              (SCREEN_WIDTH // 2 - 200 - i, 60 - i // 2, 400 + i * 2, 30 + i))
-        self.screen.blit(glow_surface, (0, 60))
-        
-        title_shadow = FONT_TITLE.render(title_text, True, (0, 0, 0))
-        shadow_rect = title_shadow.get_rect(center=(SCREEN_WIDTH // 2 + 2, 102))
-        self.screen.blit(title_shadow, shadow_rect)
-        
-        title = FONT_TITLE.render(title_text, True, INFO_COLOR)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
-        self.screen.blit(title, title_rect)
+        self.stats_back_button.update()
+        self.stats_back_button.draw(self.screen)
+    
+    def paint_stats_layer(self, surface):
+        """Экран статистики целиком, кроме кнопки возврата: меняется только после боя"""
+        self.paint_title(surface, tr("stats.title"), INFO_COLOR)
         
         card_width = 600
         card_height = 400
         card_x = (SCREEN_WIDTH - card_width) // 2
         card_y = 160
         
-        self.draw_card(card_x, card_y, card_width, card_height)
+        self.cards.draw(surface, card_x, card_y, card_width, card_height)
         
         y = card_y + 30
         
         stats_data = [
-            ("Убито врагов:", self.player.stats["enemies_killed"], DANGER_COLOR),
-            ("Убито боссов:", self.player.stats["bosses_killed"], PURPLE_COLOR),
-            ("Заработано золота:", self.player.stats["gold_earned"], WARNING_COLOR),
-            ("Критических ударов:", self.player.stats["critical_hits"], WARNING_COLOR),
-            ("Нанесено урона:", self.player.stats["total_damage_dealt"], DANGER_COLOR),
-            ("Получено урона:", self.player.stats["total_damage_taken"], INFO_COLOR),
-            ("Собрано предметов:", self.player.stats["items_collected"], SUCCESS_COLOR),
-            ("Использовано зелий:", self.player.stats["potions_used"], MANA_COLOR),
+            (tr("stats.enemies_killed"), self.player.stats["enemies_killed"], DANGER_COLOR),
+            (tr("stats.bosses_killed"), self.player.stats["bosses_killed"], PURPLE_COLOR),
+            (tr("stats.gold_earned"), self.player.stats["gold_earned"], WARNING_COLOR),
+            (tr("stats.critical_hits"), self.player.stats["critical_hits"], WARNING_COLOR),
+            (tr("stats.damage_dealt"), self.player.stats["total_damage_dealt"], DANGER_COLOR),
+            (tr("stats.damage_taken"), self.player.stats["total_damage_taken"], INFO_COLOR),
+            (tr("stats.items_collected"), self.player.stats["items_collected"], SUCCESS_COLOR),
+            (tr("stats.potions_used"), self.player.stats["potions_used"], MANA_COLOR),
         ]
         
         for i, (label, value, color) in enumerate(stats_data):
@@ -2156,14 +2339,45 @@ class Game:
             x = card_x + 40 + col * 300
             y_pos = y + row * 45
             
-            label_surf = FONT_SMALL.render(label, True, TEXT_SECONDARY)
-            self.screen.blit(label_surf, (x, y_pos))
+            label_surf = TEXT_CACHE.render(FONT_SMALL, label, TEXT_SECONDARY)
+            surface.blit(label_surf, (x, y_pos))
             
-            value_surf = FONT_MEDIUM.render(str(value), True, color)
-            self.screen.blit(value_surf, (x, y_pos + 20))
+            value_surf = TEXT_CACHE.render(FONT_MEDIUM, str(value), color)
+            surface.blit(value_surf, (x, y_pos + 20))
         
-        self.stats_back_button.update()
-        self.stats_back_button.draw(self.screen)
+        self.paint_battle_history(surface, card_x, y + 190, card_width)
+    
+    def paint_battle_history(self, surface, card_x, y, card_width):
+        """Графики по последним боям и доля побед по локациям"""
+        history = self.player.battle_history
+        pygame.draw.line(surface, (45, 55, 75), (card_x + 30, y - 10), (card_x + card_width - 30, y - 10))
+        if not history.total:
+            empty = TEXT_CACHE.render(FONT_SMALL, tr("stats.history_empty"), TEXT_DISABLED)
+            surface.blit(empty, empty.get_rect(center=(card_x + card_width // 2, y + 60)))
+            return
+        
+        graphs = [
+            ("damage_dealt", tr("stats.history_damage_dealt"), DANGER_COLOR),
+            ("damage_taken", tr("stats.history_damage_taken"), INFO_COLOR),
+            ("gold", tr("stats.history_gold"), WARNING_COLOR),
+        ]
+        x = card_x + 40
+        for i, (column, label, color) in enumerate(graphs):
+            top = y + i * 50
+            label_surf = TEXT_CACHE.render(FONT_TINY, tr("stats.history_last", label=label,
+                                                         value=history.series(column)[-1]), TEXT_SECONDARY)
+            surface.blit(label_surf, (x, top))
+            surface.blit(self.sparklines.get(history, column, 240, 26, color), (x, top + 18))
+        
+        x = card_x + 340
+        title = TEXT_CACHE.render(FONT_TINY, tr("stats.history_win_rates", battles=history.total), TEXT_SECONDARY)
+        surface.blit(title, (x, y))
+        for i, (location, fought, won) in enumerate(history.win_rates()[:5]):
+            rate = won / fought
+            color = SUCCESS_COLOR if rate >= 0.7 else WARNING_COLOR if rate >= 0.4 else DANGER_COLOR
+            line = TEXT_CACHE.render(FONT_TINY, tr("stats.history_location", location=location, won=won,
+                                                   fought=fought, rate=round(rate * 100)), color)
+            surface.blit(line, (x, y + 24 + i * 24))
     
     def draw_equipment(self):
         """Экран экипировки"""
@@ -2183,12 +2397,11 @@ class Game:
                     equipped_item = self.player.equipped.get(slot_type)
                     slot.draw(self.screen, equipped_item)
                 
-                inv_title = FONT_MEDIUM.render("Инвентарь", True, TEXT_PRIMARY)
+                inv_title = TEXT_CACHE.render(FONT_MEDIUM, tr("modal.inventory"), TEXT_PRIMARY)
                 self.screen.blit(inv_title, (400, 115))
                 
-                equipment_items = [item for item in self.player.inventory 
-                                  if item.item_type in ["weapon", "armor"]]
-                slot_text = FONT_TINY.render(f"{len(equipment_items)} предметов", True, TEXT_SECONDARY)
+                equipment_count = len(self.player.inventory.equipment)
+                slot_text = TEXT_CACHE.render(FONT_TINY, tr("equipment.count", count=equipment_count), TEXT_SECONDARY)
                 self.screen.blit(slot_text, (550, 120))
                 
                 for i, button in enumerate(self.inventory_buttons):
@@ -2197,18 +2410,18 @@ class Game:
                 
                 hint_y = modal_rect.bottom - 60
                 if self.sell_mode:
-                    hint_text = FONT_TINY.render("РЕЖИМ ПРОДАЖИ: Выберите предмет для продажи", True, DANGER_COLOR)
+                    hint_text = TEXT_CACHE.render(FONT_TINY, tr("equipment.sell_hint"), DANGER_COLOR)
                 else:
-                    hint_text = FONT_TINY.render("Кликните на предмет для экипировки или на слот для снятия", True, TEXT_SECONDARY)
+                    hint_text = TEXT_CACHE.render(FONT_TINY, tr("equipment.hint"), TEXT_SECONDARY)
                 hint_rect = hint_text.get_rect(centerx=modal_rect.centerx, y=hint_y)
                 self.screen.blit(hint_text, hint_rect)
                 
                 if self.sell_mode:
-                    self.equipment_sell_button.text = "ОТМЕНИТЬ ПРОДАЖУ"
+                    self.equipment_sell_button.text = tr("equipment.cancel_sell")
                     self.equipment_sell_button.color = WARNING_COLOR
                     self.equipment_sell_button.hover_color = tuple(min(255, c + 30) for c in WARNING_COLOR)
                 else:
-                    self.equipment_sell_button.text = "Продать предмет"
+                    self.equipment_sell_button.text = tr("equipment.sell")
                     self.equipment_sell_button.color = DANGER_COLOR
                     self.equipment_sell_button.hover_color = DANGER_HOVER
                 
@@ -2223,6 +2436,9 @@ class Game:
             self.item_detail_window.draw(self.screen)
     
     def handle_menu_events(self, event):
+        if self.runs is not None and self.runs_metric_button.handle_event(event):
+            self.runs_metric = RUN_METRICS[(RUN_METRICS.index(self.runs_metric) + 1) % len(RUN_METRICS)]
+            return
         for i, button in enumerate(self.menu_buttons):
             if button.handle_event(event):
                 if i == 0:
@@ -2237,12 +2453,14 @@ class Game:
                     self.open_locations()
                 elif i == 1:
                     self.state = "shop"
-                    self.update_shop_buttons()
-                    self.message = "Добро пожаловать в магазин!"
+                    self.update_shop_buttons(keep_scroll=False)
+                    self.message = tr("shop.welcome")
                     self.message_timer = 60
                 elif i == 2:
                     self.open_equipment()
                 elif i == 3:
+                    self.open_stash()
+                elif i == 4:
                     self.state = "stats"
     
     def handle_battle_events(self, event):
@@ -2260,13 +2478,12 @@ class Game:
             return
         
         if self.inventory_modal.is_open:
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = get_mouse_pos()
             hovered_item = None
             
-            for i, button in enumerate(self.inventory_buttons):
-                if button.rect.collidepoint(mouse_pos) and i < len(self.player.inventory):
-                    hovered_item = (self.player.inventory[i], mouse_pos[0], mouse_pos[1])
-                    break
+            hovered_handle = self.inventory_list.item_at(mouse_pos)
+            if hovered_handle in self.player.inventory:
+                hovered_item = (self.player.inventory.get(hovered_handle), mouse_pos[0], mouse_pos[1])
             
             if hovered_item and event.type == pygame.MOUSEMOTION:
                 self.item_detail_window.open(hovered_item[0], hovered_item[1], hovered_item[2])
@@ -2280,12 +2497,22 @@ class Game:
                     self.inventory_modal.close()
                     self.item_detail_window.close()
             
-            for i, button in enumerate(self.inventory_buttons):
-                if button.handle_event(event):
-                    self.use_item_in_battle(i)
-                    self.item_detail_window.close()
+            handle = self.inventory_list.handle_event(event)
+            if handle is not None:
+                self.use_item_in_battle(handle)
+                self.item_detail_window.close()
+            return
+        
+        if event.type == pygame.MOUSEWHEEL:
+            self.battle_log_scroll = max(0, min(self.battle_log.max_scroll(), self.battle_log_scroll + event.y))
             return
         
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            for index, rect in enumerate(self.enemy_card_rects):
+                if rect.collidepoint(event.pos):
+                    self.select_target(index)
+                    return
+        
         for i, button in enumerate(self.battle_main_buttons):
             if button.handle_event(event):
                 if i == 0:
@@ -2299,131 +2526,103 @@ class Game:
     
     def handle_shop_events(self, event):
         """Обработка событий магазина"""
-        for i, button in enumerate(self.shop_buttons):
+        if self.shop_back_button.handle_event(event):
+            self.state = "game"
+            return
+        
+        categories = ["all", "potions", "upgrades", "equipment"]
+        for category, button in zip(categories, self.shop_category_buttons):
             if button.handle_event(event):
-                if i < len(self.shop_items):
-                    shop_item = self.shop_items[i]
-                    self.buy_shop_item(shop_item)
-                elif i == len(self.shop_items):
-                    self.state = "game"
+                self.shop_category = category
+                self.shop_list.set_category(category)
                 return
-    
-    def buy_shop_item(self, shop_item):
-        """Купить товар в магазине"""
-        price = shop_item.get_current_price(self.player)
         
-        if self.player.gold < price:
-            self.message = f"Недостаточно золота! Нужно {price}"
-            self.message_timer = 60
+        if self.shop_sort_button.handle_event(event):
+            sort_cycle = [None, "rarity", "price"]
+            self.shop_sort = sort_cycle[(sort_cycle.index(self.shop_sort) + 1) % len(sort_cycle)]
+            self.shop_list.set_sort(self.shop_sort)
             return
         
-        if shop_item.item_type in ["potion_hp", "potion_mana"]:
-            if not self.player.can_add_to_inventory():
-                self.message = "Инвентарь полон! (макс. 10 предметов)"
-                self.message_timer = 90
-                return
-            
-            self.player.gold -= price
-            item_type = shop_item.item_type
-            value = shop_item.item_data["value"]
-            self.player.inventory.append(
-                Item(shop_item.name, item_type, value, shop_item.description, "common")
-            )
-            self.message = f"Куплено: {shop_item.name}!"
-            self.message_timer = 60
+        shop_item = self.shop_list.handle_event(event)
+        if shop_item is not None:
+            self.buy_shop_item(shop_item)
+    
+    def describe_shop_item(self, shop_item):
+        """Текст и цвет строки товара"""
+        price = shop_item.get_current_price(self.player)
+        return tr("shop.row", name=shop_item.name, price=price), shop_item.get_color()
+    
+    def update_shop_buttons(self, keep_scroll=True):
+        """Обновить список товаров, сохранив фильтр и сортировку"""
+        self.shop_list.set_items(self.shop_items, keep_scroll)
+    
+    def open_stash(self):
+        if self.stash is None:
+            self.message = tr("stash.disabled")
+            self.message_timer = 90
+            return
+        self.state = "stash"
+        self.stash_page = 0
+        self.refresh_stash()
+    
+    def refresh_stash(self):
+        """Перечитать счётчик и текущую страницу склада; только при смене страницы, фильтра и переносе предметов"""
+        category = self.stash_category
+        self.stash_inventory_list.set_items(
+            [handle for handle, item in self.player.inventory.entries()
+             if category == "all" or item_category(item) == category], keep_scroll=True)
+        self.stash_total = self.stash.count(category)
+        self.stash_pages = max(1, math.ceil(self.stash_total / STASH_PAGE_SIZE))
+        self.stash_page = min(self.stash_page, self.stash_pages - 1)
+        self.stash_list.set_items(self.stash.page(self.stash_page, category, self.stash_order))
+    
+    def handle_stash_events(self, event):
+        """Обработка событий склада"""
+        if self.stash_back_button.handle_event(event):
+            self.state = "game"
+            return
         
-        elif shop_item.item_type == "potion_multi":
-            if not self.player.can_add_to_inventory():
-                self.message = "Инвентарь полон! (макс. 10 предметов)"
-                self.message_timer = 90
+        for category, button in zip(STASH_CATEGORIES, self.stash_category_buttons):
+            if button.handle_event(event):
+                self.stash_category = category
+                self.stash_page = 0
+                self.refresh_stash()
                 return
-            
-            self.player.gold -= price
-            self.player.inventory.append(
-                Item(shop_item.name, "potion_multi", shop_item.item_data["hp"], 
-                     f"HP +{shop_item.item_data['hp']}, Мана +{shop_item.item_data['mana']}", 
-                     "uncommon")
-            )
-            self.player.inventory[-1].mana_value = shop_item.item_data["mana"]
-            self.message = f"Куплено: {shop_item.name}!"
-            self.message_timer = 60
-        
-        elif shop_item.item_type == "upgrade_attack":
-            self.player.gold -= price
-            self.player.attack += shop_item.item_data["value"]
-            self.player.attack_upgrades_bought += 1
-            self.update_shop_buttons()
-            self.message = f"Атака +{shop_item.item_data['value']}! Новая цена: {shop_item.get_current_price(self.player)} золота"
-            self.message_timer = 90
         
-        elif shop_item.item_type == "upgrade_defense":
-            self.player.gold -= price
-            self.player.defense += shop_item.item_data["value"]
-            self.player.defense_upgrades_bought += 1
-            self.update_shop_buttons()
-            self.message = f"Защита +{shop_item.item_data['value']}! Новая цена: {shop_item.get_current_price(self.player)} золота"
-            self.message_timer = 90
+        if self.stash_sort_button.handle_event(event):
+            orders = list(STASH_ORDERS)
+            self.stash_order = orders[(orders.index(self.stash_order) + 1) % len(orders)]
+            self.stash_page = 0
+            self.refresh_stash()
+            return
         
-        elif shop_item.item_type == "upgrade_hp":
-            self.player.gold -= price
-            self.player.max_hp += shop_item.item_data["value"]
-            self.player.hp += shop_item.item_data["value"]  # Восстанавливаем тоже
-            self.message = f"Макс. HP +{shop_item.item_data['value']}!"
-            self.message_timer = 60
-        
-        elif shop_item.item_type == "upgrade_mana":
-            self.player.gold -= price
-            self.player.max_mana += shop_item.item_data["value"]
-            self.player.mana += shop_item.item_data["value"]  # Восстанавливаем тоже
-            self.message = f"Макс. мана +{shop_item.item_data['value']}!"
-            self.message_timer = 60
-        
-        elif shop_item.item_type == "equipment":
-            if not self.player.can_add_to_inventory():
-                self.message = "Инвентарь полон! (макс. 10 предметов)"
-                self.message_timer = 90
-                return
-            
-            self.player.gold -= price
-            data = shop_item.item_data
-            item = Item(
-                shop_item.name,
-                data["item_type"],
-                data["value"],
-                shop_item.description,
-                data["rarity"],
-                data.get("effect"),
-                data.get("armor_slot")
-            )
-            self.player.inventory.append(item)
-            
-            if shop_item.stock != "unlimited":
-                self.shop_items.remove(shop_item)
-                self.update_shop_buttons()
-            
-            rarity_name = item.get_rarity_name()
-            self.message = f"Куплено: {shop_item.name} ({rarity_name})!"
-            self.message_timer = 90
-    
-    def update_shop_buttons(self):
-        """Обновить кнопки магазина"""
-        self.shop_buttons = []
-        y = 230
+        if self.stash_prev_button.handle_event(event) and self.stash_page > 0:
+            self.stash_page -= 1
+            self.refresh_stash()
+            return
+        if self.stash_next_button.handle_event(event) and self.stash_page < self.stash_pages - 1:
+            self.stash_page += 1
+            self.refresh_stash()
+            return
         
-        for i, shop_item in enumerate(self.shop_items):
-            price = shop_item.get_current_price(self.player)
-            text = f"{shop_item.name} ({price} золота)"
-            
-            color = shop_item.get_color()
-            hover = tuple(min(255, c + 30) for c in color)
-            
-            button = Button(200, y, 500, 50, text, color, hover)
-            self.shop_buttons.append(button)
-            y += 60
+        if self.stash_deposit_button.handle_event(event):
+            self.deposit_items(self.stash_inventory_list.items)
+            self.refresh_stash()
+            return
+        if self.stash_withdraw_button.handle_event(event):
+            self.withdraw_items([stash_id for stash_id, _ in self.stash_list.items])
+            self.refresh_stash()
+            return
         
-        self.shop_buttons.append(
-            Button(300, y + 10, 300, 50, "Назад", (60, 70, 90), (80, 90, 110))
-        )
+        handle = self.stash_inventory_list.handle_event(event)
+        if handle is not None:
+            self.deposit_items([handle])
+            self.refresh_stash()
+            return
+        entry = self.stash_list.handle_event(event)
+        if entry is not None:
+            self.withdraw_items([entry[0]])
+            self.refresh_stash()
     
     def handle_locations_events(self, event):
         """Обработка событий экрана локаций"""
@@ -2437,7 +2636,7 @@ class Game:
                 if self.player.level >= location["level_req"]:
                     self.start_battle_in_location(i, is_boss=False)
                 else:
-                    self.message = f"Требуется {location['level_req']} уровень!"
+                    self.message = tr("msg.level_required", level=location["level_req"])
                     self.message_timer = 90
                 return
         
@@ -2447,7 +2646,17 @@ class Game:
                 if self.player.level >= location["level_req"]:
                     self.start_battle_in_location(i, is_boss=True)
                 else:
-                    self.message = f"Требуется {location['level_req']} уровень!"
+                    self.message = tr("msg.level_required", level=location["level_req"])
+                    self.message_timer = 90
+                return
+        
+        for i, button in enumerate(self.auto_buttons):
+            if button.handle_event(event):
+                location = self.locations[i]
+                if self.player.level >= location["level_req"]:
+                    self.auto_battle(i)
+                else:
+                    self.message = tr("msg.level_required", level=location["level_req"])
                     self.message_timer = 90
                 return
     
@@ -2459,16 +2668,13 @@ class Game:
             self.item_detail_window.close()
             return
         
-        equipment_items = [(idx, item) for idx, item in enumerate(self.player.inventory) 
-                          if item.item_type in ["weapon", "armor"]]
-        
         if event.type == pygame.MOUSEMOTION:
             mouse_pos = event.pos
             hovered_item = None
             
             for i, button in enumerate(self.inventory_buttons):
-                if button.rect.collidepoint(mouse_pos) and i < len(equipment_items):
-                    hovered_item = (equipment_items[i][1], mouse_pos[0], mouse_pos[1])
+                if button.rect.collidepoint(mouse_pos) and i < len(self.inventory_handles):
+                    hovered_item = (self.player.inventory.get(self.inventory_handles[i]), mouse_pos[0], mouse_pos[1])
                     break
             
             if hovered_item:
@@ -2478,68 +2684,56 @@ class Game:
         
         for slot_type, slot in self.equipment_slots.items():
             if slot.handle_event(event):
-                success, msg = self.player.unequip_item(slot_type)
-                if success:
-                    self.message = msg
-                    self.message_timer = 90
+                if self.unequip_item(slot_type):
                     self.update_equipment_inventory_buttons()
                 return
         
         for i, button in enumerate(self.inventory_buttons):
             if button.handle_event(event):
-                if i < len(equipment_items):
-                    actual_index, item = equipment_items[i]
+                if i < len(self.inventory_handles):
+                    handle = self.inventory_handles[i]
                     
                     if self.sell_mode:
-                        sell_price = item.calculate_sell_price()
-                        self.player.gold += sell_price
-                        self.player.inventory.pop(actual_index)
-                        self.message = f"Продано: {item.name} за {sell_price} золота"
-                        self.message_timer = 90
-                        self.update_equipment_inventory_buttons()
-                        self.sell_mode = False
-                    else:
-                        success, msg = self.player.use_item(actual_index)
-                        if success:
-                            self.message = msg
-                            self.message_timer = 90
+                        if self.sell_item(handle):
                             self.update_equipment_inventory_buttons()
+                        self.sell_mode = False
+                    elif self.equip_item(handle):
+                        self.update_equipment_inventory_buttons()
                 return
         
         if self.equipment_sell_button.handle_event(event):
             self.sell_mode = not self.sell_mode
             if self.sell_mode:
-                self.message = "Выберите предмет для продажи"
+                self.message = tr("equipment.choose_to_sell")
                 self.message_timer = 90
             else:
-                self.message = "Режим продажи отключён"
+                self.message = tr("equipment.sell_off")
                 self.message_timer = 60
                 self.selected_sell_item = None
             return
     
     def run(self):
-        """Основной игровой цикл"""
+        """Основной игровой цикл; возвращает код выхода: 1, если с --alloc-report превышен бюджет выделений"""
         while self.running:
-            dt = self.clock.tick(60) / 1000.0
+            if self.allocations:
+                self.allocations.begin_frame(self.state, warming=not self.preloader.finished)
+            events, dt = self.next_events()
+            Button.animating = False
             
-            for event in pygame.event.get():
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.running = False
                 
+                PRESENTER.map_event(event)
                 if self.state == "menu":
                     self.handle_menu_events(event)
                 elif self.state == "game":
                     self.handle_game_events(event)
                 elif self.state == "battle":
                     self.handle_battle_events(event)
-                elif self.state == "victory":
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        self.state = "game"
-                        self.message = "Готовы к новым приключениям!"
-                        self.message_timer = 60
-                elif self.state == "defeat":
+                elif self.state in ("victory", "defeat"):
                     if event.type == pygame.MOUSEBUTTONDOWN:
-                        self.state = "menu"
+                        self.finish_battle()
                 elif self.state == "shop":
                     self.handle_shop_events(event)
                 elif self.state == "locations":
@@ -2549,6 +2743,8 @@ class Game:
                         self.state = "game"
                 elif self.state == "equipment":
                     self.handle_equipment_events(event)
+                elif self.state == "stash":
+                    self.handle_stash_events(event)
             
             if self.message_timer > 0:
                 self.message_timer -= 1
@@ -2574,18 +2770,18 @@ class Game:
                 
                 self.draw_card(victory_x, victory_y, victory_width, victory_height)
                 
-                victory_text = FONT_LARGE.render("ПОБЕДА!", True, SUCCESS_COLOR)
+                victory_text = TEXT_CACHE.render(FONT_LARGE, tr("victory.title"), SUCCESS_COLOR)
                 victory_rect = victory_text.get_rect(center=(SCREEN_WIDTH // 2, victory_y + 30))
                 self.screen.blit(victory_text, victory_rect)
                 
                 y_offset = victory_y + 70
                 for line in message_lines:
-                    line_surf = FONT_SMALL.render(line, True, TEXT_PRIMARY)
+                    line_surf = TEXT_CACHE.render(FONT_SMALL, line, TEXT_PRIMARY)
                     line_rect = line_surf.get_rect(center=(SCREEN_WIDTH // 2, y_offset))
                     self.screen.blit(line_surf, line_rect)
                     y_offset += 25
                 
-                click_text = FONT_TINY.render("Нажмите для продолжения", True, TEXT_SECONDARY)
+                click_text = TEXT_CACHE.render(FONT_TINY, tr("victory.continue"), TEXT_SECONDARY)
                 click_rect = click_text.get_rect(center=(SCREEN_WIDTH // 2, victory_y + victory_height - 25))
                 self.screen.blit(click_text, click_rect)
                 
@@ -2599,11 +2795,11 @@ class Game:
                 
                 self.draw_card(defeat_x, defeat_y, defeat_width, defeat_height)
                 
-                defeat_text = FONT_LARGE.render("ПОРАЖЕНИЕ", True, DANGER_COLOR)
+                defeat_text = TEXT_CACHE.render(FONT_LARGE, tr("defeat.title"), DANGER_COLOR)
                 defeat_rect = defeat_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 20))
                 self.screen.blit(defeat_text, defeat_rect)
                 
-                click_text = FONT_SMALL.render("Нажмите для возврата", True, TEXT_SECONDARY)
+                click_text = TEXT_CACHE.render(FONT_SMALL, tr("defeat.continue"), TEXT_SECONDARY)
                 click_rect = click_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
                 self.screen.blit(click_text, click_rect)
                 
@@ -2615,13 +2811,67 @@ class Game:
                 self.draw_stats()
             elif self.state == "equipment":
                 self.draw_equipment()
+            elif self.state == "stash":
+                self.draw_stash()
             
-            pygame.display.flip()
-        
+            PRESENTER.present()
+            self.update_startup_metrics()
+            if self.runs is not None:
+                self.runs.flush_if_due()
+            
+            if events or self.animations_active():
+                self.idle_frames = 0
+            else:
+                self.idle_frames += 1
+        
+        TELEMETRY.close()
+        if self.stash is not None:
+            self.stash.database.close()
+        if self.runs is not None:
+            self.finish_run("quit")
+            self.runs.close()
+        over_budget = self.allocations.report() if self.allocations else False
         pygame.quit()
-        sys.exit()
+        return 1 if over_budget else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=tr("game.title"))
+    parser.add_argument("--metrics", action="store_true",
+                        help="вывести время до первого кадра и до прогрева кэшей")
+    parser.add_argument("--full-log", action="store_true",
+                        help="хранить полную историю журнала боя с прокруткой колесом мыши")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="масштаб окна относительно внутреннего разрешения 900x650, от 0.5 до 2; "
+                             "кроме 1 стоит масштабирования холста в каждом кадре")
+    parser.add_argument("--scaled", action="store_true",
+                        help="растягивать окно средствами видеокарты (pygame.SCALED), с поддержкой high-DPI")
+    parser.add_argument("--vsync", action="store_true",
+                        help="вертикальная синхронизация; включает --scaled")
+    parser.add_argument("--idle-fps", type=int, default=10,
+                        help="частота кадров в простое, когда на экране нет анимаций; 0 отключает режим простоя")
+    parser.add_argument("--mute", action="store_true", help="запуск без звука")
+    parser.add_argument("--music", metavar="PATH",
+                        help="файл фоновой музыки (ogg, mp3, wav), проигрывается потоком с диска")
+    parser.add_argument("--lang", default=DEFAULT_LANGUAGE, choices=available_languages(),
+                        help="язык интерфейса")
+    parser.add_argument("--telemetry", metavar="PATH",
+                        help="дописывать события игры в файл JSONL для telemetry_report.py")
+    parser.add_argument("--alloc-report", action="store_true",
+                        help="считать новые поверхности по кадрам и экранам, при выходе напечатать отчёт")
+    parser.add_argument("--stash", metavar="PATH", default=DEFAULT_STASH_PATH,
+                        help="файл SQLite склада, куда уходит лут сверх инвентаря (по умолчанию в каталоге данных "
+                             "пользователя, ~/.local/share/zlyki); пустая строка отключает склад")
+    parser.add_argument("--runs", metavar="PATH", default=DEFAULT_RUNS_PATH,
+                        help="файл SQLite истории забегов для таблицы рекордов в меню (по умолчанию в каталоге данных "
+                             "пользователя, ~/.local/share/zlyki); пустая строка отключает историю")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    args = parse_args()
+    game = Game(show_metrics=args.metrics, full_battle_log=args.full_log,
+                scale=args.scale, scaled=args.scaled, vsync=args.vsync, idle_fps=args.idle_fps,
+                sound=not args.mute, music=args.music, language=args.lang, telemetry=args.telemetry,
+                alloc_report=args.alloc_report, stash=args.stash, runs=args.runs)
+    sys.exit(game.run())
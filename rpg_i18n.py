@@ -0,0 +1,81 @@
+"""Локализация: каталоги сообщений по языкам, загружаемые один раз и скомпилированные в шаблоны"""
+import json
+import os
+import string
+
+LOCALES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales")
+DEFAULT_LANGUAGE = "ru"
+
+
+class Message:
+    """Скомпилированный шаблон с кэшем результатов: те же значения дают тот же объект строки без форматирования"""
+    CACHE_SIZE = 64
+    __slots__ = ("text", "format", "results")
+    
+    def __init__(self, text):
+        self.text = text
+        has_fields = any(field is not None for _, field, _, _ in string.Formatter().parse(text))
+        self.format = text.format if has_fields else None
+        self.results = {}
+    
+    def __call__(self, values):
+        if self.format is None:
+            return self.text
+        # Одинаковый объект строки попадает в кэш текста без нового рендера и без пересчёта хэша.
+        # В ключе имена и типы значений: порядок аргументов не важен, а 1, True и 1.0 дают разный текст
+        key = tuple((name, type(value), value) for name, value in sorted(values.items()))
+        try:
+            result = self.results.get(key)
+        except TypeError:
+            # Нехэшируемое значение форматируется без кэша
+            return self.format(**values)
+        if result is None:
+            if len(self.results) >= self.CACHE_SIZE:
+                self.results.clear()
+            result = self.format(**values)
+            self.results[key] = result
+        return result
+
+
+class Catalog:
+    """Сообщения одного языка; отсутствующие ключи берутся из языка по умолчанию"""
+    def __init__(self, language):
+        self.language = language
+        self.messages = {}
+        if language != DEFAULT_LANGUAGE:
+            self.messages.update(load_messages(DEFAULT_LANGUAGE))
+        self.messages.update(load_messages(language))
+    
+    def tr(self, key, values):
+        message = self.messages.get(key)
+        if message is None:
+            # Неизвестный ключ виден на экране, а не роняет игру
+            message = Message(key)
+            self.messages[key] = message
+        return message(values)
+
+
+def load_messages(language):
+    path = os.path.join(LOCALES_DIR, f"{language}.json")
+    with open(path, encoding="utf-8") as catalog_file:
+        return {key: Message(text) for key, text in json.load(catalog_file).items()}
+
+
+def available_languages():
+    return sorted(name[:-5] for name in os.listdir(LOCALES_DIR) if name.endswith(".json"))
+
+
+CATALOG = None
+
+
+def set_language(language):
+    """Выбрать язык; вызывается до создания экранов, кнопки хранят уже переведённый текст"""
+    global CATALOG
+    CATALOG = Catalog(language)
+
+
+def tr(key, **values):
+    """Переведённая строка по ключу каталога с подставленными значениями"""
+    if CATALOG is None:
+        set_language(DEFAULT_LANGUAGE)
+    return CATALOG.tr(key, values)
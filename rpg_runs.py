@@ -0,0 +1,136 @@
+"""История забегов в локальной базе SQLite: итоги пишутся пачками, таблицы рекордов по каждой метрике держатся в памяти"""
+import os
+import sqlite3
+import time
+
+from rpg_core import user_data_path
+
+DEFAULT_RUNS_PATH = user_data_path("runs.sqlite3")
+# Счётчики Player.stats, которые попадают в историю отдельными столбцами
+STAT_NAMES = ("enemies_killed", "bosses_killed", "gold_earned", "critical_hits", "total_damage_dealt",
+              "total_damage_taken", "items_collected", "potions_used")
+# Метрики таблиц рекордов: по каждой есть индекс, больше - лучше
+METRICS = ("level", "enemies_killed", "bosses_killed", "gold_earned", "total_damage_dealt", "duration")
+COLUMNS = ("player", "finished", "duration", "outcome", "level") + STAT_NAMES
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, player TEXT NOT NULL, finished REAL NOT NULL, "
+          "duration REAL NOT NULL, outcome TEXT NOT NULL, level INTEGER NOT NULL, "
+          + ", ".join(f"{name} INTEGER NOT NULL" for name in STAT_NAMES) + ");\n"
+          + "".join(f"CREATE INDEX IF NOT EXISTS runs_by_{metric} ON runs ({metric} DESC, finished);\n"
+                    for metric in METRICS))
+
+
+def format_duration(seconds):
+    """Длительность забега как ч:мм:сс или мм:сс"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+class Run:
+    """Итог одного забега"""
+    def __init__(self, player, finished, duration, outcome, level, stats):
+        self.player = player
+        self.finished = finished
+        self.duration = duration
+        self.outcome = outcome
+        self.level = level
+        self.stats = stats
+    
+    @classmethod
+    def from_row(cls, row):
+        player, finished, duration, outcome, level = row[:5]
+        return cls(player, finished, duration, outcome, level, dict(zip(STAT_NAMES, row[5:])))
+    
+    def row(self):
+        return (self.player, self.finished, self.duration, self.outcome, self.level) + tuple(
+            self.stats.get(name, 0) for name in STAT_NAMES)
+    
+    def metric(self, metric):
+        if metric in ("level", "duration"):
+            return getattr(self, metric)
+        return self.stats.get(metric, 0)
+    
+    def rank_key(self, metric):
+        # При равенстве выше тот, кто добился результата раньше
+        return (-self.metric(metric), self.finished)
+
+
+class RunHistory:
+    """Файл истории забегов; новые итоги копятся и пишутся одной транзакцией на пачку"""
+    BATCH_SIZE = 32
+    FLUSH_INTERVAL = 30.0
+    TOP_LIMIT = 10
+    
+    def __init__(self, path=DEFAULT_RUNS_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.tops = {}
+        # Растёт с каждым новым итогом; по нему экран понимает, что таблицу пора перерисовать
+        self.version = 0
+    
+    def add(self, player, duration, outcome="defeat"):
+        """Записать итог забега игрока; в базу он попадёт со следующей пачкой"""
+        self.record(Run(player.name, time.time(), duration, outcome, player.level, dict(player.stats)))
+    
+    def record(self, run):
+        self.pending.append(run)
+        self.version += 1
+        # Таблицы рекордов обновляются в памяти: верх из старого верха и нового итога, без запроса к базе
+        for metric, top in self.tops.items():
+            top.append(run)
+            top.sort(key=lambda entry: entry.rank_key(metric))
+            del top[self.TOP_LIMIT:]
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        else:
+            self.flush_if_due()
+    
+    def flush_if_due(self):
+        """Записать накопленное, если с прошлой записи прошло flush_interval секунд; зовётся и из игрового цикла"""
+        if self.pending and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """Записать накопленные итоги одной транзакцией"""
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                [run.row() for run in self.pending])
+        self.pending = []
+    
+    def top(self, metric, limit=TOP_LIMIT):
+        """Лучшие забеги по метрике, не больше TOP_LIMIT; база читается по индексу один раз, дальше таблица живёт в памяти"""
+        if metric not in METRICS:
+            raise ValueError(f"нет метрики {metric}")
+        if not 1 <= limit <= self.TOP_LIMIT:
+            raise ValueError(f"limit от 1 до {self.TOP_LIMIT}")
+        top = self.tops.get(metric)
+        if top is None:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM runs ORDER BY {metric} DESC, finished LIMIT ?", (self.TOP_LIMIT,))
+            top = [Run.from_row(row) for row in rows] + self.pending
+            top.sort(key=lambda entry: entry.rank_key(metric))
+            del top[self.TOP_LIMIT:]
+            self.tops[metric] = top
+        return top[:limit]
+    
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0] + len(self.pending)
+    
+    def close(self):
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,531 @@
+"""Игровой сервер без экрана: много независимых сессий в одном процессе asyncio, запросы и ответы - строки JSON по TCP"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import traceback
+import tracemalloc
+
+from rpg_core import BattleLog, GameSession
+from rpg_i18n import set_language, available_languages, DEFAULT_LANGUAGE
+from rpg_runs import METRICS as RUN_METRICS, RunHistory
+from rpg_stash import CATEGORIES as STASH_CATEGORIES, ORDERS as STASH_ORDERS, PAGE_SIZE as STASH_PAGE_SIZE
+from rpg_stash import Stash, StashDatabase
+from rpg_telemetry import TELEMETRY
+
+DEFAULT_PORT = 8765
+REPORT_INTERVAL = 10.0
+# Строка запроса длиннее этого лимита закрывает соединение
+MAX_LINE = 64 * 1024
+BYTES_PER_GB = 1024 ** 3
+# Наибольшее целое SQLite: номера строк склада больше этого не бывают, а в запрос к базе они не пролезут
+MAX_ROW_ID = 2 ** 63 - 1
+
+
+class ActionError(Exception):
+    """Действие недоступно в текущем состоянии или с такими аргументами; соединение не закрывается"""
+
+
+class ActionLog(BattleLog):
+    """Журнал сессии без отрисовки: новые строки копятся до ответа клиенту"""
+    def __init__(self):
+        super().__init__(capacity=4)
+        self.pending = []
+    
+    def push(self, text):
+        super().push(text)
+        self.pending.append(text)
+    
+    def take(self):
+        lines = self.pending
+        self.pending = []
+        return lines
+
+
+class ServerSession(GameSession):
+    """Сессия одного клиента; локации, товары, навыки и типы врагов общие для всех сессий процесса"""
+    # Время поиска ИИ врагов делят все игроки процесса, поэтому бюджет на ход меньше, чем в окне
+    PACK_AI_BUDGET = 0.002
+    
+    def __init__(self, session_id):
+        super().__init__(ActionLog())
+        self.session_id = session_id
+
+
+def item_view(handle, item):
+    return {"handle": handle, "name": item.name, "type": item.item_type, "value": item.value,
+            "rarity": item.rarity, "slot": item.armor_slot, "effect": item.effect}
+
+
+def stash_item_view(stash_id, item):
+    """Предмет склада: вместо дескриптора инвентаря - id строки в базе"""
+    view = item_view(stash_id, item)
+    view["id"] = view.pop("handle")
+    return view
+
+
+def player_view(player):
+    return {
+        "name": player.name, "level": player.level,
+        "hp": player.hp, "max_hp": player.max_hp, "mana": player.mana, "max_mana": player.max_mana,
+        "exp": player.exp, "exp_to_level": player.exp_to_level, "gold": player.gold,
+        "attack": player.attack, "defense": player.defense,
+        "equipped": {slot: item.name if item else None for slot, item in player.equipped.items()},
+        "inventory": [item_view(handle, item) for handle, item in player.inventory.entries()],
+        "skills": [{"name": skill.name, "mana_cost": skill.mana_cost, "area": skill.area} for skill in player.skills],
+        "effects": list(player.status_effects.active),
+    }
+
+
+def enemy_view(enemy):
+    return {"name": enemy.name, "level": enemy.level, "hp": max(0, enemy.hp), "max_hp": enemy.max_hp,
+            "boss": getattr(enemy, "is_boss", False), "effects": list(enemy.status_effects.active)}
+
+
+def argument(request, name, kind, default=None, minimum=None, maximum=None):
+    """Аргумент запроса нужного типа; без значения по умолчанию аргумент обязателен, числа проверяются на границы"""
+    value = request.get(name, default)
+    # bool - подкласс int, номер вида true пропускать нельзя
+    if value is None or not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ActionError(f"нужен аргумент {name} типа {kind.__name__}")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ActionError(f"аргумент {name} должен быть от {minimum} до {maximum}")
+    return value
+
+
+def id_list(request, name):
+    """Список номеров строк склада из запроса"""
+    values = argument(request, name, list)
+    if not all(isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= MAX_ROW_ID
+               for value in values):
+        raise ActionError(f"{name} - список целых чисел от 0 до {MAX_ROW_ID}")
+    return values
+
+
+def resident_bytes():
+    """Резидентная память процесса по /proc; None, если система её так не сообщает"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class GameServer:
+    """Сессии по соединениям, разбор запросов и счётчики нагрузки"""
+    def __init__(self, stash_path=None, runs_path=None):
+        self.sessions = {}
+        self.next_id = 1
+        self.handled = 0
+        self.rejected = 0
+        self.errors = 0
+        self.started = time.perf_counter()
+        self.baseline = resident_bytes()
+        # Одна база склада на все сессии, у каждого игрока свои строки по выданному сервером токену
+        self.stash_database = StashDatabase(stash_path) if stash_path else None
+        # История забегов тоже общая: итоги всех сессий копятся и пишутся одной пачкой
+        self.runs = RunHistory(runs_path) if runs_path else None
+        # Действие: (состояния, в которых оно доступно, или None - в любом; обработчик)
+        self.actions = {
+            "new_game": (None, self.on_new_game),
+            "state": (None, self.on_state),
+            "server": (None, self.on_server),
+            "leaderboard": (None, self.on_leaderboard),
+            "locations": (("game",), self.on_locations),
+            "battle": (("game",), self.on_battle),
+            "shop": (("game",), self.on_shop),
+            "buy": (("game",), self.on_buy),
+            "equip": (("game",), self.on_equip),
+            "unequip": (("game",), self.on_unequip),
+            "sell": (("game",), self.on_sell),
+            "stats": (("game",), self.on_stats),
+            "stash": (("game",), self.on_stash),
+            "deposit": (("game",), self.on_deposit),
+            "withdraw": (("game",), self.on_withdraw),
+            "attack": (("battle",), self.on_attack),
+            "skill": (("battle",), self.on_skill),
+            "item": (("battle",), self.on_item),
+            "target": (("battle",), self.on_target),
+            "flee": (("battle",), self.on_flee),
+            "auto": (("battle",), self.on_auto),
+            "continue": (("victory", "defeat"), self.on_continue),
+        }
+    
+    def open_session(self):
+        session = ServerSession(self.next_id)
+        session.runs = self.runs
+        self.sessions[session.session_id] = session
+        self.next_id += 1
+        return session
+    
+    def close_session(self, session):
+        # Разрыв соединения посреди забега - такой же выход, как закрытие окна в настольной игре
+        session.finish_run("quit")
+        self.sessions.pop(session.session_id, None)
+    
+    def handle(self, session, line):
+        """Выполнить одну строку запроса и вернуть ответ; ошибки клиента возвращаются в ответе"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            request = None
+        if not isinstance(request, dict):
+            self.rejected += 1
+            return {"ok": False, "error": "запрос должен быть объектом JSON", "state": session.state}
+        
+        response = {"id": request.get("id")}
+        name = request.get("action")
+        try:
+            if not isinstance(name, str) or name not in self.actions:
+                raise ActionError(f"неизвестное действие: {name}")
+            states, handler = self.actions[name]
+            if states is not None and session.state not in states:
+                raise ActionError(f"действие {name} недоступно в состоянии {session.state}")
+            session.message = ""
+            data = handler(session, request)
+        except ActionError as error:
+            self.rejected += 1
+            response.update(ok=False, error=str(error), state=session.state)
+            return response
+        except Exception:
+            # Ошибка сервера не должна рвать соединение: она пишется в журнал, клиент получает отказ
+            self.errors += 1
+            print(f"Ошибка в действии {name} сессии {session.session_id}:", file=sys.stderr)
+            traceback.print_exc()
+            session.battle_log.take()
+            response.update(ok=False, error="внутренняя ошибка сервера", state=session.state)
+            return response
+        
+        self.handled += 1
+        response.update(ok=True, state=session.state, log=session.battle_log.take())
+        if session.message:
+            response["message"] = session.message
+        if data is not None:
+            response["data"] = data
+        return response
+    
+    def on_new_game(self, session, request):
+        name = argument(request, "name", str, "").strip()
+        token = argument(request, "token", str, "")
+        if self.stash_database is not None:
+            # Склад принадлежит токену, а не имени: по чужому имени чужой склад не открыть
+            if not token and session.stash is not None:
+                token = session.stash.owner
+            if token:
+                name = self.stash_database.owner_name(token)
+                if name is None:
+                    raise ActionError("неизвестный токен склада")
+            elif name:
+                token = self.stash_database.register(name)
+                if token is None:
+                    raise ActionError(f"имя {name} уже занято")
+        if not name:
+            raise ActionError("нужно непустое имя игрока")
+        session.new_game(name)
+        if self.stash_database is not None:
+            session.stash = Stash(self.stash_database, token)
+            return {"token": token}
+    
+    def on_state(self, session, request):
+        if session.player is None:
+            return {"player": None}
+        view = {"player": player_view(session.player)}
+        if session.state == "battle":
+            view["enemies"] = [enemy_view(enemy) for enemy in session.enemies]
+            view["target"] = session.target_index
+        return view
+    
+    def on_server(self, session, request):
+        return self.load()
+    
+    def on_leaderboard(self, session, request):
+        if self.runs is None:
+            raise ActionError("история забегов не подключена")
+        metric = argument(request, "metric", str, "level")
+        if metric not in RUN_METRICS:
+            raise ActionError(f"метрики: {', '.join(RUN_METRICS)}")
+        limit = argument(request, "limit", int, RunHistory.TOP_LIMIT, minimum=1, maximum=RunHistory.TOP_LIMIT)
+        return [{"player": run.player, "value": run.metric(metric), "level": run.level, "duration": run.duration,
+                 "finished": run.finished, "stats": run.stats} for run in self.runs.top(metric, limit)]
+    
+    def close(self):
+        """Записать незаконченные забеги открытых сессий, дописать накопленные итоги и закрыть базы"""
+        for session in list(self.sessions.values()):
+            self.close_session(session)
+        if self.runs is not None:
+            self.runs.close()
+        if self.stash_database is not None:
+            self.stash_database.close()
+    
+    def on_locations(self, session, request):
+        level = session.player.level
+        return [{"index": index, "name": location["name"], "level_req": location["level_req"],
+                 "open": level >= location["level_req"]} for index, location in enumerate(session.locations)]
+    
+    def on_battle(self, session, request):
+        index = argument(request, "location", int)
+        if not 0 <= index < len(session.locations):
+            raise ActionError(f"нет локации {index}")
+        session.start_battle_in_location(index, argument(request, "boss", bool, False))
+        if session.state != "battle":
+            raise ActionError(session.message)
+    
+    def on_shop(self, session, request):
+        return [{"index": index, "name": shop_item.name, "type": shop_item.item_type,
+                 "category": shop_item.get_category(), "price": shop_item.get_current_price(session.player),
+                 "description": shop_item.description} for index, shop_item in enumerate(session.shop_items)]
+    
+    def on_buy(self, session, request):
+        index = argument(request, "index", int)
+        if not 0 <= index < len(session.shop_items):
+            raise ActionError(f"нет товара {index}")
+        session.buy_shop_item(session.shop_items[index])
+    
+    def on_equip(self, session, request):
+        handle = argument(request, "handle", int)
+        if handle not in session.player.inventory:
+            raise ActionError(f"нет предмета {handle}")
+        if not session.equip_item(handle):
+            raise ActionError(f"предмет {handle} нельзя надеть или использовать")
+    
+    def on_unequip(self, session, request):
+        slot = argument(request, "slot", str)
+        if slot not in session.player.equipped:
+            raise ActionError(f"нет слота {slot}")
+        if not session.unequip_item(slot):
+            raise ActionError(f"слот {slot} пуст или инвентарь полон")
+    
+    def on_sell(self, session, request):
+        if not session.sell_item(argument(request, "handle", int)):
+            raise ActionError("нет такого предмета")
+    
+    def on_stats(self, session, request):
+        history = session.player.battle_history
+        return {"stats": session.player.stats, "battles": history.total,
+                "locations": {name: {"battles": battles, "wins": wins} for name, battles, wins in history.win_rates()}}
+    
+    def on_stash(self, session, request):
+        if session.stash is None:
+            raise ActionError("склад не подключён")
+        category = argument(request, "category", str, "all")
+        order = argument(request, "order", str, "value")
+        if category not in STASH_CATEGORIES or order not in STASH_ORDERS:
+            raise ActionError(f"категории: {', '.join(STASH_CATEGORIES)}; порядок: {', '.join(STASH_ORDERS)}")
+        total = session.stash.count(category)
+        pages = max(1, (total + STASH_PAGE_SIZE - 1) // STASH_PAGE_SIZE)
+        page = argument(request, "page", int, 0, minimum=0, maximum=pages - 1)
+        return {"total": total, "page": page, "pages": pages,
+                "items": [stash_item_view(stash_id, item) for stash_id, item in session.stash.page(page, category, order)]}
+    
+    def on_deposit(self, session, request):
+        if session.stash is None:
+            raise ActionError("склад не подключён")
+        return {"moved": session.deposit_items(id_list(request, "handles"))}
+    
+    def on_withdraw(self, session, request):
+        if session.stash is None:
+            raise ActionError("склад не подключён")
+        return {"moved": session.withdraw_items(id_list(request, "ids"))}
+    
+    def on_attack(self, session, request):
+        session.player_basic_attack()
+    
+    def on_skill(self, session, request):
+        index = argument(request, "index", int)
+        if not 0 <= index < len(session.player.skills):
+            raise ActionError(f"нет навыка {index}")
+        session.use_skill(index)
+    
+    def on_item(self, session, request):
+        handle = argument(request, "handle", int)
+        if handle not in session.player.inventory:
+            raise ActionError(f"нет предмета {handle}")
+        session.use_item_in_battle(handle)
+    
+    def on_target(self, session, request):
+        index = argument(request, "index", int)
+        if not 0 <= index < len(session.enemies) or session.enemies[index].hp <= 0:
+            raise ActionError(f"нет живого врага {index}")
+        session.select_target(index)
+    
+    def on_flee(self, session, request):
+        session.run_away()
+    
+    def on_auto(self, session, request):
+        session.auto_battle_turn()
+    
+    def on_continue(self, session, request):
+        session.finish_battle()
+    
+    def memory_per_session(self):
+        """Прирост резидентной памяти с запуска на одну открытую сессию; None без /proc или без сессий"""
+        resident = resident_bytes()
+        if resident is None or self.baseline is None or not self.sessions:
+            return None
+        return max(resident - self.baseline, 1) / len(self.sessions)
+    
+    def load(self):
+        elapsed = time.perf_counter() - self.started
+        per_session = self.memory_per_session()
+        return {"sessions": len(self.sessions), "handled": self.handled, "rejected": self.rejected,
+                "errors": self.errors, "actions_per_second": self.handled / elapsed if elapsed else 0.0,
+                "bytes_per_session": per_session,
+                "sessions_per_gb": BYTES_PER_GB / per_session if per_session else None}
+    
+    async def serve_client(self, reader, writer):
+        session = self.open_session()
+        try:
+            writer.write(encode({"session": session.session_id, "state": session.state,
+                                 "actions": sorted(self.actions)}))
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(encode(self.handle(session, line)))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError - строка длиннее MAX_LINE
+            pass
+        finally:
+            self.close_session(session)
+            writer.close()
+    
+    async def report_loop(self, interval):
+        """Каждые interval секунд печатать сессии, действия в секунду и память на сессию"""
+        last_time = time.perf_counter()
+        last_handled = self.handled
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            rate = (self.handled - last_handled) / (now - last_time)
+            last_time, last_handled = now, self.handled
+            if self.runs is not None:
+                self.runs.flush()
+            print(load_line(len(self.sessions), rate, self.memory_per_session()), flush=True)
+    
+    async def flush_loop(self):
+        """Не реже раза в flush_interval секунд дописывать итоги забегов, даже если новых итогов нет и отчёты редки"""
+        while True:
+            await asyncio.sleep(self.runs.flush_interval)
+            self.runs.flush()
+
+
+def encode(response):
+    return json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def load_line(sessions, rate, per_session):
+    line = f"Сессий: {sessions}, действий в секунду: {rate:.0f}"
+    if per_session:
+        line += f", память на сессию {per_session / 1024:.1f} КБ, сессий на ГБ: {BYTES_PER_GB / per_session:.0f}"
+    return line
+
+
+async def serve(host, port, interval, stash_path=None, runs_path=None):
+    server = GameServer(stash_path, runs_path)
+    listener = await asyncio.start_server(server.serve_client, host, port, limit=MAX_LINE)
+    print(f"Сервер слушает {host}:{port}", flush=True)
+    tasks = [asyncio.create_task(server.report_loop(interval))]
+    if server.runs is not None:
+        tasks.append(asyncio.create_task(server.flush_loop()))
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        for task in tasks:
+            task.cancel()
+        server.close()
+
+
+def bot_request(session):
+    """Следующее допустимое действие бота нагрузки: бои в открытых локациях, изредка покупки"""
+    if session.state == "menu":
+        # Имя нужно только при первой игре сессии, дальше сервер оставляет за ней прежний склад
+        return {"action": "new_game", "name": f"Бот {random.getrandbits(32):08x}"}
+    if session.state in ("victory", "defeat"):
+        return {"action": "continue"}
+    if session.state == "battle":
+        return {"action": "auto"}
+
+    roll = random.random()
+    if roll < 0.1:
+        return {"action": "buy", "index": random.randrange(len(session.shop_items))}
+    if roll < 0.2:
+        return {"action": "state"}
+    level = session.player.level
+    opened = [index for index, location in enumerate(session.locations) if level >= location["level_req"]]
+    return {"action": "battle", "location": random.choice(opened)}
+
+
+def run_bench(count, seconds, warmup=20, stash_path=None, runs_path=None):
+    """Нагрузка без сети: count сессий ходят по очереди через тот же разбор запросов, что и по TCP"""
+    server = GameServer(stash_path, runs_path)
+    # Память считается tracemalloc на прогреве: сессии уже с инвентарём, историей и журналом
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = [server.open_session() for _ in range(count)]
+    for _ in range(warmup):
+        for session in sessions:
+            encode(server.handle(session, encode(bot_request(session))))
+    per_session = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+
+    # Скорость меряется отдельно, без накладных расходов tracemalloc
+    handled = server.handled
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for session in sessions:
+            encode(server.handle(session, encode(bot_request(session))))
+    elapsed = time.perf_counter() - started
+
+    rate = (server.handled - handled) / elapsed
+    print(load_line(count, rate, per_session))
+    print(f"Отклонено запросов: {server.rejected}, ошибок сервера: {server.errors}, всего выполнено: {server.handled}")
+    if server.runs is not None:
+        print(f"Забегов в истории: {server.runs.count()}")
+    server.close()
+    return 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Игровой сервер без экрана: сессии по TCP, строки JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="адрес для входящих соединений")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="порт")
+    parser.add_argument("--report-interval", type=float, default=REPORT_INTERVAL,
+                        help="как часто печатать сессии, действия в секунду и память на сессию, секунд")
+    parser.add_argument("--bench", type=int, metavar="N",
+                        help="без сети прогнать N сессий ботами и напечатать действия в секунду и сессий на ГБ")
+    parser.add_argument("--seconds", type=float, default=10.0, help="длительность замера --bench, секунд")
+    parser.add_argument("--lang", default=DEFAULT_LANGUAGE, choices=available_languages(),
+                        help="язык сообщений журнала")
+    parser.add_argument("--telemetry", metavar="PATH",
+                        help="дописывать события всех сессий в файл JSONL для telemetry_report.py")
+    parser.add_argument("--stash", metavar="PATH",
+                        help="файл SQLite общего склада; без него лут сверх инвентаря пропадает")
+    parser.add_argument("--runs", metavar="PATH",
+                        help="файл SQLite истории забегов всех сессий для действия leaderboard")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    set_language(args.lang)
+    if args.telemetry:
+        TELEMETRY.open(args.telemetry)
+    try:
+        if args.bench:
+            return run_bench(args.bench, args.seconds, stash_path=args.stash, runs_path=args.runs)
+        asyncio.run(serve(args.host, args.port, args.report_interval, args.stash, args.runs))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        TELEMETRY.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""Склад предметов в локальной базе SQLite: десятки тысяч вещей между сессиями, в памяти только запрошенная страница"""
+import os
+import secrets
+import sqlite3
+
+from rpg_core import Item, RARITY_ORDER, user_data_path
+
+DEFAULT_STASH_PATH = user_data_path("stash.sqlite3")
+# Владелец склада в настольной игре; на сервере владелец - токен, выданный игроку при регистрации имени
+LOCAL_OWNER = "local"
+PAGE_SIZE = 8
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    item_type TEXT NOT NULL,
+    category TEXT,
+    value INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    rarity TEXT NOT NULL,
+    rarity_rank INTEGER NOT NULL,
+    effect TEXT,
+    armor_slot TEXT,
+    mana_value INTEGER
+);
+CREATE INDEX IF NOT EXISTS items_by_value ON items (owner, value);
+CREATE INDEX IF NOT EXISTS items_by_rarity ON items (owner, rarity_rank, value);
+CREATE INDEX IF NOT EXISTS items_by_owner ON items (owner);
+CREATE INDEX IF NOT EXISTS items_by_category_value ON items (owner, category, value);
+CREATE INDEX IF NOT EXISTS items_by_category_rarity ON items (owner, category, rarity_rank, value);
+CREATE INDEX IF NOT EXISTS items_by_category ON items (owner, category);
+CREATE TABLE IF NOT EXISTS owners (
+    token TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+"""
+
+# Фильтры экрана склада; тип и слот сведены в один столбец category, чтобы каждый фильтр с каждым порядком
+# читался по своему индексу без сортировки
+CATEGORIES = ("all", "potions", "weapons", "head", "chest", "legs")
+# Последний ключ - id, чтобы страницы не перемешивались при равных значениях
+ORDERS = {
+    "value": "value DESC, id DESC",
+    "rarity": "rarity_rank DESC, value DESC, id DESC",
+    "recent": "id DESC",
+}
+COLUMNS = "id, name, item_type, value, description, rarity, effect, armor_slot, mana_value"
+
+
+def item_category(item):
+    """Категория предмета из CATEGORIES; ей же экран отбирает инвентарь"""
+    if item.item_type.startswith("potion"):
+        return "potions"
+    if item.item_type == "weapon":
+        return "weapons"
+    return item.armor_slot
+
+
+def item_row(owner, item):
+    return (owner, item.name, item.item_type, item_category(item), item.value, item.description, item.rarity,
+            RARITY_ORDER.get(item.rarity, 0), item.effect, item.armor_slot, getattr(item, "mana_value", None))
+
+
+def row_item(row):
+    """(id, предмет) из строки выборки COLUMNS"""
+    stash_id, name, item_type, value, description, rarity, effect, armor_slot, mana_value = row
+    item = Item(name, item_type, value, description, rarity, effect, armor_slot)
+    if mana_value is not None:
+        item.mana_value = mana_value
+    return stash_id, item
+
+
+class StashDatabase:
+    """Файл склада на все сессии процесса; предметы разных владельцев лежат в одной таблице"""
+    def __init__(self, path=DEFAULT_STASH_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        # WAL с synchronous=NORMAL не ждёт fsync на каждую победу, база при сбое остаётся целой
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+    
+    def register(self, name):
+        """Завести владельца под новым случайным токеном; None, если имя уже занято"""
+        token = secrets.token_hex(16)
+        try:
+            with self.connection:
+                self.connection.execute("INSERT INTO owners (token, name) VALUES (?, ?)", (token, name))
+        except sqlite3.IntegrityError:
+            return None
+        return token
+    
+    def owner_name(self, token):
+        """Имя владельца по токену или None для неизвестного токена"""
+        row = self.connection.execute("SELECT name FROM owners WHERE token = ?", (token,)).fetchone()
+        return row[0] if row else None
+    
+    def store(self, owner, items):
+        """Положить предметы одной транзакцией"""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO items (owner, name, item_type, category, value, description, rarity, rarity_rank, "
+                "effect, armor_slot, mana_value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [item_row(owner, item) for item in items])
+    
+    def where(self, owner, category):
+        if category == "all":
+            return "owner = ?", (owner,)
+        return "owner = ? AND category = ?", (owner, category)
+    
+    def count(self, owner, category="all"):
+        where, parameters = self.where(owner, category)
+        return self.connection.execute(f"SELECT COUNT(*) FROM items WHERE {where}", parameters).fetchone()[0]
+    
+    def page(self, owner, number, category="all", order="value", size=PAGE_SIZE):
+        """Страница [(id, предмет)]; читаются только её строки"""
+        where, parameters = self.where(owner, category)
+        rows = self.connection.execute(
+            f"SELECT {COLUMNS} FROM items WHERE {where} ORDER BY {ORDERS[order]} LIMIT ? OFFSET ?",
+            parameters + (size, number * size))
+        return [row_item(row) for row in rows]
+    
+    def take(self, owner, stash_ids):
+        """Достать предметы по id и удалить их со склада одной транзакцией; чужие и несуществующие id пропускаются"""
+        stash_ids = list(stash_ids)
+        if not stash_ids:
+            return []
+        marks = ", ".join("?" * len(stash_ids))
+        with self.connection:
+            rows = self.connection.execute(
+                f"SELECT {COLUMNS} FROM items WHERE owner = ? AND id IN ({marks}) ORDER BY id",
+                [owner] + stash_ids).fetchall()
+            self.connection.execute(f"DELETE FROM items WHERE owner = ? AND id IN ({marks})", [owner] + stash_ids)
+        return [item for _, item in map(row_item, rows)]
+    
+    def close(self):
+        self.connection.close()
+
+
+class Stash:
+    """Склад одного владельца в общей базе"""
+    def __init__(self, database, owner):
+        self.database = database
+        self.owner = owner
+    
+    def store(self, items):
+        self.database.store(self.owner, items)
+    
+    def count(self, category="all"):
+        return self.database.count(self.owner, category)
+    
+    def page(self, number, category="all", order="value", size=PAGE_SIZE):
+        return self.database.page(self.owner, number, category, order, size)
+    
+    def take(self, stash_ids):
+        return self.database.take(self.owner, stash_ids)
@@ -0,0 +1,77 @@
+"""Телеметрия: структурированные события игры, запись пачками в JSONL-файл из фонового потока"""
+import json
+import queue
+import threading
+import time
+
+
+class Telemetry:
+    """Буфер событий в памяти; полные пачки сериализует и дописывает в файл отдельный поток"""
+    BATCH_SIZE = 512
+    
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.buffer = []
+        self.batches = None
+        self.writer = None
+        self.written = 0
+    
+    def open(self, path):
+        """Начать запись в файл; файл только дописывается, прошлые сессии сохраняются"""
+        if self.enabled:
+            self.close()
+        self.path = path
+        self.buffer = []
+        self.batches = queue.Queue()
+        self.writer = threading.Thread(target=self.write_batches, name="telemetry", daemon=True)
+        self.writer.start()
+        self.enabled = True
+        self.record("session_start")
+    
+    def record(self, kind, **fields):
+        """Добавить событие; без открытого файла ничего не делает"""
+        if not self.enabled:
+            return
+        # В игровом потоке только кортеж в список, сериализация уходит в поток записи
+        self.buffer.append((time.time(), kind, fields))
+        if len(self.buffer) >= self.BATCH_SIZE:
+            self.flush()
+    
+    def flush(self):
+        """Передать накопленную пачку потоку записи, не дожидаясь самой записи"""
+        if self.enabled and self.buffer:
+            self.batches.put(self.buffer)
+            self.buffer = []
+    
+    def close(self):
+        """Записать остаток и дождаться потока; вызывается при выходе из игры"""
+        if not self.enabled:
+            return
+        self.record("session_end")
+        self.flush()
+        self.batches.put(None)
+        self.writer.join()
+        self.enabled = False
+        self.writer = None
+    
+    def write_batches(self):
+        with open(self.path, "a", encoding="utf-8") as log_file:
+            while True:
+                batch = self.batches.get()
+                if batch is None:
+                    break
+                lines = [encode_event(moment, kind, fields) for moment, kind, fields in batch]
+                log_file.write("".join(lines))
+                log_file.flush()
+                self.written += len(batch)
+
+
+def encode_event(moment, kind, fields):
+    """Одна строка JSONL; тип события идёт первым, чтобы анализатор мог отсеивать строки без разбора"""
+    event = {"kind": kind, "t": round(moment, 3)}
+    event.update(fields)
+    return json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+TELEMETRY = Telemetry()
@@ -0,0 +1,112 @@
+"""Процедурные текстуры интерфейса: градиенты и свечения считаются массивами NumPy и пишутся в поверхность разом, без NumPy рисуются построчно"""
+import math
+
+import pygame
+
+# Можно выключить, чтобы сравнить с построчным вариантом
+USE_NUMPY = True
+NUMPY = None
+NUMPY_CHECKED = False
+
+
+def load_numpy():
+    """NumPy, если он установлен; импортируется при первой текстуре, а не при запуске игры"""
+    global NUMPY, NUMPY_CHECKED
+    if not USE_NUMPY:
+        return None
+    if not NUMPY_CHECKED:
+        NUMPY_CHECKED = True
+        try:
+            import numpy
+            NUMPY = numpy
+        except ImportError:
+            NUMPY = None
+    return NUMPY
+
+
+def rgba(color):
+    return tuple(color) if len(color) == 4 else (*color, 255)
+
+
+def gradient_color(stops, position):
+    """Цвет градиента в точке 0..1 по опорным точкам [(позиция, цвет)]"""
+    for (start, start_color), (end, end_color) in zip(stops, stops[1:]):
+        if position <= end:
+            t = (position - start) / (end - start)
+            return tuple(int(a + (b - a) * t) for a, b in zip(rgba(start_color), rgba(end_color)))
+    return rgba(stops[-1][1])
+
+
+def upload_line(surface, line, vertical):
+    """Размножить строку цветов RGBA (длина, 4) на всю поверхность одной записью упакованных пикселей"""
+    numpy = NUMPY
+    packed = numpy.zeros(len(line), dtype=numpy.uint32)
+    # Канал без маски (альфа у поверхности без SRCALPHA) имеет сдвиг 0 и затёр бы синий
+    for channel, (shift, mask) in enumerate(zip(surface.get_shifts(), surface.get_masks())):
+        if mask:
+            packed |= line[:, channel].astype(numpy.uint32) << shift
+    pixels = pygame.surfarray.pixels2d(surface)
+    # surfarray индексирует пиксели как [x, y]
+    pixels[...] = packed[numpy.newaxis, :] if vertical else packed[:, numpy.newaxis]
+    del pixels
+
+
+def upload_alpha(surface, color, alpha_values):
+    """Один цвет на всю поверхность и массив альфы (ширина, высота)"""
+    surface.fill((*color[:3], 0))
+    alpha = pygame.surfarray.pixels_alpha(surface)
+    alpha[...] = alpha_values
+    del alpha
+
+
+def paint_gradient(surface, stops, vertical=True):
+    """Линейный градиент по опорным точкам [(позиция 0..1, цвет RGB или RGBA)] сверху вниз или слева направо"""
+    width, height = surface.get_size()
+    length = height if vertical else width
+    if not length:
+        return
+    numpy = load_numpy()
+    if numpy is None:
+        for i in range(length):
+            color = gradient_color(stops, i / length)
+            if vertical:
+                pygame.draw.line(surface, color, (0, i), (width - 1, i))
+            else:
+                pygame.draw.line(surface, color, (i, 0), (i, height - 1))
+        return
+
+    positions = numpy.arange(length) / length
+    points = [position for position, _ in stops]
+    colors = [rgba(color) for _, color in stops]
+    line = numpy.stack([numpy.interp(positions, points, [color[channel] for color in colors])
+                        for channel in range(4)], axis=-1).astype(numpy.uint8)
+    upload_line(surface, line, vertical)
+
+
+def paint_radial_glow(surface, color, peak_alpha, center=(0, 0), radii=None):
+    """Свечение, гаснущее от центра до эллипса с полуосями radii: альфа peak_alpha * (1 - расстояние)"""
+    width, height = surface.get_size()
+    radius_x, radius_y = radii or (width, height)
+    center_x, center_y = center
+    numpy = load_numpy()
+    if numpy is None:
+        for i in range(height):
+            for j in range(width):
+                distance = math.sqrt(((i - center_y) / radius_y) ** 2 + ((j - center_x) / radius_x) ** 2)
+                surface.set_at((j, i), (*color[:3], int(max(0, peak_alpha * (1 - distance)))))
+        return
+
+    x = (numpy.arange(width) - center_x) / radius_x
+    y = (numpy.arange(height) - center_y) / radius_y
+    distance = numpy.sqrt(x[:, numpy.newaxis] ** 2 + y[numpy.newaxis, :] ** 2)
+    upload_alpha(surface, color, numpy.maximum(0, peak_alpha * (1 - distance)).astype(numpy.uint8))
+
+
+def paint_ellipse_glow(surface, color, steps, peak_alpha, ellipse):
+    """Ореол из steps колец вокруг эллипса, каждое шире прошлого; альфа падает от peak_alpha до нуля у внешнего"""
+    x, y, width, height = ellipse
+    # Эллипс pygame рисуется в C быстрее, чем массив такого размера; рисование в поверхность не смешивает цвета,
+    # поэтому кольца идут от внешнего к внутреннему
+    for i in range(steps - 1, -1, -1):
+        alpha = int(peak_alpha * (1 - i / steps))
+        pygame.draw.ellipse(surface, (*color[:3], alpha), (x - i, y - i // 2, width + i * 2, height + i))
@@ -0,0 +1,151 @@
+"""Сводка по файлам телеметрии: бои, урон, лут, покупки и проверка частот редкости лута"""
+import argparse
+import json
+import math
+import sys
+from collections import Counter, defaultdict
+
+from rpg_core import LOOT_RARITY_THRESHOLDS
+
+# Отклонение частоты редкости больше этого числа стандартных ошибок считается расхождением с порогами
+Z_LIMIT = 4.0
+KIND_PREFIX = b'{"kind":"'
+
+
+class Report:
+    """Агрегаты по событиям; строки разбираются только для типов, у которых есть обработчик"""
+    def __init__(self):
+        self.kinds = Counter()
+        self.battles = defaultdict(Counter)
+        self.attacks = 0
+        self.crits = 0
+        self.attack_damage = 0
+        self.damage_taken = 0
+        self.rarity_rolls = Counter()
+        self.drops = Counter()
+        self.dropped_full = 0
+        self.stashed = 0
+        self.purchases = defaultdict(lambda: [0, 0])
+        self.flee = Counter()
+        self.handlers = {
+            b"battle_end": self.on_battle_end,
+            b"attack": self.on_attack,
+            b"damage_taken": self.on_damage_taken,
+            b"loot_roll": self.on_loot_roll,
+            b"loot_drop": self.on_loot_drop,
+            b"purchase": self.on_purchase,
+            b"flee": self.on_flee,
+        }
+    
+    def read(self, path):
+        kinds = self.kinds
+        handlers = self.handlers
+        prefix_length = len(KIND_PREFIX)
+        with open(path, "rb") as log_file:
+            for line in log_file:
+                if not line.startswith(KIND_PREFIX):
+                    continue
+                # Тип события всегда первый, его можно достать без разбора всей строки
+                kind = line[prefix_length:line.index(b'"', prefix_length)]
+                kinds[kind] += 1
+                handler = handlers.get(kind)
+                if handler is not None:
+                    handler(json.loads(line))
+    
+    def on_battle_end(self, event):
+        self.battles[event["location"]][event["result"]] += 1
+    
+    def on_attack(self, event):
+        self.attacks += 1
+        self.crits += event["crit"]
+        self.attack_damage += event["damage"]
+    
+    def on_damage_taken(self, event):
+        self.damage_taken += event["damage"]
+    
+    def on_loot_roll(self, event):
+        self.rarity_rolls[event["rarity"]] += 1
+    
+    def on_loot_drop(self, event):
+        self.drops[event["rarity"]] += 1
+        # В файлах до появления склада поля stashed нет
+        if event.get("stashed"):
+            self.stashed += 1
+        elif not event["kept"]:
+            self.dropped_full += 1
+    
+    def on_purchase(self, event):
+        entry = self.purchases[event["item"]]
+        entry[0] += 1
+        entry[1] += event["price"]
+    
+    def on_flee(self, event):
+        self.flee[event["success"]] += 1
+    
+    def check_rarity(self):
+        """Строки сверки с LOOT_RARITY_THRESHOLDS и признак расхождения"""
+        total = sum(self.rarity_rolls.values())
+        if not total:
+            return ["  бросков редкости нет"], False
+        
+        lines = []
+        failed = False
+        lower = 0.0
+        for rarity, threshold in LOOT_RARITY_THRESHOLDS:
+            expected = threshold - lower
+            lower = threshold
+            observed = self.rarity_rolls[rarity] / total
+            error = math.sqrt(expected * (1 - expected) / total)
+            z = (observed - expected) / error if error else 0.0
+            status = "OK" if abs(z) <= Z_LIMIT else "FAIL"
+            failed = failed or status == "FAIL"
+            lines.append(f"  {rarity}: {observed:.4f} (ожидалось {expected:.4f}, z={z:+.2f}) {status}")
+        return lines, failed
+    
+    def print(self):
+        total = sum(self.kinds.values())
+        print(f"Событий: {total}")
+        for kind, count in self.kinds.most_common():
+            print(f"  {kind.decode()}: {count}")
+        
+        print("Бои по локациям:")
+        for location, results in sorted(self.battles.items(), key=lambda entry: str(entry[0])):
+            fought = sum(results.values())
+            print(f"  {location}: {fought} боёв, побед {results['victory'] / fought:.1%}, "
+                  f"поражений {results['defeat']}, побегов {results['fled']}")
+        
+        if self.attacks:
+            print(f"Атаки: {self.attacks}, криты {self.crits / self.attacks:.2%}, "
+                  f"средний урон {self.attack_damage / self.attacks:.1f}")
+        print(f"Получено урона: {self.damage_taken}")
+        
+        if self.drops:
+            drops = ", ".join(f"{rarity} {count}" for rarity, count in self.drops.most_common())
+            print(f"Выпало предметов: {sum(self.drops.values())} ({drops}), унесено на склад {self.stashed}, "
+                  f"потеряно из-за полного инвентаря {self.dropped_full}")
+        for item, (count, gold) in sorted(self.purchases.items(), key=lambda entry: -entry[1][1]):
+            print(f"Покупки: {item} x{count}, {gold} золота")
+        if self.flee:
+            attempts = sum(self.flee.values())
+            print(f"Побеги: {attempts} попыток, удачных {self.flee[True] / attempts:.1%}")
+        
+        lines, failed = self.check_rarity()
+        print(f"Редкость лута ({sum(self.rarity_rolls.values())} бросков):")
+        for line in lines:
+            print(line)
+        return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сводка по файлам телеметрии игры")
+    parser.add_argument("paths", nargs="+", metavar="PATH", help="файлы JSONL, записанные с --telemetry")
+    args = parser.parse_args()
+
+    report = Report()
+    for path in args.paths:
+        report.read(path)
+    return 1 if report.print() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())